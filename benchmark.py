@@ -0,0 +1,271 @@
+"""Planner benchmarks.
+
+Run ``python benchmark.py`` to reproduce the numbers quoted in the README.
+"""
+from collections import defaultdict
+import glob
+import heapq
+import random
+import shutil
+import tempfile
+import time
+
+from dstar_lite import DStarLite
+import final
+from hpa import HierarchicalPlanner
+from jps import get_tables, jump_point_search
+from pathfinding import a_star, heuristic
+import qtable_store
+from training import train_q_learning
+import usingrl
+from value_iteration import value_iteration
+from warehouse_grid import WarehouseGrid
+
+
+# Reference copy of a_star_pathfinding before the indexed heap, which scanned
+# the whole open set on every relaxation
+def legacy_a_star_pathfinding(start, goal, grid, stats):
+    rows, cols = len(grid), len(grid[0])
+    open_set = []
+    heapq.heappush(open_set, (0, start))
+    came_from = {}
+    g_score = defaultdict(lambda: float('inf'))
+    g_score[start] = 0
+    expanded = 0
+
+    while open_set:
+        current = heapq.heappop(open_set)[1]
+        expanded += 1
+        if current == goal:
+            stats['expanded'] = expanded
+            return final.reconstruct_path(came_from, current)
+
+        for action in final.actions.values():
+            neighbor = (current[0] + action[0], current[1] + action[1])
+            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols and grid[neighbor[0]][neighbor[1]] != 'X':
+                tentative_g_score = g_score[current] + 1
+                if tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    if neighbor not in [item[1] for item in open_set]:
+                        heapq.heappush(open_set, (g_score[neighbor] + heuristic(neighbor, goal), neighbor))
+
+    stats['expanded'] = expanded
+    return []
+
+
+def random_grid(rows, cols, density, seed=0):
+    rng = random.Random(seed)
+    grid = [['X' if rng.random() < density else '.' for _ in range(cols)] for _ in range(rows)]
+    grid[0][0] = grid[rows - 1][cols - 1] = '.'
+    return grid
+
+
+def time_planner(name, planner, *args):
+    stats = {}
+    started = time.perf_counter()
+    path = planner(*args, stats=stats)
+    elapsed = time.perf_counter() - started
+    expanded = stats['expanded']
+    print(f"  {name:<34} {expanded:>8} expanded  {elapsed:8.3f}s  "
+          f"{expanded / elapsed:>10.0f} exp/s  path {len(path or [])}")
+    return elapsed
+
+
+def bench_open_set(size=500, density=0.2):
+    print(f"A* open-set handling on {size}x{size}, {density:.0%} obstacles, corner to corner")
+    grid = random_grid(size, size, density)
+    start, goal = (0, 0), (size - 1, size - 1)
+    legacy = time_planner("a_star_pathfinding (list scan)", legacy_a_star_pathfinding, start, goal, grid)
+    indexed = time_planner("a_star_pathfinding (indexed heap)", final.a_star_pathfinding, start, goal, grid)
+    time_planner("a_star (indexed heap)", a_star, grid, start, goal)
+    print(f"  speed-up: {legacy / indexed:.1f}x")
+
+
+def bench_replan(size=200, density=0.2, replans=100, seed=0):
+    print(f"Replanning around moving blockers on {size}x{size}, {replans} replans")
+    rng = random.Random(seed)
+    grid = WarehouseGrid.from_rows(random_grid(size, size, density, seed))
+    start, goal = (0, 0), (size - 1, size - 1)
+    planner = DStarLite(grid, start, goal)
+    planner.replan(start)
+    initial = planner.expanded
+    pos, path = start, planner.path()
+    scratch_expanded = incremental_expanded = 0
+    scratch_time = incremental_time = 0.0
+    for _ in range(replans):
+        # A few cells just ahead of the bot get blocked, as other bots would
+        ahead = path[1:6]
+        blocked = set(rng.sample(ahead, min(2, len(ahead))))
+        stats = {}
+        started = time.perf_counter()
+        a_star(grid, pos, goal, stats=stats)
+        scratch_time += time.perf_counter() - started
+        scratch_expanded += stats['expanded']
+        before = planner.expanded
+        started = time.perf_counter()
+        planner.replan(pos, blocked)
+        path = planner.path()
+        incremental_time += time.perf_counter() - started
+        incremental_expanded += planner.expanded - before
+        if path:
+            pos = path[0]
+    print(f"  initial D* Lite search: {initial} expanded")
+    print(f"  a_star from scratch: {scratch_expanded / replans:10.1f} expanded/replan  "
+          f"{scratch_time / replans * 1000:7.2f} ms/replan")
+    print(f"  D* Lite repair:      {incremental_expanded / replans:10.1f} expanded/replan  "
+          f"{incremental_time / replans * 1000:7.2f} ms/replan")
+
+
+def bench_hierarchical(size=500, density=0.2, queries=10, seed=0):
+    print(f"Cross-warehouse trips on {size}x{size}, {density:.0%} obstacles, {queries} queries")
+    rng = random.Random(seed)
+    grid = WarehouseGrid.from_rows(random_grid(size, size, density, seed))
+    started = time.perf_counter()
+    planner = HierarchicalPlanner(grid, cluster_size=10)
+    print(f"  HPA* preprocessing: {time.perf_counter() - started:.2f}s")
+    free = [(r, c) for r in range(size) for c in range(size) if grid.is_free((r, c))]
+    totals = {'a_star': [0, 0.0, 0], 'hpa_star': [0, 0.0, 0]}
+    abstract = 0  # HPA* expansions on the abstract graph alone, without refinement
+    for _ in range(queries):
+        # From roughly the top ten rows of the floor to the bottom ten
+        start = rng.choice(free[:size * 8])
+        end = rng.choice(free[-size * 8:])
+        for name, planner_fn in (('a_star', lambda s, e, stats: a_star(grid, s, e, stats)),
+                                 ('hpa_star', planner.find_path)):
+            stats = {}
+            started = time.perf_counter()
+            path = planner_fn(start, end, stats=stats)
+            totals[name][1] += time.perf_counter() - started
+            totals[name][0] += stats['expanded']
+            totals[name][2] += len(path or [])
+            abstract += stats.get('abstract_expanded', 0)
+    for name, (expanded, elapsed, length) in totals.items():
+        print(f"  {name:<9} {expanded / queries:10.0f} expanded/query  {elapsed / queries * 1000:8.1f} ms/query  "
+              f"mean path {length / queries:.1f}")
+    print(f"  (hpa_star abstract graph alone: {abstract / queries:.0f} expanded/query)")
+
+
+def aisle_grid(rows, cols, shelf=8):
+    # Shelving racks two cells deep and `shelf` long, separated by one-cell
+    # aisles, with a cross aisle every few racks
+    grid = [['.'] * cols for _ in range(rows)]
+    for r in range(1, rows - 1):
+        if r % 3 == 0:
+            continue
+        for c in range(1, cols - 1):
+            if c % (shelf + 1) != 0:
+                grid[r][c] = 'X'
+    return grid
+
+
+def bench_jump_points(size=500, queries=10, seed=0):
+    print(f"Jump Point Search vs A* on {size}x{size}, {queries} queries per layout")
+    rng = random.Random(seed)
+    layouts = [
+        ("open floor", random_grid(size, size, 0.0, seed)),
+        ("shelving aisles", aisle_grid(size, size)),
+        ("5% obstacles", random_grid(size, size, 0.05, seed)),
+        ("20% obstacles", random_grid(size, size, 0.2, seed)),
+    ]
+    for name, rows in layouts:
+        grid = WarehouseGrid.from_rows(rows)
+        started = time.perf_counter()
+        get_tables(grid)
+        print(f"  {name} (jump tables built in {time.perf_counter() - started:.2f}s)")
+        free = [(r, c) for r in range(size) for c in range(size) if grid.is_free((r, c))]
+        pairs = [(rng.choice(free), rng.choice(free)) for _ in range(queries)]
+        for planner_name, planner in (('a_star', a_star), ('jump_point_search', jump_point_search)):
+            expanded, elapsed = 0, 0.0
+            for start, end in pairs:
+                stats = {}
+                started = time.perf_counter()
+                planner(grid, start, end, stats=stats)
+                elapsed += time.perf_counter() - started
+                expanded += stats['expanded']
+            print(f"    {planner_name:<18} {expanded / queries:10.0f} expanded/query  "
+                  f"{elapsed / queries * 1000:8.1f} ms/query")
+
+
+def bench_value_iteration(sizes=(10, 20, 50), density=0.2, seed=0):
+    print(f"Value iteration vs Q-learning convergence, one bot corner to corner, {density:.0%} obstacles")
+    for size in sizes:
+        grid = WarehouseGrid.from_rows(random_grid(size, size, density, seed))
+        start, dest = (0, 0), (size - 1, size - 1)
+        solved = value_iteration(grid, dest, final.actions)
+        trained = train_q_learning(grid, {'A1': start}, {'A1': dest}, final.actions, seed=seed,
+                                   max_episodes=10 ** 6, time_limit=120.0)
+        status = "converged" if trained.converged else "not converged"
+        print(f"  {size}x{size}: value iteration {solved.solve_time * 1000:8.1f} ms ({solved.iterations} sweeps)  "
+              f"Q-learning {trained.train_time:7.2f} s ({trained.episodes} episodes, {status})")
+
+
+def greedy_steps(bot, start):
+    # Moves the bot's greedy policy needs from start, or None if it loops or hits a wall
+    pos, seen = start, {start}
+    while pos != bot.dest:
+        move = usingrl.actions[int(bot.q_table[pos].argmax())]
+        pos = (pos[0] + move[0], pos[1] + move[1])
+        if not bot.grid.is_free(pos) or pos in seen:
+            return None
+        seen.add(pos)
+    return len(seen) - 1
+
+
+def corridor_grid(rows, cols):
+    # One long corridor folded back and forth across the grid
+    grid = [['.'] * cols for _ in range(rows)]
+    for r in range(1, rows, 2):
+        grid[r] = ['X'] * cols
+        grid[r][cols - 1 if r // 2 % 2 == 0 else 0] = '.'
+    return grid
+
+
+def bench_eligibility_traces(trace_decays=(0.0, 0.5, 0.9), runs=5, max_episodes=2000):
+    print(f"Episodes until usingrl's greedy policy is a shortest path, mean of {runs} runs per bot")
+    cases = []
+    for filename in sorted(glob.glob("test/*.txt")):
+        labels = WarehouseGrid.from_file(filename).labels
+        cells = {label: pos for pos, label in labels.items()}
+        bots = [(name, pos, cells[name.replace('A', 'B')]) for name, pos in sorted(cells.items())
+                if name.startswith('A') and name.replace('A', 'B') in cells]
+        cases.append((filename, WarehouseGrid.from_file(filename).to_rows(), bots))
+    corridor = corridor_grid(9, 10)
+    cases.append(("corridor 9x10", corridor, [('A1', (0, 0), (8, 0))]))
+
+    scratch = tempfile.mkdtemp()
+    qtable_store.use_directory(scratch)  # Start every run from an empty Q-table
+    try:
+        for label, rows, bots in cases:
+            line = []
+            for trace_decay in trace_decays:
+                episodes = []
+                for name, start, dest in bots:
+                    path = a_star(rows, start, dest)
+                    if path is None:
+                        continue
+                    for run in range(runs):
+                        random.seed(run)
+                        grid = WarehouseGrid.from_rows(rows)  # New grid object, new shared table
+                        for episode in range(1, max_episodes + 1):
+                            bot = usingrl.AutobotQLearning(start, dest, grid, name, trace_decay=trace_decay)
+                            for _ in range(20000):
+                                if bot.pos == dest:
+                                    break
+                                bot.move([bot])
+                            if greedy_steps(bot, start) == len(path):
+                                break
+                        episodes.append(episode)
+                line.append(f"lambda={trace_decay:g}: {sum(episodes) / len(episodes):6.1f} episodes")
+            print(f"  {label:<16} " + "  ".join(line))
+    finally:
+        shutil.rmtree(scratch)
+
+
+if __name__ == "__main__":
+    bench_open_set()
+    bench_replan()
+    bench_hierarchical()
+    bench_jump_points()
+    bench_value_iteration()
+    bench_eligibility_traces()
@@ -0,0 +1,243 @@
+"""Conflict-Based Search for small, high-value layouts.
+
+The high level searches a tree of constraint sets; every node holds one path
+per bot, each found by space-time A* (spacetime.space_time_a_star) under that
+bot's constraints.  The first conflict in a node's paths splits it into two
+children that forbid the clash for one bot or the other.
+
+With ``suboptimality=1`` the first conflict-free node is a minimal
+sum-of-costs plan.  Larger values give the bounded-suboptimal variant used by
+ECBS: any node whose cost is within ``suboptimality`` times the lowest open
+cost may be expanded, and the one with the fewest conflicts goes first.
+The low level stays optimal, so this is the high-level focal search of ECBS
+(BCBS(w, 1)), which is what lets the solver reach tens of bots.
+"""
+import heapq
+import itertools
+import time
+
+from spacetime import ReservationTable, plan_prioritized, space_time_a_star
+from warehouse_grid import WarehouseGrid
+
+# Owner recorded for constraint entries in a bot's reservation table
+CONSTRAINT = object()
+
+
+class CBSResult:
+    def __init__(self):
+        self.paths = {}
+        self.cost = 0  # Sum of arrival times over all bots
+        self.solved = False  # False when limits were hit and we fell back
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.solve_time = 0.0
+        self.suboptimality = 1.0
+
+    def summary(self):
+        status = "solved" if self.solved else "limit reached, fell back to prioritized planning"
+        return (f"CBS (w={self.suboptimality:g}) {status}: sum of costs {self.cost}, "
+                f"{self.nodes_expanded} nodes expanded, {self.nodes_generated} generated, "
+                f"{self.solve_time:.3f}s")
+
+
+class _Node:
+    def __init__(self, parent, bot_id, constraint, paths):
+        self.parent = parent
+        self.bot_id = bot_id  # Bot the new constraint applies to
+        self.constraint = constraint  # ('vertex', cell, t) or ('edge', from_cell, to_cell, t)
+        self.paths = paths
+        self.cost = sum(len(steps) for steps in paths.values())
+        self.conflicts = 0
+        self.closed = False
+
+    def constraints_for(self, bot_id):
+        node = self
+        while node is not None:
+            if node.bot_id == bot_id:
+                yield node.constraint
+            node = node.parent
+
+
+def _position(start, steps, t):
+    # Bots stay on their last cell once their path is done
+    if t == 0 or not steps:
+        return start
+    return steps[min(t, len(steps)) - 1]
+
+
+def _conflicts(bot_starts, paths, first_only=False):
+    """List conflicts as ('vertex', a, b, cell, t) or ('edge', a, b, a_from, a_to, t)."""
+    bots = list(paths)
+    horizon = max((len(steps) for steps in paths.values()), default=0)
+    found = []
+    for t in range(1, horizon + 1):
+        occupied = {}
+        for bot_id in bots:
+            cell = _position(bot_starts[bot_id], paths[bot_id], t)
+            other = occupied.get(cell)
+            if other is not None:
+                found.append(('vertex', other, bot_id, cell, t))
+                if first_only:
+                    return found
+            else:
+                occupied[cell] = bot_id
+        for i, a in enumerate(bots):
+            a_from = _position(bot_starts[a], paths[a], t - 1)
+            a_to = _position(bot_starts[a], paths[a], t)
+            if a_from == a_to:
+                continue
+            for b in bots[i + 1:]:
+                if (_position(bot_starts[b], paths[b], t - 1) == a_to
+                        and _position(bot_starts[b], paths[b], t) == a_from):
+                    found.append(('edge', a, b, a_from, a_to, t))
+                    if first_only:
+                        return found
+    return found
+
+
+def _constraint_table(node, bot_id, stranded=()):
+    # stranded: start cells of bots left out, which never move
+    table = ReservationTable()
+    for cell in stranded:
+        table.park(cell, 0, CONSTRAINT)
+    for constraint in (node.constraints_for(bot_id) if node is not None else ()):
+        if constraint[0] == 'vertex':
+            _, cell, t = constraint
+            table.reserve_vertex(cell, t, CONSTRAINT)
+        else:
+            # move_allowed rejects from -> to when the reverse edge is taken
+            _, from_cell, to_cell, t = constraint
+            table.reserve_edge(to_cell, from_cell, t, CONSTRAINT)
+    return table
+
+
+def _split(conflict):
+    # Each conflict yields one constraint per bot involved
+    if conflict[0] == 'vertex':
+        _, a, b, cell, t = conflict
+        return [(a, ('vertex', cell, t)), (b, ('vertex', cell, t))]
+    _, a, b, a_from, a_to, t = conflict
+    return [(a, ('edge', a_from, a_to, t - 1)), (b, ('edge', a_to, a_from, t - 1))]
+
+
+def solve_cbs(grid, bot_starts, bot_destinations, suboptimality=1.0, max_nodes=20000, time_limit=30.0):
+    """Solve the fleet with (bounded-suboptimal) Conflict-Based Search.
+
+    Returns a CBSResult.  If max_nodes or time_limit run out first, the
+    result falls back to plan_prioritized and has ``solved`` set to False.
+    suboptimality must be at least 1 (1 is optimal CBS).
+    """
+    if suboptimality < 1:
+        raise ValueError("suboptimality must be at least 1.")
+    grid = WarehouseGrid.coerce(grid)
+    started = time.perf_counter()
+    result = CBSResult()
+    result.suboptimality = suboptimality
+    bot_starts = {bot_id: tuple(start) for bot_id, start in bot_starts.items()
+                  if bot_destinations.get(bot_id)}
+
+    # Bots that cannot reach their destination are left out like plan_paths
+    # does; they stay on their start cells, which every other bot must avoid
+    all_starts = bot_starts
+    stranded = set()
+    while True:
+        newly_stranded = False
+        root_paths = {}
+        for bot_id, start in bot_starts.items():
+            if start in stranded:
+                continue
+            steps = space_time_a_star(grid, start, bot_destinations[bot_id], _constraint_table(None, bot_id, stranded),
+                                      bot_id)
+            if steps is None:
+                stranded.add(start)
+                newly_stranded = True
+            else:
+                root_paths[bot_id] = steps
+        if not newly_stranded:
+            break  # Otherwise paths planned before a bot got stranded may cross its cell
+    bot_starts = {bot_id: bot_starts[bot_id] for bot_id in root_paths}
+
+    counter = itertools.count()
+    open_list = []  # Every unexpanded node by cost, for the lower bound
+    focal = []  # Nodes within the bound, fewest conflicts first
+    pending = []  # Unexpanded nodes not yet within the bound, by cost
+    bound = 0
+
+    def push(node):
+        entry = (node.cost, next(counter), node)
+        heapq.heappush(open_list, entry)
+        if node.cost <= bound:
+            heapq.heappush(focal, (node.conflicts, node.cost, entry[1], node))
+        else:
+            heapq.heappush(pending, entry)
+
+    root = _Node(None, None, None, root_paths)
+    root.conflicts = len(_conflicts(bot_starts, root_paths))
+    push(root)
+    result.nodes_generated = 1
+    best = None
+
+    while True:
+        while open_list and open_list[0][2].closed:
+            heapq.heappop(open_list)
+        if not open_list:
+            break
+        # Child costs never drop below their parent's, so the bound only grows
+        bound = open_list[0][0] * suboptimality
+        while pending and pending[0][0] <= bound:
+            cost, order, node = heapq.heappop(pending)
+            heapq.heappush(focal, (node.conflicts, cost, order, node))
+        while focal and focal[0][3].closed:
+            heapq.heappop(focal)
+        _, _, _, node = heapq.heappop(focal)
+        node.closed = True
+        result.nodes_expanded += 1
+
+        conflict = _conflicts(bot_starts, node.paths, first_only=True)
+        if not conflict:
+            best = node
+            break
+        if result.nodes_expanded >= max_nodes or time.perf_counter() - started > time_limit:
+            break
+
+        for bot_id, constraint in _split(conflict[0]):
+            child = _Node(node, bot_id, constraint, dict(node.paths))
+            table = _constraint_table(child, bot_id, stranded)
+            steps = space_time_a_star(grid, bot_starts[bot_id], bot_destinations[bot_id], table, bot_id)
+            if steps is None:
+                continue
+            child.paths[bot_id] = steps
+            child.cost = sum(len(s) for s in child.paths.values())
+            child.conflicts = len(_conflicts(bot_starts, child.paths))
+            result.nodes_generated += 1
+            push(child)
+
+    if best is not None:
+        result.paths = best.paths
+        result.solved = True
+    else:
+        result.paths = plan_prioritized(grid, all_starts, bot_destinations)
+    result.cost = sum(len(steps) for steps in result.paths.values())
+    result.solve_time = time.perf_counter() - started
+    return result
+
+
+class CBSPlanner:
+    """Fleet planner for simulation.plan_fleet / simulate(fleet_planner=...).
+
+    Keeps the CBSResult of the last call so callers can report node counts
+    and solve time.
+    """
+
+    def __init__(self, suboptimality=1.0, max_nodes=20000, time_limit=30.0):
+        if suboptimality < 1:
+            raise ValueError("suboptimality must be at least 1.")
+        self.suboptimality = suboptimality
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.last_result = None
+
+    def __call__(self, grid, bot_starts, bot_destinations):
+        self.last_result = solve_cbs(grid, bot_starts, bot_destinations, self.suboptimality,
+                                     self.max_nodes, self.time_limit)
+        return self.last_result.paths
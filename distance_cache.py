@@ -0,0 +1,138 @@
+"""Per-destination distance fields with O(1) next-step lookup.
+
+Bots share a handful of destinations, so instead of searching from every bot
+we run one reverse BFS from each destination and keep the resulting distance
+field.  A bot then walks downhill: the next step is whichever neighbour is
+one move closer.  Fields are evicted least-recently-used once they exceed a
+memory cap and are dropped whenever the grid changes.
+"""
+from collections import OrderedDict
+import weakref
+
+import numpy as np
+
+from warehouse_grid import WarehouseGrid
+
+UNREACHABLE = -1
+
+
+class DistanceFieldCache:
+    def __init__(self, grid, max_bytes=64 * 1024 * 1024):
+        # Weak, so that _caches does not keep the grid (its key) alive
+        self._grid = weakref.ref(grid)
+        self.max_bytes = max_bytes
+        self._fields = OrderedDict()  # dest -> flat int32 distance field
+        self._version = grid.version
+        self.hits = 0
+        self.misses = 0
+        grid.add_listener(self._on_grid_change)
+
+    @property
+    def grid(self):
+        return self._grid()
+
+    def _on_grid_change(self, pos, blocked):
+        self.invalidate()
+
+    def invalidate(self):
+        self._fields.clear()
+        self._version = self.grid.version
+
+    @property
+    def nbytes(self):
+        return sum(field.nbytes for field in self._fields.values())
+
+    def distance_field(self, dest):
+        """Return the flat distance field of dest, computing it on a miss."""
+        if self._version != self.grid.version:
+            self.invalidate()
+        dest = tuple(dest)
+        field = self._fields.get(dest)
+        if field is not None:
+            self._fields.move_to_end(dest)
+            self.hits += 1
+            return field
+        self.misses += 1
+        field = self._reverse_bfs(dest)
+        self._fields[dest] = field
+        # Always keep the field just computed, even if it alone is over the cap
+        while len(self._fields) > 1 and self.nbytes > self.max_bytes:
+            self._fields.popitem(last=False)
+        return field
+
+    def _reverse_bfs(self, dest):
+        # Moves are symmetric and unit cost, so a BFS outwards from the
+        # destination gives every cell's distance to it.  Each frontier is
+        # expanded as one NumPy operation.
+        grid = self.grid
+        field = np.full(grid.size, UNREACHABLE, dtype=np.int32)
+        if not grid.is_free(dest):
+            return field
+        frontier = np.array([grid.index(dest)], dtype=np.int32)
+        field[frontier] = 0
+        distance = 0
+        while frontier.size:
+            distance += 1
+            candidates = grid.neighbors[frontier].ravel()
+            candidates = candidates[candidates >= 0]
+            candidates = np.unique(candidates[field[candidates] == UNREACHABLE])
+            field[candidates] = distance
+            frontier = candidates
+        return field
+
+    def distance(self, pos, dest):
+        """Moves from pos to dest, or None if dest cannot be reached."""
+        value = int(self.distance_field(dest)[self.grid.index(pos)])
+        return None if value == UNREACHABLE else value
+
+    def next_step(self, pos, dest, blocked=()):
+        """The neighbour of pos one move closer to dest, skipping cells in blocked.
+
+        Returns None at the destination or when no neighbour leads there.
+        """
+        if not self.grid.in_bounds(pos) or tuple(pos) == tuple(dest):
+            return None
+        field = self.distance_field(dest)
+        best, best_distance = None, None
+        for neighbor in self.grid.neighbors[self.grid.index(pos)].tolist():
+            if neighbor < 0:
+                continue
+            distance = int(field[neighbor])
+            if distance == UNREACHABLE or (best_distance is not None and distance >= best_distance):
+                continue
+            step = self.grid.position(neighbor)
+            if step in blocked:
+                continue
+            best, best_distance = step, distance
+        return best
+
+    def path(self, start, dest):
+        """Steps from start to dest in a_star's format, or None if unreachable."""
+        if not self.grid.in_bounds(start):
+            return None
+        steps = []
+        current = tuple(start)
+        dest = tuple(dest)
+        while current != dest:
+            current = self.next_step(current, dest)
+            if current is None:
+                return None
+            steps.append(current)
+        return steps
+
+
+# One cache per grid object, dropped together with the grid
+_caches = weakref.WeakKeyDictionary()
+
+
+def get_cache(grid):
+    cache = _caches.get(grid)
+    if cache is None:
+        cache = _caches[grid] = DistanceFieldCache(grid)
+    return cache
+
+
+def cached_path(grid, start, end):
+    """Drop-in replacement for pathfinding.a_star backed by the shared cache."""
+    grid = WarehouseGrid.coerce(grid)  # The cache only holds the grid weakly
+    return get_cache(grid).path(start, end)
@@ -0,0 +1,148 @@
+"""D* Lite incremental replanning for a single bot.
+
+The search runs backwards from the destination and keeps its g/rhs values
+between calls.  When cells become blocked or free (another bot parks in the
+aisle, an obstacle is placed) only the vertices around those cells are
+updated, and the repair touches the part of the search that depended on
+them.  Moving the bot only bumps the key modifier ``km``.
+
+Koenig & Likhachev, "D* Lite", AAAI 2002 (optimised version, figure 4).
+"""
+from priority_queue import IndexedPriorityQueue
+from warehouse_grid import MOVES
+
+INF = float('inf')
+
+
+class DStarLite:
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.blocked = set()  # Cells blocked for this bot only, e.g. other bots
+        self.km = 0
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.queue = IndexedPriorityQueue()
+        self.queue.push(self.goal, self._key(self.goal))
+        self.expanded = 0  # Vertices expanded over the planner's lifetime
+        self._changed = set()  # Static grid cells changed since the last replan
+        grid.add_listener(self._on_grid_change)
+
+    def _on_grid_change(self, pos, blocked):
+        self._changed.add(tuple(pos))
+
+    def close(self):
+        self.grid.remove_listener(self._on_grid_change)
+
+    def _h(self, a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def _key(self, s):
+        best = min(self.g.get(s, INF), self.rhs.get(s, INF))
+        return (best + self._h(self.start, s) + self.km, best)
+
+    def _passable(self, s):
+        return self.grid.is_free(s) and s not in self.blocked
+
+    def _cost(self, a, b):
+        # Unit moves; entering or leaving an impassable cell is infinitely costly.
+        # The bot's own cell is always passable for it.
+        if (a != self.start and not self._passable(a)) or (b != self.start and not self._passable(b)):
+            return INF
+        return 1
+
+    def _neighbors(self, s):
+        r, c = s
+        for dr, dc in MOVES:
+            n = (r + dr, c + dc)
+            if self.grid.in_bounds(n):
+                yield n
+
+    def _update_vertex(self, u):
+        if u != self.goal:
+            self.rhs[u] = min((self._cost(u, s) + self.g.get(s, INF) for s in self._neighbors(u)), default=INF)
+        if u in self.queue:
+            self.queue.remove(u)
+        if self.g.get(u, INF) != self.rhs.get(u, INF):
+            self.queue.push(u, self._key(u))
+
+    def _compute_shortest_path(self):
+        queue = self.queue
+        while queue and (queue.peek()[1] < self._key(self.start)
+                         or self.rhs.get(self.start, INF) != self.g.get(self.start, INF)):
+            u, k_old = queue.peek()
+            k_new = self._key(u)
+            self.expanded += 1
+            if k_old < k_new:
+                queue.push(u, k_new)
+            elif self.g.get(u, INF) > self.rhs.get(u, INF):
+                self.g[u] = self.rhs[u]
+                queue.remove(u)
+                for s in self._neighbors(u):
+                    self._update_vertex(s)
+            else:
+                self.g[u] = INF
+                self._update_vertex(u)
+                for s in self._neighbors(u):
+                    self._update_vertex(s)
+
+    def _touch(self, cells):
+        # A cell's passability feeds the cost of every edge around it
+        for cell in cells:
+            self._update_vertex(cell)
+            for s in self._neighbors(cell):
+                self._update_vertex(s)
+
+    def replan(self, start, blocked=()):
+        """Move the search to start, apply blocked-cell changes and repair.
+
+        blocked is the full set of cells this bot must currently avoid; only
+        the difference to the previous call is fed into the search.
+        """
+        start = tuple(start)
+        old_start = self.start
+        if start != old_start:
+            self.km += self._h(old_start, start)
+            self.start = start
+        blocked = set(blocked)
+        blocked.discard(start)
+        changed = (blocked ^ self.blocked) | self._changed
+        if start != old_start:
+            # Edge costs around the old and new own cell differ for this bot
+            changed |= {start, old_start}
+        self.blocked = blocked
+        self._changed = set()
+        self._touch(changed)
+        self._compute_shortest_path()
+
+    def next_step(self):
+        """The neighbour to move to next, or None if the goal is cut off."""
+        if self.start == self.goal:
+            return None
+        best, best_cost = None, INF
+        for s in self._neighbors(self.start):
+            cost = self._cost(self.start, s) + self.g.get(s, INF)
+            if cost < best_cost:
+                best, best_cost = s, cost
+        return best
+
+    def path(self):
+        """Steps from the current start to the goal in a_star's format, or []."""
+        if self.g.get(self.start, INF) == INF and self.start != self.goal:
+            return []
+        steps = []
+        current = self.start
+        seen = {current}
+        while current != self.goal:
+            best, best_cost = None, INF
+            for s in self._neighbors(current):
+                cost = self._cost(current, s) + self.g.get(s, INF)
+                if cost < best_cost:
+                    best, best_cost = s, cost
+            if best is None or best in seen:
+                return steps  # Values not consistent this far out; follow what we have
+            steps.append(best)
+            seen.add(best)
+            current = best
+        return steps
@@ -1,9 +1,12 @@
 import tkinter as tk
 import numpy as np
-from collections import defaultdict
 import random
 from tkinter import filedialog, messagebox, simpledialog
 
+from occupancy import track
+from qtable_store import save_q_table, shared_q_table
+from warehouse_grid import WarehouseGrid
+
 # Function to generate a random grid with obstacles
 def generate_random_grid(rows, cols, obstacle_count):
     """
@@ -15,15 +18,15 @@ def generate_random_grid(rows, cols, obstacle_count):
         obstacle_count (int): Number of obstacles to place in the grid.
 
     Returns:
-        list: A grid represented as a list of lists with 'X' as obstacles and ' ' as free spaces.
+        WarehouseGrid: A grid with the obstacle cells blocked.
     """
-    grid = [[' ' for _ in range(cols)] for _ in range(rows)]
+    grid = WarehouseGrid(rows, cols)
     # Place obstacles
     for _ in range(obstacle_count):
         while True:
             r, c = random.randint(0, rows - 1), random.randint(0, cols - 1)
-            if grid[r][c] == ' ':
-                grid[r][c] = 'X'
+            if grid.is_free((r, c)):
+                grid.set_obstacle((r, c))
                 break
     return grid
 
@@ -36,21 +39,17 @@ def read_multiple_grids(file_list):
         file_list (list): List of file paths to read from.
 
     Returns:
-        tuple: A list of grids and a list of bot positions for each grid.
+        tuple: A list of WarehouseGrid objects and a list of bot positions for each grid.
     """
     grids = []  # List to store grids
     bot_positions_list = []  # List to store bot positions for each grid
 
     for filename in file_list:
-        grid = []
+        grid = WarehouseGrid.from_file(filename)
         bot_positions = {}  # Dictionary to store autobot start and destination positions
-        with open(filename, 'r') as file:
-            for r, line in enumerate(file):
-                row = line.strip().split()
-                grid.append(row)
-                for c, cell in enumerate(row):
-                    if cell.startswith('A') or cell.startswith('B'):
-                        bot_positions[cell] = (r, c)
+        for (r, c), cell in grid.labels.items():
+            if cell.startswith('A') or cell.startswith('B'):
+                bot_positions[cell] = (r, c)
         
         grids.append(grid)
         bot_positions_list.append(bot_positions)
@@ -67,32 +66,38 @@ actions = {
 
 # Define autobot class using Q-learning
 class AutobotQLearning:
-    def __init__(self, start, dest, grid, name, alpha=0.1, gamma=0.9, epsilon=0.1):
+    def __init__(self, start, dest, grid, name, alpha=0.1, gamma=0.9, epsilon=0.1, trace_decay=0.0):
         """
         Initialize the Autobot Q-learning agent.
 
         Args:
             start (tuple): Starting position (row, column) of the bot.
             dest (tuple): Destination position (row, column) of the bot.
-            grid (list): The grid the bot will navigate.
+            grid (WarehouseGrid): The grid the bot will navigate.
             name (str): Name of the bot.
             alpha (float): Learning rate.
             gamma (float): Discount factor.
             epsilon (float): Exploration rate.
+            trace_decay (float): Lambda of Watkins Q(lambda) eligibility traces.
+                0 gives plain one-step Q-learning.
         """
         self.pos = start
         self.dest = dest
         self.grid = grid
         self.name = name
-        self.q_table = defaultdict(lambda: [0, 0, 0, 0])
+        # Shared with every bot on this grid heading to the same destination
+        self.q_table = shared_q_table(self.grid, actions).table(dest)
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
+        self.trace_decay = trace_decay
+        self.traces = np.zeros(self.q_table.shape, dtype=np.float32) if trace_decay else None
+        self.occupancy = None  # Fleet-wide OccupancyGrid, set on the first move
         self.steps = 0
         self.time_taken = None
         self.reached = False
         self.learned_path = []
-        self.rows, self.cols = len(self.grid), len(self.grid[0])
+        self.rows, self.cols = self.grid.rows, self.grid.cols
     
     def get_state(self):
         """Get the current state of the bot."""
@@ -103,7 +108,7 @@ class AutobotQLearning:
         if random.uniform(0, 1) < self.epsilon:
             return random.choice(list(actions.keys()))  # Explore
         else:
-            return np.argmax(self.q_table[self.get_state()])  # Exploit best action from Q-table
+            return int(self.q_table[self.get_state()].argmax())  # Exploit best action from Q-table
 
     def update_q_value(self, state, action, reward, next_state):
         """
@@ -115,9 +120,21 @@ class AutobotQLearning:
             reward (float): The reward received after taking the action.
             next_state (tuple): The new state after the action.
         """
-        old_value = self.q_table[state][action]
-        future_value = max(self.q_table[next_state])
-        self.q_table[state][action] = old_value + self.alpha * (reward + self.gamma * future_value - old_value)
+        q_values = self.q_table[state]  # View into the table, updated in place
+        future_value = self.q_table[next_state].max()
+        td_error = reward + self.gamma * future_value - q_values[action]
+        if self.traces is None:
+            q_values[action] += self.alpha * td_error
+            return
+        # Watkins Q(lambda): the error also updates every recently visited
+        # (state, action), weighted by how recently it was taken
+        if q_values[action] != q_values.max() or next_state == state:
+            # Exploratory and blocked moves break the chain of credit, so
+            # earlier moves are not blamed for walking into a wall
+            self.traces[:] = 0
+        self.traces[state][action] = 1  # Replacing traces
+        self.q_table += self.alpha * td_error * self.traces
+        self.traces *= self.gamma * self.trace_decay
 
     def get_reward(self, new_pos):
         """
@@ -131,7 +148,7 @@ class AutobotQLearning:
         """
         if new_pos == self.dest:
             return 100
-        elif self.grid[new_pos[0]][new_pos[1]] == 'X':
+        elif self.grid.is_obstacle(new_pos):
             return -100
         else:
             return -1
@@ -146,9 +163,7 @@ class AutobotQLearning:
         Returns:
             bool: True if valid, False otherwise.
         """
-        return (0 <= pos[0] < self.rows and 
-                0 <= pos[1] < self.cols and 
-                self.grid[pos[0]][pos[1]] != 'X')
+        return self.grid.is_free(pos)
 
     def move(self, bots):
         """Move the bot towards its destination using Q-learning."""
@@ -161,14 +176,20 @@ class AutobotQLearning:
         state = self.get_state()
         action = self.choose_action()
         new_pos = (self.pos[0] + actions[action][0], self.pos[1] + actions[action][1])
-        
-        if self.is_valid_position(new_pos) and not any(bot.pos == new_pos for bot in bots if bot != self):
+        occupancy = self.occupancy or track(self.grid, bots)
+
+        if self.is_valid_position(new_pos) and not occupancy.is_taken(new_pos, self):
             reward = self.get_reward(new_pos)
             next_state = new_pos
             self.update_q_value(state, action, reward, next_state)
+            occupancy.move(self, new_pos)
             self.pos = new_pos
             self.steps += 1
             self.learned_path.append(self.pos)
+            if self.pos == self.dest:
+                save_q_table(self.grid, self.dest, actions, self.q_table)  # Warm start for the next run
+                if self.traces is not None:
+                    self.traces[:] = 0  # Episode over
         else:
             reward = -10
             self.update_q_value(state, action, reward, state)
@@ -222,7 +243,7 @@ def create_gui(grids, bot_positions_list):
         """Update the grid displayed in the GUI."""
         canvas.delete("all")  # Clear previous grid
         grid = grids[current_grid_idx]
-        rows, cols = len(grid), len(grid[0])
+        rows, cols = grid.rows, grid.cols
 
         # Dynamically adjust canvas size based on grid dimensions
         canvas.config(width=cols * cell_size, height=rows * cell_size)
@@ -234,7 +255,7 @@ def create_gui(grids, bot_positions_list):
                 x2 = x1 + cell_size
                 y2 = y1 + cell_size
 
-                if grid[r][c] == 'X':
+                if grid.is_obstacle((r, c)):
                     canvas.create_rectangle(x1, y1, x2, y2, fill='red', outline="black")
                 else:
                     canvas.create_rectangle(x1, y1, x2, y2, fill='white', outline="black")
@@ -0,0 +1,179 @@
+"""Structured, bounded event log with lazy formatting.
+
+Formatting a message for every bot on every tick and keeping all of them in
+a list made logging the slowest part of a long run.  EventLog stores each
+event as a compact record (tick, bot, command code, cell, level) in
+fixed-size NumPy arrays used as a ring buffer, so memory stays bounded and
+the oldest records are overwritten.  Text is only produced when a record is
+read, from a per-code template such as ``"{bot}: Forward"``.
+
+Sinks (stdout, a file, ...) are fed by a background thread: ``log`` only
+puts the raw record on a queue, and the thread formats and writes it.
+Records are addressed by sequence number; ``select`` finds the ones that
+match a bot or command with one vectorised pass, which is what a log view
+needs to show a filtered window of a long run.
+"""
+from queue import SimpleQueue
+import sys
+import threading
+
+import numpy as np
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+NO_CELL = (-1, -1)
+
+
+class EventLog:
+    def __init__(self, templates, capacity=100000, level=INFO):
+        # templates: command code -> format string using {bot}, {tick},
+        # {row}, {col} and {text}.  Codes without one print their number.
+        self.templates = dict(templates)
+        self.capacity = capacity
+        self.level = level  # Records below this level are dropped at once
+        self.ticks = np.zeros(capacity, dtype=np.int32)
+        self.bots = np.zeros(capacity, dtype=np.int16)
+        self.codes = np.zeros(capacity, dtype=np.int16)
+        self.rows = np.zeros(capacity, dtype=np.int32)
+        self.cols = np.zeros(capacity, dtype=np.int32)
+        self.levels = np.zeros(capacity, dtype=np.int8)
+        self.texts = {}  # Slot -> free text, only for the few records that carry some
+        self.bot_ids = []  # Bot index -> bot id
+        self._bot_index = {}
+        self.count = 0  # Records ever logged; the next one gets this sequence number
+        self._sinks = []
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()  # Bots may log from a worker thread and the Tk thread at once
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def first(self):
+        """Sequence number of the oldest record still held."""
+        return max(0, self.count - self.capacity)
+
+    def bot_index(self, bot_id):
+        index = self._bot_index.get(bot_id)
+        if index is None:
+            index = self._bot_index[bot_id] = len(self.bot_ids)
+            self.bot_ids.append(bot_id)
+        return index
+
+    def log(self, tick, bot_id, code, pos=NO_CELL, level=INFO, text=None):
+        if level < self.level:
+            return
+        with self._lock:
+            slot = self.count % self.capacity
+            self.ticks[slot] = tick
+            self.bots[slot] = self.bot_index(bot_id)
+            self.codes[slot] = code
+            self.rows[slot], self.cols[slot] = pos
+            self.levels[slot] = level
+            if text is not None:
+                self.texts[slot] = text
+            else:
+                self.texts.pop(slot, None)
+            self.count += 1
+            if self._queue is not None:
+                self._queue.put((tick, bot_id, code, pos, level, text))
+
+    def format_record(self, tick, bot_id, code, pos, text=None):
+        template = self.templates.get(code)
+        if template is None:
+            return f"{bot_id}: {code}"
+        return template.format(bot=bot_id, tick=tick, row=pos[0], col=pos[1], text=text)
+
+    def format(self, seq):
+        """Text of record seq (a sequence number still in the buffer)."""
+        if not self.first <= seq < self.count:
+            raise IndexError("log record no longer held")
+        slot = seq % self.capacity
+        return self.format_record(int(self.ticks[slot]), self.bot_ids[self.bots[slot]], int(self.codes[slot]),
+                                  (int(self.rows[slot]), int(self.cols[slot])), self.texts.get(slot))
+
+    def messages(self, seqs=None):
+        if seqs is None:
+            seqs = range(self.first, self.count)
+        return [self.format(int(seq)) for seq in seqs]
+
+    def select(self, bot_ids=None, codes=None, level=None, start=None):
+        """Sequence numbers of held records matching all the given filters, oldest first."""
+        first = self.first if start is None else max(start, self.first)
+        seqs = np.arange(first, self.count, dtype=np.int64)
+        slots = seqs % self.capacity
+        mask = np.ones(len(seqs), dtype=bool)
+        if bot_ids is not None:
+            wanted = [self._bot_index[bot_id] for bot_id in bot_ids if bot_id in self._bot_index]
+            mask &= np.isin(self.bots[slots], wanted)
+        if codes is not None:
+            mask &= np.isin(self.codes[slots], list(codes))
+        if level is not None:
+            mask &= self.levels[slots] >= level
+        return seqs[mask]
+
+    def clear(self):
+        self.count = 0
+        self.texts.clear()
+
+    # Sinks
+    def add_sink(self, sink):
+        """Write every new record to sink (see StreamSink) from a background thread."""
+        self._sinks.append(sink)
+        if self._thread is None:
+            self._queue = SimpleQueue()
+            self._thread = threading.Thread(target=self._drain, name="event-log", daemon=True)
+            self._thread.start()
+
+    def _drain(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            tick, bot_id, code, pos, level, text = record
+            message = None
+            for sink in self._sinks:
+                if level >= sink.level:
+                    if message is None:
+                        message = self.format_record(tick, bot_id, code, pos, text)
+                    sink.write(message)
+            if self._queue.empty():
+                for sink in self._sinks:
+                    sink.flush()
+
+    def close(self):
+        """Write out everything queued, then stop the sink thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+            for sink in self._sinks:
+                sink.close()
+            self._sinks = []
+
+
+class StreamSink:
+    def __init__(self, stream=None, level=INFO):
+        self.stream = stream
+        self.level = level
+
+    def write(self, message):
+        (self.stream or sys.stdout).write(message + "\n")
+
+    def flush(self):
+        (self.stream or sys.stdout).flush()
+
+    def close(self):
+        self.flush()
+
+
+class FileSink(StreamSink):
+    def __init__(self, path, level=INFO):
+        super().__init__(open(path, "a", encoding="utf-8"), level)
+
+    def close(self):
+        self.stream.close()
@@ -1,10 +1,24 @@
 import numpy as np
 import random
 from collections import defaultdict, deque
-import heapq
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 
+from parallel import ParallelTrainer
+from playback import PlaybackControls
+from priority_queue import IndexedPriorityQueue
+from qtable_store import save_q_table, shared_q_table
+from replay_buffer import ReplayBuffer
+from dstar_lite import DStarLite
+from event_log import DEBUG, EventLog, StreamSink
+from grid_renderer import GridRenderer
+from occupancy import track
+from sim_worker import SimulationWorker
+from simulation import BotSimulation
+from timeline import record_bots
+from value_iteration import solve_policy
+from warehouse_grid import WarehouseGrid
+
 # Define actions and their corresponding moves
 actions = {
     0: (0, 1),   # Forward (right)
@@ -22,33 +36,58 @@ commands_dict = {
     4: 'Wait'
 }
 
+# Event log codes: the actions above, then what move() reports
+REPLAN = 5
+BLOCKED = 6
+REACHED = 7
+POSITION = 8
+LOG_TEMPLATES = {code: "{bot} moved to ({row}, {col}) | Step: {tick} | Command: " + name
+                 for code, name in commands_dict.items()}
+LOG_TEMPLATES.update({
+    REPLAN: "{bot}: Replanning due to blocked/invalid position.",
+    BLOCKED: "{bot} is waiting due to collision/invalid move | Current Position: ({row}, {col}) | Step: {tick} | Command: Wait",
+    REACHED: "{bot} reached its destination in {tick} steps!",
+    POSITION: "{bot} is at ({row}, {col})",
+})
+
+# Shared by every bot; create_gui prints the records from a background thread while its window is open
+event_log = EventLog(LOG_TEMPLATES)
+
 # Priority Queue helper for A* pathfinding
-def a_star_pathfinding(start, goal, grid):
-    rows, cols = len(grid), len(grid[0])
-    open_set = []
-    heapq.heappush(open_set, (0, start))
+def a_star_pathfinding(start, goal, grid, stats=None):
+    grid = WarehouseGrid.coerce(grid)
+    if not grid.in_bounds(start):
+        return []
+    cols, neighbors = grid.cols, grid.neighbors
+    start_idx, goal_idx = grid.index(start), grid.index(goal)
+    open_set = IndexedPriorityQueue()
+    open_set.push(start_idx, (heuristic(start, goal), start_idx))
     came_from = {}
     g_score = defaultdict(lambda: float('inf'))
-    g_score[start] = 0
-    f_score = defaultdict(lambda: float('inf'))
-    f_score[start] = heuristic(start, goal)
+    g_score[start_idx] = 0
+    expanded = 0
 
     while open_set:
-        current = heapq.heappop(open_set)[1]
-        if current == goal:
-            return reconstruct_path(came_from, current)
+        current, _ = open_set.pop()
+        expanded += 1
+        if current == goal_idx:
+            if stats is not None:
+                stats['expanded'] = expanded
+            return [grid.position(i) for i in reconstruct_path(came_from, current)]
         
-        for action in actions.values():
-            neighbor = (current[0] + action[0], current[1] + action[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols and grid[neighbor[0]][neighbor[1]] != 'X':
-                tentative_g_score = g_score[current] + 1
-                if tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + heuristic(neighbor, goal)
-                    if neighbor not in [item[1] for item in open_set]:
-                        heapq.heappush(open_set, (f_score[neighbor], neighbor))
+        # Flat-index neighbour table: -1 marks off-grid or obstacle moves
+        for neighbor in neighbors[current].tolist():
+            if neighbor < 0:
+                continue
+            tentative_g_score = g_score[current] + 1
+            if tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                # O(1) membership via the position map, O(log n) decrease-key
+                open_set.push(neighbor, (g_score[neighbor] + heuristic(divmod(neighbor, cols), goal), neighbor))
     
+    if stats is not None:
+        stats['expanded'] = expanded
     return []  # Return empty if no path found
 
 def heuristic(a, b):
@@ -65,12 +104,12 @@ def reconstruct_path(came_from, current):
 
 # Generate a random grid with obstacles
 def generate_random_grid(rows, cols, obstacle_count):
-    grid = [['.' for _ in range(cols)] for _ in range(rows)]
+    grid = WarehouseGrid(rows, cols)
     for _ in range(obstacle_count):
         while True:
             r, c = random.randint(0, rows - 1), random.randint(0, cols - 1)
-            if grid[r][c] == '.':
-                grid[r][c] = 'X'
+            if grid.is_free((r, c)):
+                grid.set_obstacle((r, c))
                 break
     return grid
 
@@ -80,17 +119,13 @@ def read_multiple_grids(file_list):
     bot_positions_list = []
 
     for filename in file_list:
-        grid = []
+        grid = WarehouseGrid.from_file(filename)
         bot_positions = {}
-        with open(filename, 'r') as file:
-            for r, line in enumerate(file):
-                row = line.strip().split()
-                grid.append(row)
-                for c, cell in enumerate(row):
-                    if cell.startswith('A'):
-                        bot_positions[cell] = (r, c)
-                    elif cell.startswith('B'):
-                        bot_positions[cell.replace('B', 'A') + "_dest"] = (r, c)
+        for (r, c), cell in grid.labels.items():
+            if cell.startswith('A'):
+                bot_positions[cell] = (r, c)
+            elif cell.startswith('B'):
+                bot_positions[cell.replace('B', 'A') + "_dest"] = (r, c)
 
         grids.append(grid)
         bot_positions_list.append(bot_positions)
@@ -99,12 +134,17 @@ def read_multiple_grids(file_list):
 
 # Define the enhanced Q-learning autobot class with A* integration
 class AutobotQLearning:
-    def __init__(self, start, dest, grid, name, alpha=0.1, gamma=0.9, epsilon=0.2, epsilon_min=0.01, epsilon_decay=0.995):
+    def __init__(self, start, dest, grid, name, alpha=0.1, gamma=0.9, epsilon=0.2, epsilon_min=0.01, epsilon_decay=0.995,
+                 q_table=None, replay_updates=0, replay_capacity=10000):
         self.pos = start
         self.dest = dest
-        self.grid = grid
+        self.grid = WarehouseGrid.coerce(grid)
         self.name = name
-        self.q_table = defaultdict(lambda: [0, 0, 0, 0, 0])
+        if q_table is not None:
+            self.q_table = np.array(q_table, dtype=np.float32)  # e.g. from training.TrainedPolicy
+        else:
+            # Shared with every bot on this grid heading to the same destination
+            self.q_table = shared_q_table(self.grid, actions).table(dest)
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
@@ -114,11 +154,22 @@ class AutobotQLearning:
         self.time_taken = 0
         self.reached = False
         self.learned_path = []
-        self.command_log = []
+        self.log_start = event_log.count  # This bot's records in event_log start here
         self.command_count = 0
         self.dynamic_path = deque()
+        self.replanner = None  # D* Lite state, kept across replans
+        self.occupancy = None  # Fleet-wide OccupancyGrid, set on the first move
+        self.replay_updates = replay_updates  # Replayed transitions per real step; 0 disables replay
+        self.replay_buffer = ReplayBuffer(replay_capacity) if replay_updates else None
         self.visited_positions = set()  # Track visited positions to avoid revisits
-        self.rows, self.cols = len(self.grid), len(self.grid[0])
+        self.rows, self.cols = self.grid.rows, self.grid.cols
+        self.save_q_tables = True  # Save the table on arrival, for warm starts
+
+    def detached(self):
+        # Learn into a private copy of the Q-table and save nothing, for dry runs
+        self.q_table = self.q_table.copy()
+        self.save_q_tables = False
+        return self
 
     def get_state(self):
         return self.pos
@@ -128,17 +179,38 @@ class AutobotQLearning:
         if random.uniform(0, 1) < self.epsilon:
             return random.choice(list(actions.keys()))  # Explore
         else:
-            return np.argmax(self.q_table[self.get_state()])  # Exploit best action from Q-table
+            return int(self.q_table[self.get_state()].argmax())  # Exploit best action from Q-table
 
     def update_q_value(self, state, action, reward, next_state):
-        old_value = self.q_table[state][action]
-        future_value = max(self.q_table[next_state])
-        self.q_table[state][action] = old_value + self.alpha * (reward + self.gamma * future_value - old_value)
+        q_values = self.q_table[state]  # View into the table, updated in place
+        future_value = self.q_table[next_state].max()
+        td_error = reward + self.gamma * future_value - q_values[action]
+        q_values[action] += self.alpha * td_error
+        if self.replay_buffer is not None:
+            self.replay_buffer.add(state, action, reward, next_state, td_error)
+            self.replay()
+
+    def replay(self):
+        # Learn again from replay_updates stored transitions in one batch,
+        # the most surprising ones most often
+        batch = self.replay_buffer.sample(self.replay_updates)
+        if batch is None:
+            return
+        indices, states, chosen, rewards, next_states, weights = batch
+        rows, cols = states[:, 0], states[:, 1]
+        future = self.q_table[next_states[:, 0], next_states[:, 1]].max(axis=1)
+        td_errors = rewards + self.gamma * future - self.q_table[rows, cols, chosen]
+        # Average repeated draws of the same entry instead of applying them all
+        flat = np.ravel_multi_index((rows, cols, chosen), self.q_table.shape)
+        entries, inverse = np.unique(flat, return_inverse=True)
+        mean_update = np.bincount(inverse, weights=weights * td_errors) / np.bincount(inverse)
+        self.q_table.reshape(-1)[entries] += (self.alpha * mean_update).astype(np.float32)
+        self.replay_buffer.update_priorities(indices, td_errors)
 
     def get_reward(self, new_pos):
         if new_pos == self.dest:
             return 100
-        elif self.grid[new_pos[0]][new_pos[1]] == 'X':
+        elif self.grid.is_obstacle(new_pos):
             return -100
         elif new_pos in self.visited_positions:
             return -10  # Penalty for revisiting positions
@@ -147,76 +219,123 @@ class AutobotQLearning:
             return -1 + distance_reward
 
     def is_valid_position(self, pos):
-        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols and self.grid[pos[0]][pos[1]] != 'X'
+        return self.grid.is_free(pos)
+
+    def dynamic_replan(self, bots=()):
+        # Replan frequently if the bot seems stuck. D* Lite keeps its search
+        # between calls and only repairs around cells whose blocked state
+        # changed (other bots, new obstacles) since the last replan.
+        if self.replanner is None:
+            self.replanner = DStarLite(self.grid, self.pos, self.dest)
+        self.replanner.replan(self.pos, {bot.pos for bot in bots if bot is not self})
+        self.dynamic_path = deque(self.replanner.path())
+
+    def close(self):
+        # Stop the D* Lite planner from following grid edits once the bot is discarded
+        if self.replanner is not None:
+            self.replanner.close()
+            self.replanner = None
+
+    def action_from_move(self, current, next_move):
+        # Map a planned step back onto the action that produces it
+        delta = (next_move[0] - current[0], next_move[1] - current[1])
+        for action, move in actions.items():
+            if move == delta:
+                return action
+        return 4  # Wait
+
+    @property
+    def command_log(self):
+        """This bot's log messages, formatted on demand."""
+        return event_log.messages(event_log.select(bot_ids=[self.name], start=self.log_start))
+
+    def move(self, bots, collision_cells):
+        event_log.log(self.steps, self.name, POSITION, self.pos, level=DEBUG)
+
+        if self.pos == self.dest:
+            if not self.reached:
+                self.reached = True
+                event_log.log(self.steps, self.name, REACHED, self.pos)
+            return
+
+        state = self.get_state()
+
+        # Use A* planning as a priority strategy for efficiency
+        if self.dynamic_path:
+            next_move = self.dynamic_path.popleft()
+            action = self.action_from_move(self.pos, next_move)
+        else:
+            action = self.choose_action()
+
+        new_pos = (self.pos[0] + actions[action][0], self.pos[1] + actions[action][1])
+        occupancy = self.occupancy or track(self.grid, bots)
+        can_move = self.is_valid_position(new_pos) and not occupancy.is_taken(new_pos, self)
+
+        # Always try to replan when blocked or in inefficient situations
+        if not can_move:
+            self.dynamic_replan(bots)  # Immediate replan for blocking conditions
+            event_log.log(self.steps, self.name, REPLAN, self.pos)
+            action = 4  # Default to wait
+
+        # Move and update Q-table
+        if can_move:
+            reward = self.get_reward(new_pos)
+            next_state = new_pos
+            self.update_q_value(state, action, reward, next_state)
+            occupancy.move(self, new_pos)
+            self.pos = new_pos
+            self.steps += 1
+            self.command_count += 1
+            self.learned_path.append(self.pos)
+            self.visited_positions.add(self.pos)  # Track visited positions
+            self.time_taken += 1
+            event_log.log(self.steps, self.name, action, self.pos)
+            if self.pos == self.dest and self.save_q_tables:
+                save_q_table(self.grid, self.dest, actions, self.q_table)  # Warm start for the next run
 
-    def dynamic_replan(self):
-        # Replan frequently if the bot seems stuck
-        self.dynamic_path = deque(a_star_pathfinding(self.pos, self.dest, self.grid))
+        else:
+            reward = -20  # Higher penalty for wait situations
+            self.update_q_value(state, 4, reward, state)
+            collision_cells.add(self.pos)
+            self.command_count += 1
+            self.steps += 1
+            self.time_taken += 1
+            event_log.log(self.steps, self.name, BLOCKED, self.pos)
 
-def move(self, bots, collision_cells):
-    # Print the current position of the bot in the terminal
-    print(f"{self.name} is at {self.pos}")
+        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)  # Faster epsilon decay
 
-    if self.pos == self.dest:
-        if not self.reached:
-            self.reached = True
-            self.command_log.append(f"{self.name} reached its destination in {self.steps} steps!")
-        return
 
-    state = self.get_state()
+class ValueIterationBot(AutobotQLearning):
+    """Follows the exact value-iteration policy: no exploration, no learning."""
 
-    # Use A* planning as a priority strategy for efficiency
-    if self.dynamic_path:
-        next_move = self.dynamic_path.popleft()
-        action = self.action_from_move(self.pos, next_move)
-    else:
-        action = self.choose_action()
-
-    new_pos = (self.pos[0] + actions[action][0], self.pos[1] + actions[action][1])
-
-    # Always try to replan when blocked or in inefficient situations
-    if not self.is_valid_position(new_pos) or any(bot.pos == new_pos for bot in bots if bot != self):
-        self.dynamic_replan()  # Immediate replan for blocking conditions
-        self.command_log.append(f"{self.name}: Replanning due to blocked/invalid position.")
-        action = 4  # Default to wait
-
-    # Move and update Q-table
-    if self.is_valid_position(new_pos) and not any(bot.pos == new_pos for bot in bots if bot != self):
-        reward = self.get_reward(new_pos)
-        next_state = new_pos
-        self.update_q_value(state, action, reward, next_state)
-        self.pos = new_pos
-        self.steps += 1
-        self.command_count += 1
-        self.learned_path.append(self.pos)
-        self.visited_positions.add(self.pos)  # Track visited positions
-        self.time_taken += 1
-        self.command_log.append(f"{self.name}: {commands_dict[action]}")
-
-        # Print updated information
-        print(f"{self.name} moved to {self.pos} | Step: {self.steps} | Command: {commands_dict[action]}")
+    def __init__(self, start, dest, grid, name, **kwargs):
+        grid = WarehouseGrid.coerce(grid)
+        q_table = solve_policy(grid, dest, actions).q_table
+        super().__init__(start, dest, grid, name, epsilon=0, epsilon_min=0, q_table=q_table, **kwargs)
+        # Solved with value_iteration's rewards, not move()'s; keep it out of the Q-learning warm starts
+        self.save_q_tables = False
 
-    else:
-        reward = -20  # Higher penalty for wait situations
-        self.update_q_value(state, 4, reward, state)
-        collision_cells.add(self.pos)
-        self.command_log.append(f"{self.name}: Wait (collision/invalid move)")
-        self.command_count += 1
-        self.steps += 1
-        self.time_taken += 1
-        
-        # Print wait information and command
-        print(f"{self.name} is waiting due to collision/invalid move | Current Position: {self.pos} | Step: {self.steps} | Command: Wait")
+    def update_q_value(self, state, action, reward, next_state):
+        pass  # The solved values are already optimal
 
-    self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)  # Faster epsilon decay
 
-        
+# Bot types selectable in the GUI
+BOT_TYPES = {
+    "Q-learning": AutobotQLearning,
+    "Value iteration": ValueIterationBot,
+}
+
 # GUI Setup with dynamic matrix switching
 def create_gui(grids, bot_positions_list):
     root = tk.Tk()
     root.title("Autobot Warehouse Simulation")
+    event_log.add_sink(StreamSink())
 
     current_grid_idx = 0
+    policies = {}  # Grid index -> TrainedPolicy replayed instead of learning from scratch
+    after_id = None
+    live_bots = []  # Bots of the animation on screen
+    playback = None  # PlaybackControls while a recorded run is shown
 
     def select_grid(index):
         nonlocal current_grid_idx
@@ -225,50 +344,130 @@ def create_gui(grids, bot_positions_list):
 
     def load_bots_for_grid(grid_index):
         bot_positions = bot_positions_list[grid_index]
-        bots = [
-            AutobotQLearning(start=bot_positions[bot_name], dest=bot_positions[bot_name + "_dest"], grid=grids[grid_index], name=bot_name)
-            for bot_name in bot_positions if not bot_name.endswith("_dest")
-        ]
+        policy = policies.get(grid_index)
+        bots = []
+        for bot_name in bot_positions:
+            if bot_name.endswith("_dest"):
+                continue
+            if policy is not None and bot_name in policy.bot_ids:
+                # Replay the trained greedy policy
+                bots.append(AutobotQLearning(start=bot_positions[bot_name], dest=bot_positions[bot_name + "_dest"],
+                                             grid=grids[grid_index], name=bot_name, epsilon=0, epsilon_min=0,
+                                             q_table=policy.q_table(bot_name)))
+            else:
+                bot_type = BOT_TYPES[bot_type_var.get()]
+                bots.append(bot_type(start=bot_positions[bot_name], dest=bot_positions[bot_name + "_dest"],
+                                     grid=grids[grid_index], name=bot_name))
         return bots
 
+    def use_policy(grid_index, policy):
+        # Replay policy on grid_index from now on, and keep it for later runs
+        policies[grid_index] = policy
+        for bot_id in policy.bot_ids:
+            save_q_table(grids[grid_index], policy.bot_destinations[bot_id], actions, policy.q_table(bot_id))
+        if grid_index == current_grid_idx:
+            update_grid()  # Replay the grid on screen as soon as its policy is in
+
+    trainer = None  # ParallelTrainer of the Train button, for the grid shown when it was pressed
+
+    def train_current_grid():
+        # Train headlessly in a worker process, then restart the animation with the trained policy
+        nonlocal trainer
+        if trainer is not None:
+            return  # Already training
+        trainer = ParallelTrainer([grids[current_grid_idx]], [bot_positions_list[current_grid_idx]], actions)
+        trainer.start()
+        poll_training(current_grid_idx)
+
+    def poll_training(grid_index):
+        nonlocal trainer
+        for run in trainer.poll():
+            use_policy(grid_index, run.policy)
+            messagebox.showinfo("Training", run.summary)
+        for error in trainer.failed.values():
+            messagebox.showerror("Training", f"Training failed: {error}")
+        if trainer.done():
+            trainer = None
+        else:
+            root.after(200, poll_training, grid_index)
+
+    parallel_trainer = None
+    parallel_status = {}  # Grid index -> one line of results
+
+    def train_all_grids():
+        # One worker process per grid; finished grids are picked up by poll_parallel
+        nonlocal parallel_trainer
+        if parallel_trainer is not None:
+            return  # Already running
+        parallel_trainer = ParallelTrainer(grids, bot_positions_list, actions)
+        parallel_trainer.start()
+        parallel_status.clear()
+        parallel_status.update({i: f"Grid {i + 1}: training..." for i in range(len(grids))})
+        poll_parallel()
+
+    def poll_parallel():
+        nonlocal parallel_trainer
+        for run in parallel_trainer.poll():
+            parallel_status[run.index] = (f"Grid {run.index + 1}: makespan {run.makespan}, "
+                                          f"{run.total_moves} moves, {run.summary}")
+            use_policy(run.index, run.policy)
+        for index, error in parallel_trainer.failed.items():
+            parallel_status[index] = f"Grid {index + 1}: failed: {error}"
+        parallel_label.config(text="\n".join(parallel_status[i] for i in sorted(parallel_status)))
+        if parallel_trainer.done():
+            parallel_trainer = None
+        else:
+            root.after(200, poll_parallel)
+
+    def on_close():
+        for running in (trainer, parallel_trainer):
+            if running is not None:
+                running.shutdown()
+        if recorder is not None:
+            recorder.stop(timeout=0)
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
     canvas = tk.Canvas(root, width=500, height=500)
     canvas.grid(row=1, column=0)
 
     status_label = tk.Label(root, text="", font=("Arial", 14))
     status_label.grid(row=2, column=0)
 
+    parallel_label = tk.Label(root, text="", font=("Arial", 10), justify="left")
+    parallel_label.grid(row=3, column=0)
+
     cell_size = 100
+    renderer = None
 
     def update_grid():
+        nonlocal renderer
+        stop_playback()
+        if renderer is not None:
+            renderer.close()
         canvas.delete("all")
         grid = grids[current_grid_idx]
-        rows, cols = len(grid), len(grid[0])
-
-        canvas.config(width=cols * cell_size, height=rows * cell_size)
-
-        for r in range(rows):
-            for c in range(cols):
-                x1 = c * cell_size
-                y1 = r * cell_size
-                x2 = x1 + cell_size
-                y2 = y1 + cell_size
 
-                if grid[r][c] == 'X':
-                    canvas.create_rectangle(x1, y1, x2, y2, fill='red', outline="black")
-                else:
-                    canvas.create_rectangle(x1, y1, x2, y2, fill='white', outline="black")
+        # Zoomable viewport of at most 800x800 pixels; items only for visible cells
+        renderer = GridRenderer(canvas, grid, cell_size)
 
         bots = load_bots_for_grid(current_grid_idx)
         update_bots(bots)
 
     def update_bots(bots):
-        def animate_bots(bots):
-            canvas.delete("bot")
+        nonlocal after_id, live_bots
+        if after_id is not None:
+            root.after_cancel(after_id)  # Stop the animation of the previous set of bots
+            after_id = None
+        for bot in live_bots:
+            bot.close()
+        live_bots = bots
+        simulation = BotSimulation(bots)
+
+        def animate_bots(bots, collision_cells):
+            colors = {}  # Cell -> fill for this frame; later bots paint over earlier ones
             bot_statuses = []
-            collision_cells = set()
-            
-            for bot in bots:
-                bot.move(bots, collision_cells)
 
             for bot in bots:
                 current_pos = bot.pos
@@ -287,47 +486,138 @@ def create_gui(grids, bot_positions_list):
                         color = 'lightblue'  # Regular moving color
                         bot_display_text = bot.name
 
-                    # Draw source position in blue
-                    canvas.create_rectangle(start_pos[1] * cell_size, start_pos[0] * cell_size,
-                                            (start_pos[1] + 1) * cell_size, (start_pos[0] + 1) * cell_size,
-                                            fill='blue', outline="black")  # Color the source
-
-                    # Draw destination in green if reached
-                    canvas.create_rectangle(dest_pos[1] * cell_size, dest_pos[0] * cell_size,
-                                            (dest_pos[1] + 1) * cell_size, (dest_pos[0] + 1) * cell_size,
-                                            fill='green' if bot.reached else 'white', outline="black")
+                    # Source in blue, destination in green if reached
+                    colors[start_pos] = 'blue'
+                    colors[dest_pos] = 'green' if bot.reached else 'white'
 
                     # Show learned path as a trail
-                    if bot.learned_path:
-                        for pos in bot.learned_path:
-                            canvas.create_rectangle(pos[1] * cell_size, pos[0] * cell_size,
-                                                    (pos[1] + 1) * cell_size, (pos[0] + 1) * cell_size,
-                                                    fill=color, outline="black")
-                    
-                    # Draw bot with its name
-                    canvas.create_text(current_pos[1] * cell_size + 50, current_pos[0] * cell_size + 50,
-                                       text=bot_display_text, font=("Arial", 10), tag="bot")
+                    for pos in bot.learned_path:
+                        colors[pos] = color
+
+                    # Bot with its name
+                    renderer.label(bot.name, current_pos, bot_display_text)
 
                 # Collect bot status for display
                 bot_statuses.append(f"{bot.name}: Steps: {bot.steps}, Time: {round(bot.time_taken, 2)}s")
 
+            renderer.paint(colors)
+
             # Update the status label with the latest information
             status_label.config(text="\n".join(bot_statuses))
             root.update()
 
         def update():
-            animate_bots(bots)
-            root.after(1000, update)
+            nonlocal after_id
+            collision_cells = simulation.step()
+            animate_bots(bots, collision_cells)
+            after_id = root.after(1000, update)
 
         update()
 
+    def stop_playback():
+        nonlocal playback
+        if playback is not None:
+            playback.destroy()
+            playback = None
+
+    recorder = None  # SimulationWorker of the recording in progress
+
+    def record_current_grid():
+        # Run the grid headlessly to the end on a worker thread, then review it at any speed
+        nonlocal after_id, recorder
+        if recorder is not None:
+            return  # Already recording
+        # Copies that learn privately, so the recording leaves the shared and saved tables alone
+        bots = [bot.detached() for bot in load_bots_for_grid(current_grid_idx)]
+        if not bots:
+            messagebox.showinfo("Record run", "This grid has no bots to record.")
+            return
+        if after_id is not None:
+            root.after_cancel(after_id)  # The live run would log into the same event log
+            after_id = None
+        timelines = []
+
+        def record():
+            try:
+                timelines.append(record_bots(bots))
+            finally:
+                for bot in bots:
+                    bot.close()
+            return None  # One step: the whole run
+
+        recorder = SimulationWorker(record, lambda: timelines[-1] if timelines else None, name="record-run").start()
+        status_label.config(text="Recording...")
+        poll_recording(current_grid_idx)
+
+    def poll_recording(grid_index):
+        nonlocal recorder
+        finished = not recorder.running()  # Checked first: the frame is queued before the thread ends
+        try:
+            timeline = recorder.latest()
+        except Exception as error:
+            recorder = None
+            status_label.config(text="")
+            messagebox.showerror("Record run", f"Recording failed: {error}")
+            return
+        if timeline is None:
+            if finished:
+                recorder = None
+            else:
+                root.after(100, poll_recording, grid_index)
+            return
+        recorder = None
+        if grid_index == current_grid_idx:
+            show_recording(timeline)
+
+    def show_recording(timeline):
+        nonlocal after_id, playback
+        update_grid()
+        if after_id is not None:
+            root.after_cancel(after_id)  # Show the recording instead of the live run
+            after_id = None
+        bot_positions = bot_positions_list[current_grid_idx]
+        starts = timeline.positions_at(0)
+        destinations = {bot_id: bot_positions[bot_id + "_dest"] for bot_id in timeline.bot_ids}
+
+        def draw_step(step):
+            colors = {}
+            reached = timeline.reached_at(step)
+            events = timeline.events_at(step)
+            collided = {bot_id for bot_id, event in events if event == "collision"}
+            for slot, (bot_id, pos) in enumerate(timeline.positions_at(step).items()):
+                colors[starts[bot_id]] = 'blue'
+                colors[destinations[bot_id]] = 'green' if reached[slot] else 'white'
+                colors[pos] = 'green' if reached[slot] else 'yellow' if bot_id in collided else 'lightblue'
+                renderer.label(bot_id, pos, f"   {bot_id} \n(Reached)" if reached[slot] else bot_id)
+            renderer.paint(colors)
+            return ", ".join(f"{bot_id} {event}" for bot_id, event in events)
+
+        playback = PlaybackControls(root, timeline, draw_step)
+        playback.grid(row=4, column=0, columnspan=4)
+
     dropdown = tk.OptionMenu(root, tk.StringVar(value="Select Grid"), *[f"Grid {i+1}" for i in range(len(grids))], 
                              command=lambda value: select_grid(int(value.split()[-1]) - 1))
     dropdown.grid(row=0, column=0)
 
+    train_button = tk.Button(root, text="Train", command=train_current_grid)
+    train_button.grid(row=0, column=1)
+
+    train_all_button = tk.Button(root, text="Train all grids", command=train_all_grids)
+    train_all_button.grid(row=0, column=3)
+
+    record_button = tk.Button(root, text="Record run", command=record_current_grid)
+    record_button.grid(row=0, column=4)
+
+    bot_type_var = tk.StringVar(value="Q-learning")
+    bot_type_menu = tk.OptionMenu(root, bot_type_var, *BOT_TYPES, command=lambda value: update_grid())
+    bot_type_menu.grid(row=0, column=2)
+
     update_grid()
 
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        event_log.close()  # Print what is still queued and stop the sink thread
 
 # File dialog to select multiple grid files or generate new grids
 def open_files():
@@ -0,0 +1,358 @@
+"""Grid views that update in place instead of redrawing.
+
+Redrawing a frame with ``create_rectangle`` adds items that Tk keeps around
+until they are deleted, so a Canvas redrawn every tick slows down for the
+whole run.  GridRenderer keeps one rectangle per cell and one text item per
+bot, and each frame only recolours the cells and moves the labels whose
+state differs from the previous frame.
+
+GridRenderer is also a viewport: the mouse wheel zooms around the pointer
+and dragging pans.  Only cells inside the window get Canvas items.  Once
+cells are smaller than DETAIL_CELL_SIZE pixels the view switches to a single
+image built from a NumPy colour array, averaging blocks of cells together
+when there are more cells than pixels, so a 1000x1000 warehouse stays cheap
+to pan and zoom.
+
+RasterGridView goes further for editable maps: the cells are pixels of one
+PhotoImage on one Canvas, clicks are mapped back to cells from their
+coordinates, and colour changes are queued and written once per frame.
+"""
+import math
+import tkinter as tk
+
+import numpy as np
+
+DETAIL_CELL_SIZE = 12  # Pixels per cell below which cells are drawn as one image
+ZOOM_STEP = 1.25
+MIN_VIEW = 40  # Smallest window side in pixels, for very long thin grids
+
+
+class GridRenderer:
+    def __init__(self, canvas, grid, cell_size, obstacle_color='red', free_color='white', font=("Arial", 10),
+                 base_colors=None, max_view=800):
+        self.canvas = canvas
+        self.grid = grid
+        self.obstacle_color = obstacle_color
+        self.free_color = free_color
+        self.font = font
+        self.base_colors = dict(base_colors or {})  # (row, col) -> fill replacing free/obstacle
+        # Pixels per cell; starts with the whole grid in view, at most cell_size
+        self.min_scale = min(cell_size, max_view / grid.cols, max_view / grid.rows)
+        # The window fits the grid at min_scale; only a very thin grid leaves
+        # part of it empty, drawn in the canvas background
+        self.width = max(round(grid.cols * self.min_scale), min(grid.cols * cell_size, MIN_VIEW))
+        self.height = max(round(grid.rows * self.min_scale), min(grid.rows * cell_size, MIN_VIEW))
+        canvas.config(width=self.width, height=self.height)
+        self.max_scale = max(cell_size, DETAIL_CELL_SIZE * 4)
+        self.scale = self.min_scale
+        self.origin = [0.0, 0.0]  # (row, col) at the top-left corner of the window
+        self.painted = {}  # (row, col) -> fill of the last frame, for cells not in their base colour
+        self.labels = {}  # key -> [pos, text]
+        self.cells = {}  # Visible (row, col) -> rectangle item, in detail mode
+        self.label_items = {}  # key -> text item (detail mode) or marker (image mode)
+        self.image = None
+        self._rgb_cache = {}
+        self.rgb = self._base_rgb()  # (rows, cols, 3) colour of every cell, kept in sync with painted
+        self._detail = None
+        self._drag = None
+        self._redraw_id = None
+        canvas.bind("<ButtonPress-1>", self._start_drag)
+        canvas.bind("<B1-Motion>", self._on_drag)
+        canvas.bind("<MouseWheel>", lambda event: self.zoom(ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP,
+                                                            event.x, event.y))
+        canvas.bind("<Button-4>", lambda event: self.zoom(ZOOM_STEP, event.x, event.y))
+        canvas.bind("<Button-5>", lambda event: self.zoom(1 / ZOOM_STEP, event.x, event.y))
+        self.redraw()
+
+    def close(self):
+        if self._redraw_id is not None:
+            self.canvas.after_cancel(self._redraw_id)
+            self._redraw_id = None
+
+    def base_color(self, pos):
+        if pos in self.base_colors:
+            return self.base_colors[pos]
+        return self.obstacle_color if self.grid.is_obstacle(pos) else self.free_color
+
+    def _to_rgb(self, fill):
+        if fill not in self._rgb_cache:
+            self._rgb_cache[fill] = [value >> 8 for value in self.canvas.winfo_rgb(fill)]
+        return self._rgb_cache[fill]
+
+    def _base_rgb(self):
+        rgb = np.empty((self.grid.rows, self.grid.cols, 3), dtype=np.uint8)
+        rgb[:] = self._to_rgb(self.free_color)
+        rgb[self.grid.cells != 0] = self._to_rgb(self.obstacle_color)
+        for (r, c), fill in self.base_colors.items():
+            rgb[r, c] = self._to_rgb(fill)
+        return rgb
+
+    # Geometry
+    def cell_box(self, pos):
+        x1 = (pos[1] - self.origin[1]) * self.scale
+        y1 = (pos[0] - self.origin[0]) * self.scale
+        return x1, y1, x1 + self.scale, y1 + self.scale
+
+    def visible_range(self):
+        """(first row, end row, first col, end col) of the cells in the window."""
+        r0, c0 = int(self.origin[0]), int(self.origin[1])
+        r1 = min(self.grid.rows, math.ceil(self.origin[0] + self.height / self.scale))
+        c1 = min(self.grid.cols, math.ceil(self.origin[1] + self.width / self.scale))
+        return r0, r1, c0, c1
+
+    def is_visible(self, pos):
+        r0, r1, c0, c1 = self.visible_range()
+        return r0 <= pos[0] < r1 and c0 <= pos[1] < c1
+
+    def _clamp_origin(self):
+        self.origin[0] = min(max(self.origin[0], 0.0), max(0.0, self.grid.rows - self.height / self.scale))
+        self.origin[1] = min(max(self.origin[1], 0.0), max(0.0, self.grid.cols - self.width / self.scale))
+
+    # Interaction
+    def zoom(self, factor, x, y):
+        """Zoom by factor keeping the cell under window pixel (x, y) in place."""
+        scale = min(max(self.scale * factor, self.min_scale), self.max_scale)
+        if scale == self.scale:
+            return
+        anchor_row = self.origin[0] + y / self.scale
+        anchor_col = self.origin[1] + x / self.scale
+        self.scale = scale
+        self.origin = [anchor_row - y / scale, anchor_col - x / scale]
+        self._clamp_origin()
+        self._schedule_redraw()
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) window pixels."""
+        self.origin[0] -= dy / self.scale
+        self.origin[1] -= dx / self.scale
+        self._clamp_origin()
+        self._schedule_redraw()
+
+    def _start_drag(self, event):
+        self._drag = (event.x, event.y)
+
+    def _on_drag(self, event):
+        if self._drag is not None:
+            self.pan(event.x - self._drag[0], event.y - self._drag[1])
+            self._drag = (event.x, event.y)
+
+    def _schedule_redraw(self):
+        # Wheel and drag events arrive faster than frames; draw once per idle
+        if self._redraw_id is None:
+            self._redraw_id = self.canvas.after_idle(self.redraw)
+
+    # Drawing
+    def redraw(self):
+        self._redraw_id = None
+        detail = self.scale >= DETAIL_CELL_SIZE
+        if detail != self._detail:
+            self.canvas.delete("view")
+            self.cells.clear()
+            self.label_items.clear()
+            self.image = None
+            self._detail = detail
+        if detail:
+            self._sync_cells()
+        else:
+            self._draw_image()
+        for key in self.labels:
+            self._place_label(key)
+
+    def _sync_cells(self):
+        # Rectangles only for visible cells; the others are deleted or never made
+        r0, r1, c0, c1 = self.visible_range()
+        for pos in [pos for pos in self.cells if not (r0 <= pos[0] < r1 and c0 <= pos[1] < c1)]:
+            self.canvas.delete(self.cells.pop(pos))
+        for r in range(r0, r1):
+            for c in range(c0, c1):
+                item = self.cells.get((r, c))
+                if item is None:
+                    fill = self.painted.get((r, c)) or self.base_color((r, c))
+                    self.cells[(r, c)] = self.canvas.create_rectangle(*self.cell_box((r, c)), fill=fill,
+                                                                      outline="black", tags="view")
+                else:
+                    self.canvas.coords(item, *self.cell_box((r, c)))
+        self.canvas.tag_raise("label")
+
+    def _draw_image(self):
+        r0, r1, c0, c1 = self.visible_range()
+        region = self.rgb[r0:r1, c0:c1]
+        scale = self.scale
+        block = max(1, math.ceil(1 / scale))  # Cells averaged into one pixel when zoomed far out
+        if block > 1:
+            rows = math.ceil(region.shape[0] / block) * block
+            cols = math.ceil(region.shape[1] / block) * block
+            padded = np.pad(region, ((0, rows - region.shape[0]), (0, cols - region.shape[1]), (0, 0)), mode='edge')
+            region = padded.reshape(rows // block, block, cols // block, block, 3).mean(axis=(1, 3)).astype(np.uint8)
+            scale *= block
+        # Nearest-neighbour sampling from window pixels to (blocks of) cells
+        offset_r = (self.origin[0] - r0) / block
+        offset_c = (self.origin[1] - c0) / block
+        ys = offset_r + np.arange(self.height) / scale
+        xs = offset_c + np.arange(self.width) / scale
+        outside_rows = ys >= (r1 - r0) / block  # Window pixels past the edge of the grid
+        outside_cols = xs >= (c1 - c0) / block
+        ys = np.minimum(ys.astype(int), region.shape[0] - 1)
+        xs = np.minimum(xs.astype(int), region.shape[1] - 1)
+        pixels = region[ys][:, xs]
+        if outside_rows.any() or outside_cols.any():
+            pixels[outside_rows] = self._to_rgb(self.canvas.cget("background"))
+            pixels[:, outside_cols] = self._to_rgb(self.canvas.cget("background"))
+        pixels = np.ascontiguousarray(pixels)
+        header = f"P6 {self.width} {self.height} 255 ".encode()
+        self.image = tk.PhotoImage(data=header + pixels.tobytes(), format="PPM")
+        self.canvas.delete("view")
+        self.label_items.clear()
+        self.canvas.create_image(0, 0, image=self.image, anchor="nw", tags="view")
+
+    def _place_label(self, key):
+        pos, text = self.labels[key]
+        item = self.label_items.get(key)
+        if not self.is_visible(pos):
+            if item is not None:
+                self.canvas.delete(self.label_items.pop(key))
+            return
+        x1, y1, x2, y2 = self.cell_box(pos)
+        x, y = (x1 + x2) / 2, (y1 + y2) / 2
+        if self._detail:
+            if item is None:
+                self.label_items[key] = self.canvas.create_text(x, y, text=text, font=self.font,
+                                                                tags=("view", "label", "bot"))
+            else:
+                self.canvas.coords(item, x, y)
+                self.canvas.itemconfig(item, text=text)
+        else:
+            # Too small for text: a marker that stays visible at any zoom
+            box = (x - 3, y - 3, x + 3, y + 3)
+            if item is None:
+                self.label_items[key] = self.canvas.create_oval(*box, fill="black", tags=("view", "label", "bot"))
+            else:
+                self.canvas.coords(item, *box)
+
+    def paint(self, colors):
+        """Show colors ({(row, col): fill}) on top of the base grid.
+
+        Cells painted last frame but missing from colors go back to their
+        base colour.  Returns the number of cells that changed.
+        """
+        changed = [(pos, self.base_color(pos)) for pos in self.painted.keys() - colors.keys()]
+        changed += [(pos, fill) for pos, fill in colors.items() if self.painted.get(pos) != fill]
+        self.painted = dict(colors)
+        for pos, fill in changed:
+            self.rgb[pos[0], pos[1]] = self._to_rgb(fill)
+            item = self.cells.get(pos)
+            if item is not None:
+                self.canvas.itemconfig(item, fill=fill)
+        if changed and not self._detail:
+            self._schedule_redraw()  # One new image for all changes of the frame
+        return len(changed)
+
+    def label(self, key, pos, text):
+        """Place the label for key (e.g. a bot name) at the centre of pos."""
+        if self.labels.get(key) != [pos, text]:
+            self.labels[key] = [pos, text]
+            self._place_label(key)
+
+    def remove_label(self, key):
+        self.labels.pop(key, None)
+        item = self.label_items.pop(key, None)
+        if item is not None:
+            self.canvas.delete(item)
+
+    def item_count(self):
+        return len(self.canvas.find_all())
+
+
+class RasterGridView:
+    def __init__(self, parent, rows, cols, cell_size=None, max_size=800, background="white",
+                 line_color="gray", font=("Helvetica", 8), on_click=None):
+        self.rows = rows
+        self.cols = cols
+        # Fit large maps on screen; small ones keep roughly the old button size
+        self.cell_size = cell_size or max(2, min(48, max_size // max(rows, cols)))
+        self.background = background
+        self.font = font
+        self.on_click = on_click
+        width, height = cols * self.cell_size, rows * self.cell_size
+        self.canvas = tk.Canvas(parent, width=width, height=height, highlightthickness=0)
+        self.image = tk.PhotoImage(width=width, height=height)
+        self.image.put(background, to=(0, 0, width, height))
+        self.canvas.create_image(0, 0, image=self.image, anchor="nw")
+        if self.cell_size >= 4:
+            # Grid lines as a few Canvas lines instead of per-cell outlines
+            for r in range(rows + 1):
+                self.canvas.create_line(0, r * self.cell_size, width, r * self.cell_size, fill=line_color)
+            for c in range(cols + 1):
+                self.canvas.create_line(c * self.cell_size, 0, c * self.cell_size, height, fill=line_color)
+        self.colors = {}  # (row, col) -> fill currently in the image, for cells not in the background
+        self.texts = {}  # (row, col) -> [text item, text, fg]
+        self._pending = {}  # (row, col) -> fill waiting for the next flush
+        self._flush_scheduled = False
+        self.canvas.bind("<Button-1>", self._on_click)
+
+    def grid(self, **kwargs):
+        self.canvas.grid(**kwargs)
+
+    def cell_at(self, x, y):
+        """Cell under canvas pixel (x, y), or None outside the grid."""
+        r = int(self.canvas.canvasy(y)) // self.cell_size
+        c = int(self.canvas.canvasx(x)) // self.cell_size
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return r, c
+        return None
+
+    def _on_click(self, event):
+        pos = self.cell_at(event.x, event.y)
+        if pos is not None and self.on_click is not None:
+            self.on_click(*pos)
+
+    def set_cell(self, pos, fill, text=None, fg="black"):
+        """Queue a colour change; text (if given) is shown at once, '' removes it."""
+        self._pending[pos] = fill
+        if text is not None:
+            self.set_text(pos, text, fg)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.canvas.after_idle(self.flush)
+
+    def set_text(self, pos, text, fg="black"):
+        entry = self.texts.get(pos)
+        if not text or self.cell_size < 16:
+            if entry is not None:
+                self.canvas.delete(entry[0])
+                del self.texts[pos]
+            return
+        if entry is None:
+            x = (pos[1] + 0.5) * self.cell_size
+            y = (pos[0] + 0.5) * self.cell_size
+            item = self.canvas.create_text(x, y, text=text, fill=fg, font=self.font, width=self.cell_size)
+            self.texts[pos] = [item, text, fg]
+        elif entry[1:] != [text, fg]:
+            self.canvas.itemconfig(entry[0], text=text, fill=fg)
+            entry[1:] = [text, fg]
+
+    def flush(self):
+        """Write every queued colour change into the image. Returns how many cells changed."""
+        self._flush_scheduled = False
+        changed = 0
+        size = self.cell_size
+        for (r, c), fill in self._pending.items():
+            if self.colors.get((r, c), self.background) == fill:
+                continue
+            self.image.put(fill, to=(c * size, r * size, (c + 1) * size, (r + 1) * size))
+            if fill == self.background:
+                self.colors.pop((r, c), None)
+            else:
+                self.colors[(r, c)] = fill
+            changed += 1
+        self._pending.clear()
+        return changed
+
+    def clear(self):
+        """Back to an empty grid: background everywhere and no text."""
+        self._pending.clear()
+        self.image.put(self.background, to=(0, 0, self.cols * self.cell_size, self.rows * self.cell_size))
+        self.colors.clear()
+        for item, _, _ in self.texts.values():
+            self.canvas.delete(item)
+        self.texts.clear()
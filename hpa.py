@@ -0,0 +1,283 @@
+"""Hierarchical pathfinding (HPA*) for large warehouse maps.
+
+The grid is cut into square clusters.  Wherever free cells face each other
+across a cluster border we place entrance cells (one per short opening, one
+at each end of a long one), and within each cluster we store the distance
+between every pair of its entrances.  A query connects start and end to the
+entrances of their clusters, runs A* over that small abstract graph and then
+refines each abstract hop with a BFS confined to one cluster.
+
+Paths are near-optimal rather than optimal.  When a cell changes, only the
+borders of its cluster and the entrance distances of that cluster and its
+four neighbours are rebuilt, on the next query.
+
+Botea, Müller & Schaeffer, "Near Optimal Hierarchical Path-Finding", 2004.
+"""
+from collections import deque
+import weakref
+
+from priority_queue import IndexedPriorityQueue
+from warehouse_grid import WarehouseGrid
+
+# Openings at least this wide get two entrances instead of one
+WIDE_OPENING = 6
+
+
+class HierarchicalPlanner:
+    def __init__(self, grid, cluster_size=10):
+        # Weak, so that _planners does not keep the grid (its key) alive
+        self._grid = weakref.ref(grid)
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        self.transitions = {}  # border key -> [(cell, cell across the border)]
+        self.crossings = {}  # entrance cell -> set of entrance cells across a border
+        self.intra = {}  # cluster -> {entrance: {entrance: distance}}
+        self._dirty = set()
+        for cr in range(self.cluster_rows):
+            for cc in range(self.cluster_cols):
+                for key in self._borders_of((cr, cc)):
+                    if key not in self.transitions:
+                        self._build_border(key)
+        for cr in range(self.cluster_rows):
+            for cc in range(self.cluster_cols):
+                self._build_intra((cr, cc))
+        grid.add_listener(self._on_grid_change)
+
+    @property
+    def grid(self):
+        return self._grid()
+
+    def _on_grid_change(self, pos, blocked):
+        self._dirty.add(self.cluster_of(pos))
+
+    def close(self):
+        """Stop following grid changes."""
+        grid = self.grid
+        if grid is not None:
+            grid.remove_listener(self._on_grid_change)
+
+    def cluster_of(self, cell):
+        return (cell[0] // self.cluster_size, cell[1] // self.cluster_size)
+
+    def _bounds(self, cluster):
+        size = self.cluster_size
+        r0, c0 = cluster[0] * size, cluster[1] * size
+        return r0, min(r0 + size, self.grid.rows), c0, min(c0 + size, self.grid.cols)
+
+    def _borders_of(self, cluster):
+        # ('h', cr, cc) is the border below cluster (cr, cc); ('v', cr, cc) the one to its right
+        cr, cc = cluster
+        keys = []
+        if cr > 0:
+            keys.append(('h', cr - 1, cc))
+        if cr + 1 < self.cluster_rows:
+            keys.append(('h', cr, cc))
+        if cc > 0:
+            keys.append(('v', cr, cc - 1))
+        if cc + 1 < self.cluster_cols:
+            keys.append(('v', cr, cc))
+        return keys
+
+    def _build_border(self, key):
+        for a, b in self.transitions.get(key, []):
+            self.crossings.get(a, set()).discard(b)
+            self.crossings.get(b, set()).discard(a)
+        orientation, cr, cc = key
+        r0, r1, c0, c1 = self._bounds((cr, cc))
+        if orientation == 'h':
+            pairs = [((r1 - 1, c), (r1, c)) for c in range(c0, c1)]
+        else:
+            pairs = [((r, c1 - 1), (r, c1)) for r in range(r0, r1)]
+        is_free = self.grid.is_free
+        transitions = []
+        segment = []
+        for pair in pairs + [None]:
+            if pair is not None and is_free(pair[0]) and is_free(pair[1]):
+                segment.append(pair)
+                continue
+            if segment:
+                if len(segment) >= WIDE_OPENING:
+                    transitions.extend([segment[0], segment[-1]])
+                else:
+                    transitions.append(segment[len(segment) // 2])
+                segment = []
+        self.transitions[key] = transitions
+        for a, b in transitions:
+            self.crossings.setdefault(a, set()).add(b)
+            self.crossings.setdefault(b, set()).add(a)
+
+    def _entrances(self, cluster):
+        entrances = set()
+        for key in self._borders_of(cluster):
+            for a, b in self.transitions[key]:
+                entrances.add(a if self.cluster_of(a) == cluster else b)
+        return entrances
+
+    def _local_bfs(self, source, bounds):
+        # BFS from source that never leaves the given cluster bounds
+        r0, r1, c0, c1 = bounds
+        grid = self.grid
+        source_idx = grid.index(source)
+        parent = {source_idx: None}
+        distance = {source_idx: 0}
+        queue = deque([source_idx])
+        while queue:
+            current = queue.popleft()
+            for neighbor in grid.neighbors[current].tolist():
+                if neighbor < 0 or neighbor in parent:
+                    continue
+                r, c = divmod(neighbor, grid.cols)
+                if r0 <= r < r1 and c0 <= c < c1:
+                    parent[neighbor] = current
+                    distance[neighbor] = distance[current] + 1
+                    queue.append(neighbor)
+        return distance, parent
+
+    def _build_intra(self, cluster):
+        bounds = self._bounds(cluster)
+        entrances = self._entrances(cluster)
+        edges = {}
+        for entrance in entrances:
+            distance, _ = self._local_bfs(entrance, bounds)
+            edges[entrance] = {other: distance[self.grid.index(other)] for other in entrances
+                               if other != entrance and self.grid.index(other) in distance}
+        self.intra[cluster] = edges
+
+    def refresh(self):
+        """Rebuild the clusters touched by grid changes since the last call."""
+        if not self._dirty:
+            return
+        refresh = set()
+        for cluster in self._dirty:
+            for key in self._borders_of(cluster):
+                self._build_border(key)
+                _, cr, cc = key
+                refresh.add((cr, cc))
+                refresh.add((cr + 1, cc) if key[0] == 'h' else (cr, cc + 1))
+            refresh.add(cluster)
+        self._dirty = set()
+        for cluster in refresh:
+            self._build_intra(cluster)
+
+    def _local_path(self, a, b, stats=None):
+        # Refine one abstract hop inside a's cluster
+        distance, parent = self._local_bfs(a, self._bounds(self.cluster_of(a)))
+        if stats is not None:
+            stats['expanded'] += len(distance)  # Every cell the BFS reached was expanded
+        current = self.grid.index(b)
+        if current not in parent:
+            return None
+        steps = []
+        while parent[current] is not None:
+            steps.append(self.grid.position(current))
+            current = parent[current]
+        steps.reverse()
+        return steps
+
+    def find_path(self, start, end, stats=None):
+        """Steps from start to end in a_star's format, or None.
+
+        stats['expanded'] counts the abstract-graph nodes plus every cell
+        expanded by the BFS from start and end and by refining each hop, so
+        it compares with a_star's count.  stats['abstract_expanded'] is the
+        abstract search alone.
+        """
+        self.refresh()
+        if stats is not None:
+            stats['expanded'] = 0
+        start, end = tuple(start), tuple(end)
+        grid = self.grid
+        if not grid.in_bounds(start) or not grid.is_free(end):
+            return None
+        if start == end:
+            return []
+
+        # Temporary edges from start and to end within their clusters
+        start_cluster, end_cluster = self.cluster_of(start), self.cluster_of(end)
+        start_distance, _ = self._local_bfs(start, self._bounds(start_cluster))
+        start_edges = {e: start_distance[grid.index(e)] for e in self._entrances(start_cluster)
+                       if grid.index(e) in start_distance}
+        if start_cluster == end_cluster and grid.index(end) in start_distance:
+            start_edges[end] = start_distance[grid.index(end)]
+        end_distance, _ = self._local_bfs(end, self._bounds(end_cluster))
+        if stats is not None:
+            stats['expanded'] += len(start_distance) + len(end_distance)
+        end_edges = {e: end_distance[grid.index(e)] for e in self._entrances(end_cluster)
+                     if grid.index(e) in end_distance}
+
+        def neighbors(node):
+            if node == start:
+                yield from start_edges.items()
+                for across in self.crossings.get(node, ()):
+                    yield across, 1
+                return
+            yield from self.intra[self.cluster_of(node)].get(node, {}).items()
+            for across in self.crossings.get(node, ()):
+                yield across, 1
+            if node in end_edges:
+                yield end, end_edges[node]
+
+        def h(node):
+            return abs(node[0] - end[0]) + abs(node[1] - end[1])
+
+        open_set = IndexedPriorityQueue()
+        open_set.push(start, (h(start), start))
+        g_score = {start: 0}
+        came_from = {}
+        closed = set()
+        expanded = 0
+        while open_set:
+            node, _ = open_set.pop()
+            closed.add(node)
+            expanded += 1
+            if node == end:
+                break
+            for neighbor, cost in neighbors(node):
+                if neighbor in closed:
+                    continue
+                tentative = g_score[node] + cost
+                if tentative < g_score.get(neighbor, float('inf')):
+                    g_score[neighbor] = tentative
+                    came_from[neighbor] = node
+                    open_set.push(neighbor, (tentative + h(neighbor), neighbor))
+        if stats is not None:
+            stats['abstract_expanded'] = expanded
+            stats['expanded'] += expanded
+        if end not in g_score:
+            return None
+
+        abstract = [end]
+        while abstract[-1] != start:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+
+        steps = []
+        for a, b in zip(abstract, abstract[1:]):
+            if self.cluster_of(a) != self.cluster_of(b):
+                steps.append(b)  # Border crossing is a single move
+            else:
+                hop = self._local_path(a, b, stats)
+                if hop is None:
+                    return None
+                steps.extend(hop)
+        return steps
+
+
+# One planner per grid object, dropped together with the grid
+_planners = weakref.WeakKeyDictionary()
+
+
+def get_planner(grid, cluster_size=10):
+    planner = _planners.get(grid)
+    if planner is None or planner.cluster_size != cluster_size:
+        if planner is not None:
+            planner.close()  # Replaced; it would otherwise keep rebuilding clusters on every edit
+        planner = _planners[grid] = HierarchicalPlanner(grid, cluster_size)
+    return planner
+
+
+def hpa_star(grid, start, end, stats=None):
+    """Drop-in alternative to pathfinding.a_star for large maps."""
+    grid = WarehouseGrid.coerce(grid)  # The planner only holds the grid weakly
+    return get_planner(grid).find_path(start, end, stats)
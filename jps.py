@@ -0,0 +1,179 @@
+"""Jump Point Search for the 4-connected, unit-cost moves of the planners.
+
+Open floors have many equally short paths that differ only in the order of
+their moves, and A* pushes every one of those prefixes onto the queue.  JPS
+only considers the canonical one: horizontal moves come first and a bot
+turns from vertical back to horizontal only when an obstacle forces it.
+Straight runs are scanned without touching the queue, so only the cells
+where a canonical path can turn (jump points) are expanded.
+
+Horizontal scans look up and down at every cell they pass, the 4-connected
+counterpart of the diagonal step in 8-connected JPS.  Where a vertical scan
+stops does not depend on the query, so it is precomputed per grid and the
+look-ups are O(1).
+"""
+import weakref
+
+import numpy as np
+
+from priority_queue import IndexedPriorityQueue
+from warehouse_grid import WarehouseGrid
+
+HORIZONTAL = 'h'
+VERTICAL = 'v'
+
+
+class JumpTables:
+    """Where a vertical scan from each cell stops, upwards and downwards.
+
+    ``stops[dr][r][c]`` is the row of the first forced turn seen when
+    scanning from (r, c) in direction dr, or -1 if the scan hits a wall
+    first; ``ends[dr][r][c]`` is the last free row before that wall.
+    """
+
+    def __init__(self, grid):
+        self.version = grid.version
+        self.cells = grid.cells.tolist()
+        rows, cols = grid.rows, grid.cols
+        free = np.zeros((rows + 2, cols + 2), dtype=bool)  # Off-grid counts as blocked
+        free[1:-1, 1:-1] = grid.cells == 0
+        self.stops = {}
+        self.ends = {}
+        for dr in (-1, 1):
+            # A cell entered moving dr forces a turn if a side cell is free
+            # while the one beside the previous cell was not
+            behind = free[1 - dr:rows + 1 - dr]
+            side_free = free[1:-1]
+            forced = ((side_free[:, :-2] & ~behind[:, :-2]) | (side_free[:, 2:] & ~behind[:, 2:]))
+            cell_free = free[1:-1, 1:-1]
+            stops = np.full((rows, cols), -1, dtype=np.int32)
+            ends = np.empty((rows, cols), dtype=np.int32)
+            order = range(rows - 1, -1, -1) if dr == 1 else range(rows)
+            for r in order:
+                nxt = r + dr
+                if not 0 <= nxt < rows:
+                    ends[r] = r
+                    continue
+                open_ahead = cell_free[nxt]
+                stops[r] = np.where(open_ahead, np.where(forced[nxt], nxt, stops[nxt]), -1)
+                ends[r] = np.where(open_ahead, ends[nxt], r)
+            self.stops[dr] = stops.tolist()
+            self.ends[dr] = ends.tolist()
+
+
+# One set of tables per grid object, rebuilt when the grid changes
+_tables = weakref.WeakKeyDictionary()
+
+
+def get_tables(grid):
+    tables = _tables.get(grid)
+    if tables is None or tables.version != grid.version:
+        tables = _tables[grid] = JumpTables(grid)
+    return tables
+
+
+def jump_point_search(grid, start, end, stats=None):
+    """Shortest path from start to end in a_star's step format, or None."""
+    grid = WarehouseGrid.coerce(grid)
+    start, end = tuple(start), tuple(end)
+    if not grid.in_bounds(start) or not grid.is_free(end):
+        return None
+    tables = get_tables(grid)
+    rows, cols, cells = grid.rows, grid.cols, tables.cells
+    goal_r, goal_c = end
+
+    def free(r, c):
+        return 0 <= r < rows and 0 <= c < cols and cells[r][c] == 0
+
+    def jump_vertical(r, c, dr):
+        stop = tables.stops[dr][r][c]
+        if c == goal_c and (goal_r - r) * dr > 0:
+            limit = stop if stop >= 0 else tables.ends[dr][r][c]
+            if (limit - goal_r) * dr >= 0:
+                return end
+        return (stop, c) if stop >= 0 else None
+
+    def jump_horizontal(r, c, dc):
+        # Any cell from which a vertical scan finds something is a jump
+        # point, because the canonical path may turn there
+        row = cells[r]
+        while True:
+            c += dc
+            if not 0 <= c < cols or row[c]:
+                return None
+            if c == goal_c and r == goal_r:
+                return end
+            if jump_vertical(r, c, -1) or jump_vertical(r, c, 1):
+                return (r, c)
+
+    def successor_moves(cell, axis, direction):
+        if axis is None:
+            return [(HORIZONTAL, -1), (HORIZONTAL, 1), (VERTICAL, -1), (VERTICAL, 1)]
+        if axis == HORIZONTAL:
+            return [(HORIZONTAL, direction), (VERTICAL, -1), (VERTICAL, 1)]
+        r, c = cell
+        moves = [(VERTICAL, direction)]
+        for dc in (-1, 1):
+            if free(r, c + dc) and not free(r - direction, c + dc):
+                moves.append((HORIZONTAL, dc))
+        return moves
+
+    def h(cell):
+        return abs(cell[0] - goal_r) + abs(cell[1] - goal_c)
+
+    # A cell reached along a different axis prunes differently, so it is a
+    # different search node
+    start_node = (start, None, 0)
+    open_set = IndexedPriorityQueue()
+    open_set.push(start_node, (h(start), start_node))
+    g_score = {start_node: 0}
+    came_from = {}
+    closed = set()
+    expanded = 0
+    found = None
+
+    while open_set:
+        node, _ = open_set.pop()
+        closed.add(node)
+        expanded += 1
+        cell, axis, direction = node
+        if cell == end:
+            found = node
+            break
+        for move_axis, move_direction in successor_moves(cell, axis, direction):
+            if move_axis == HORIZONTAL:
+                jump = jump_horizontal(cell[0], cell[1], move_direction)
+            else:
+                jump = jump_vertical(cell[0], cell[1], move_direction)
+            if jump is None:
+                continue
+            successor = (jump, move_axis, move_direction)
+            if successor in closed:
+                continue
+            tentative = g_score[node] + abs(jump[0] - cell[0]) + abs(jump[1] - cell[1])
+            if tentative < g_score.get(successor, float('inf')):
+                g_score[successor] = tentative
+                came_from[successor] = node
+                open_set.push(successor, (tentative + h(jump), successor))
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    if found is None:
+        return None
+
+    jump_points = [found[0]]
+    while found != start_node:
+        found = came_from[found]
+        jump_points.append(found[0])
+    jump_points.reverse()
+
+    # Fill in the straight runs between consecutive jump points
+    steps = []
+    for (r0, c0), (r1, c1) in zip(jump_points, jump_points[1:]):
+        dr = (r1 > r0) - (r1 < r0)
+        dc = (c1 > c0) - (c1 < c0)
+        r, c = r0, c0
+        while (r, c) != (r1, c1):
+            r, c = r + dr, c + dc
+            steps.append((r, c))
+    return steps
@@ -1,9 +1,18 @@
-from collections import deque
-from datetime import datetime
-import heapq
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 
+from cbs import CBSPlanner
+from distance_cache import cached_path
+from event_log import EventLog
+from grid_renderer import RasterGridView
+from log_view import LogView
+from playback import PlaybackControls
+from sim_worker import SimulationWorker
+from simulation import plan_fleet, run_schedule
+from spacetime import plan_prioritized
+from timeline import record_schedule
+from warehouse_grid import WarehouseGrid
+
 # Define colors for each bot //DP
 BOT_COLORS = {
     "Bot 1 Start": "blue",
@@ -12,6 +21,13 @@ BOT_COLORS = {
     "Bot 4 Start": "purple"
 }
 
+# Multi-bot planners selectable from the Solver menu
+SOLVERS = {
+    "Prioritized": plan_prioritized,
+    "CBS (optimal)": CBSPlanner(suboptimality=1.0),
+    "ECBS (w=1.5)": CBSPlanner(suboptimality=1.5),
+}
+
 # Global variables
 grid = []  # The grid representation
 bot_data = {}  # Store bot data with start and end points
@@ -21,229 +37,189 @@ blocked_positions = {}  # Track positions occupied by bots
 command_count = {}
 time_taken = {}
 impossible_scenario_flag = False
+playback = None  # PlaybackControls of the last recorded run
+solver_worker = None  # SimulationWorker of the solve in progress, if any
+
+# Command log record codes; text is only built when a record is shown
+START, UP, DOWN, LEFT, RIGHT, HOLD, WAITING, REVERSING, REPLANNED, IMPOSSIBLE, MOVED, MESSAGE = range(12)
+COMMAND_CODES = {"Starting Position": START, "Forward (up)": UP, "Forward (down)": DOWN,
+                 "Forward (left)": LEFT, "Forward (right)": RIGHT, "Wait": HOLD}
+EVENT_CODES = {'waiting': WAITING, 'reversing': REVERSING, 'replanned': REPLANNED,
+               'impossible': IMPOSSIBLE, 'moved': MOVED}
+LOG_TEMPLATES = {code: "{bot} moving to ({row}, {col}) - Command: " + command for command, code in COMMAND_CODES.items()}
+LOG_TEMPLATES.update({
+    WAITING: "{bot} is waiting to avoid collision at ({row}, {col}).",
+    REVERSING: "{bot} is reversing and recalculating path from ({row}, {col}).",
+    REPLANNED: "{bot} found new path starting from ({row}, {col}).",
+    IMPOSSIBLE: "{bot} has encountered an impossible scenario at ({row}, {col}).",
+    MOVED: "{bot} successfully moved to ({row}, {col}).",
+    MESSAGE: "{text}",
+})
+event_log = EventLog(LOG_TEMPLATES)
+
+# Command types the log panel can be filtered by
+LOG_FILTERS = {
+    "All commands": None,
+    "Moves": (START, UP, DOWN, LEFT, RIGHT, MOVED),
+    "Waits": (HOLD, WAITING),
+    "Replans": (REVERSING, REPLANNED),
+    "Impossible": (IMPOSSIBLE,),
+    "Messages": (MESSAGE,),
+}
+ALL_BOTS = "All bots"
+
+# Mirrors a headless simulation run onto the grid view and command log
+class GuiObserver:
+    def __init__(self, view, step_delay, log_view):
+        self.view = view
+        self.step_delay = step_delay
+        self.log_view = log_view
+        self.tick = 0
+
+    def on_log(self, message):
+        event_log.log(self.tick, "", MESSAGE, text=message)
+
+    def on_event(self, bot_id, event, pos, command=None):
+        code = COMMAND_CODES.get(command) if event == 'moving' else EVENT_CODES.get(event)
+        if code is None:  # A command this panel has no template for
+            self.on_log(f"{bot_id} {event} at {pos} {command or ''}".rstrip())
+        else:
+            event_log.log(self.tick, bot_id, code, pos)
 
-# Movement Commands for Bots
-def forward(r, c, direction):
-    if direction == 'up':
-        return r - 1, c
-    elif direction == 'down':
-        return r + 1, c
-    elif direction == 'left':
-        return r, c - 1
-    else:  # right
-        return r, c + 1
-
-def reverse(r, c, direction):
-    if direction == 'up':
-        return r + 1, c
-    elif direction == 'down':
-        return r - 1, c
-    elif direction == 'left':
-        return r, c + 1
-    else:  # right
-        return r, c - 1
-
-def turn_left(direction):
-    directions = ['up', 'left', 'down', 'right']
-    return directions[(directions.index(direction) + 1) % 4]
-
-def turn_right(direction):
-    directions = ['up', 'right', 'down', 'left']
-    return directions[(directions.index(direction) - 1) % 4]
-
-# A* Algorithm to Find the Shortest Path
-def heuristic(a, b):
-    # Manhattan distance as the heuristic function
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-def a_star(grid, start, end):
-    rows, cols = len(grid), len(grid[0])
-    open_set = []
-    heapq.heappush(open_set, (0, start))
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: heuristic(start, end)}
-
-    while open_set:
-        _, current = heapq.heappop(open_set)
-
-        if current == end:
-            return reconstruct_path(came_from, current, start)
-
-        for dr, dc in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            nr, nc = current[0] + dr, current[1] + dc
-            neighbor = (nr, nc)
-
-            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] != 'X':
-                tentative_g_score = g_score[current] + 1
-
-                if tentative_g_score < g_score.get(neighbor, float('inf')):
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + heuristic(neighbor, end)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-
-    return None  # No path found
-
-# Reconstruct the Path from A* Algorithm
-def reconstruct_path(came_from, current, start):
-    steps = []
-    while current != start:
-        steps.append(current)
-        current = came_from[current]
-    steps.reverse()
-    return steps
-# Function to log the movement command based on the direction change
-def get_command(prev_pos, curr_pos):
-    prev_r, prev_c = prev_pos
-    curr_r, curr_c = curr_pos
-
-    if curr_r < prev_r:
-        return "Forward (up)"
-    elif curr_r > prev_r:
-        return "Forward (down)"
-    elif curr_c < prev_c:
-        return "Forward (left)"
-    elif curr_c > prev_c:
-        return "Forward (right)"
-    else:
-        return "Wait"
+    def on_move(self, bot_id, pos):
+        self.view.set_cell(pos, BOT_COLORS.get(bot_id, "black"))  # Drawn with the rest of the step
+        blocked_positions[pos] = bot_id
 
-# Function to Schedule Bots in Parallel and Avoid Collisions
-def schedule_bots(bot_paths, buttons, step_delay, log_text):
-    max_steps = max(len(steps) for steps in bot_paths.values())
-    total_commands = 0  # To track the total number of commands for all bots
-    impossible_case_detected = False  # Track if an impossible case is detected
-
-    for step_idx in range(max_steps):
-        next_positions = {}
-        for bot_id, path in bot_paths.items():
-            if step_idx < len(path):
-                r, c = path[step_idx]
-                
-                # Determine the previous position (for command logging)
-                if step_idx > 0:
-                    prev_r, prev_c = path[step_idx - 1]
-                    command = get_command((prev_r, prev_c), (r, c))  # Get the movement command
-                else:
-                    command = "Starting Position"
-
-                # Log the movement command along with the coordinates
-                log_text.insert(tk.END, f"{bot_id} moving to ({r}, {c}) - Command: {command}\n")
-
-                if (r, c) in next_positions:
-                    # Collision detected, choose one bot to wait or reverse
-                    if command_count[bot_id] % 2 == 0:
-                        log_text.insert(tk.END, f"{bot_id} is waiting to avoid collision at ({r}, {c}).\n")
-                        bot_paths[bot_id].insert(step_idx, path[step_idx - 1])  # Bot waits
-                    else:
-                        # Reverse and recalculate the path using A*
-                        log_text.insert(tk.END, f"{bot_id} is reversing and recalculating path from ({r}, {c}).\n")
-                        r, c = reverse(r, c, 'up')  # Example reverse, update this based on direction
-                        new_path = a_star(grid, (r, c), bot_data[bot_id]['end'])
-                        if new_path:
-                            bot_paths[bot_id] = new_path
-                            log_text.insert(tk.END, f"{bot_id} found new path starting from ({r}, {c}).\n")
-                        else:
-                            log_text.insert(tk.END, f"{bot_id} has encountered an impossible scenario at ({r}, {c}).\n")
-                            impossible_case_detected = True
-                            break  # Exit as soon as impossible scenario is detected
-                else:
-                    next_positions[(r, c)] = bot_id
-                    # Move the bot to the next step
-                    buttons[r][c].config(bg=BOT_COLORS.get(bot_id, "black"))
-                    blocked_positions[(r, c)] = bot_id
-                    root.update()
-                    command_count[bot_id] += 1
-                    total_commands += 1
-                    time_taken[bot_id] += 1
-                    log_text.insert(tk.END, f"{bot_id} successfully moved to ({r}, {c}).\n")
-
-        root.after(step_delay)  # Introduce delay for visual purposes
+    def on_step(self, step_idx):
+        self.tick = step_idx + 1
+        self.view.flush()  # One image update per step for all bots
+        self.log_view.refresh()  # Only the lines in view are drawn
         root.update()
+        root.after(self.step_delay)  # Introduce delay for visual purposes
 
-        # Stop if an impossible case is detected
-        if impossible_case_detected:
-            break
-
-    # Display total time and steps for each bot
-    for bot_id in bot_paths.keys():
-        total_steps = command_count[bot_id]
-        total_time = time_taken[bot_id]
-        log_text.insert(tk.END, f"{bot_id} reached destination in {total_steps} steps and took {total_time} seconds.\n")
-
-    # Calculate average commands
-    num_bots = len(bot_paths)
-    avg_commands = total_commands / num_bots if num_bots > 0 else 0
-    max_commands = max(command_count.values(), default=0)
-
-    log_text.insert(tk.END, f"\nAverage commands: {avg_commands:.2f}\n")
-    log_text.insert(tk.END, f"Maximum commands: {max_commands}\n")
-
-    if impossible_case_detected:
-        log_text.insert(tk.END, f"Impossible scenario detected after {total_commands} commands.\n")
-
-# Start pathfinding for all bots
-def start_pathfinding(bot_starts, bot_destinations, buttons, blocked_positions, log_text):
-    step_delay = 1000  # Delay in milliseconds
-    bot_paths = {}
-
-    # Initialize command count and time taken for each bot
-    for bot_id in bot_starts:
-        command_count[bot_id] = 0  # Initialize command count for each bot
-        time_taken[bot_id] = 0  # Initialize time taken for each bot
-
-    # Calculate the shortest path for each bot using A* algorithm
-    for bot_id, start in bot_starts.items():
-        end = bot_destinations.get(bot_id)
-        if end:
-            bot_data[bot_id] = {'start': start, 'end': end}
-            path = a_star(grid, start, end)
-            if path:
-                bot_paths[bot_id] = path
-                log_text.insert(tk.END, f"{bot_id} path calculated.\n")
-            else:
-                log_text.insert(tk.END, f"Path not found for {bot_id}\n")
-
-    # Schedule and move the bots in parallel with dynamic collision handling
-    schedule_bots(bot_paths, buttons, step_delay, log_text)
-
-# The rest of the code remains unchanged...
+# Function to Schedule Bots in Parallel and Avoid Collisions
+def schedule_bots(bot_paths, view, step_delay, log_view):
+    global impossible_scenario_flag
+    observer = GuiObserver(view, step_delay, log_view)
+    bot_destinations = {bot_id: bot_data[bot_id]['end'] for bot_id in bot_paths}
+    result = run_schedule(grid, bot_paths, bot_destinations, cached_path, observer)
+
+    command_count.update(result.command_count)
+    time_taken.update(result.time_taken)
+    impossible_scenario_flag = result.impossible
+    return result
+
+# Run work() on a worker thread so a long solve never freezes the window,
+# then hand its result to done() back on the Tk thread
+def solve_in_background(work, done, poll_ms=100):
+    global solver_worker
+    if solver_worker is not None and solver_worker.running():
+        return False  # One solve at a time
+    outcome = {}
+
+    def step():
+        outcome['result'] = work()
+        return None  # The whole solve is one tick
+
+    def poll():
+        if worker.running():
+            root.after(poll_ms, poll)
+            return
+        try:
+            worker.latest()  # Re-raises what work() raised
+        except Exception as error:
+            messagebox.showerror("Solver failed", str(error))
+            return
+        done(outcome['result'])
+
+    worker = solver_worker = SimulationWorker(step, lambda: None, max_frames=1, name="solver").start()
+    root.after(poll_ms, poll)
+    return True
 
 # Start pathfinding for all bots
-def start_pathfinding(bot_starts, bot_destinations, buttons, blocked_positions, log_text):
+def start_pathfinding(bot_starts, bot_destinations, view, blocked_positions, log_view, solver="Prioritized"):
     step_delay = 1000  # Delay in milliseconds
-    bot_paths = {}
 
     # Initialize command count and time taken for each bot
     for bot_id in bot_starts:
         command_count[bot_id] = 0  # Initialize command count for each bot
         time_taken[bot_id] = 0  # Initialize time taken for each bot
 
-    # Calculate the shortest path for each bot using A* algorithm
     for bot_id, start in bot_starts.items():
         end = bot_destinations.get(bot_id)
         if end:
             bot_data[bot_id] = {'start': start, 'end': end}
-            path = a_star(grid, start, end)
-            if path:
-                bot_paths[bot_id] = path
-                log_text.insert(tk.END, f"{bot_id} path calculated.\n")
-            else:
-                log_text.insert(tk.END, f"Path not found for {bot_id}\n")
 
-    # Schedule and move the bots in parallel with dynamic collision handling
-    schedule_bots(bot_paths, buttons, step_delay, log_text)
+    # Plan all bots up front in space-time so their paths never collide
+    fleet_planner = SOLVERS[solver]
+    messages = []  # Filled by the worker, logged once it is done
+
+    def planned(bot_paths):
+        observer = GuiObserver(view, step_delay, log_view)
+        for message in messages:
+            observer.on_log(message)
+        if isinstance(fleet_planner, CBSPlanner):
+            observer.on_log(fleet_planner.last_result.summary())
+
+        # Schedule and move the bots in parallel with dynamic collision handling
+        schedule_bots(bot_paths, view, step_delay, log_view)
+        log_view.refresh()  # The summary logged after the last step
+
+    solve_in_background(lambda: plan_fleet(grid, bot_starts, bot_destinations, fleet_planner, log=messages), planned)
+
+# Colour a cell has when no bot is on it, as set in the editor
+def base_fill(pos):
+    label = grid[pos[0]][pos[1]]
+    if label == 'X':
+        return "black"
+    if label == 'B':
+        return "red"
+    if label in BOT_COLORS or label.startswith("Bot"):
+        return BOT_COLORS.get(label, "blue")
+    return "white"
+
+# Run the shift headlessly, then play it back at any speed with seeking
+def record_pathfinding(bot_starts, bot_destinations, view, log_view, solver="Prioritized"):
+    solve_in_background(lambda: record_schedule(grid, bot_starts, bot_destinations, cached_path, SOLVERS[solver]),
+                        lambda recorded: show_recording(*recorded, view, log_view))
+
+def show_recording(timeline, result, view, log_view):
+    global playback
+    event_log.log(len(timeline) - 1, "", MESSAGE,
+                  text=f"Recorded {len(timeline) - 1} steps; average commands {result.avg_commands:.2f}")
+    log_view.refresh()
+
+    # Start from the editor's colours, without the trails of earlier runs
+    for pos in list(view.colors):
+        view.set_cell(pos, base_fill(pos))
+    shown = {}  # Bot id -> cell it is drawn on
+
+    def draw_step(step):
+        positions = timeline.positions_at(step)
+        occupied = set(positions.values())
+        for pos in set(shown.values()) - occupied:
+            view.set_cell(pos, base_fill(pos))
+        for bot_id, pos in positions.items():
+            view.set_cell(pos, BOT_COLORS.get(bot_id, "black"))
+        shown.clear()
+        shown.update(positions)
+        view.flush()  # Unchanged cells are skipped here
+        return ", ".join(f"{bot_id} {event}" for bot_id, event in timeline.events_at(step))
+
+    if playback is not None:
+        playback.destroy()
+    playback = PlaybackControls(root, timeline, draw_step)
+    playback.grid(row=7, column=0, columnspan=2)
 
 # Reset selected cell
 def reset_selected_cell():
     selected_bot = combobox.get()
     if selected_bot and selected_bot != "Select Bot":
-        for r in range(len(grid)):
-            for c in range(len(grid[0])):
-                if grid[r][c] == selected_bot or grid[r][c] == 'B':
-                    grid[r][c] = '.'
-                    buttons[r][c].config(text=".", bg="white", fg="black")
+        # Only labelled cells can match, no need to visit the whole grid
+        for (r, c), label in list(grid.labels.items()):
+            if label == selected_bot or label == 'B':
+                grid[r][c] = '.'
+                view.set_cell((r, c), "white", "")
         combobox.set("Select Bot")
     else:
         messagebox.showwarning("Warning", "Please select a bot to reset the cell.")
@@ -256,7 +232,7 @@ def clear_grid():
     for r in range(len(grid)):
         for c in range(len(grid[0])):
             grid[r][c] = '.'
-            buttons[r][c].config(text=".", bg="white", fg="black")
+    view.clear()
 
     # Clear stored data
     bot_data.clear()
@@ -270,10 +246,10 @@ def clear_grid():
 
 # Create the Grid and Set Up the GUI
 def create_grid():
-    global grid, buttons  # Declare grid and buttons as global
+    global grid, view  # Declare grid and its view as global
     rows = int(simpledialog.askstring("Input", "Enter number of rows"))
     cols = int(simpledialog.askstring("Input", "Enter number of columns"))
-    grid = [['.' for _ in range(cols)] for _ in range(rows)]  # Initialize global grid
+    grid = WarehouseGrid(rows, cols)  # Initialize global grid
 
     bot_starts = {}
     bot_destinations = {}
@@ -281,44 +257,37 @@ def create_grid():
     def update_combobox():
         combobox['values'] = list(bot_starts.keys())
 
-    def set_cell(event, mode):
-        row, col = event.widget.grid_info()["row"], event.widget.grid_info()["column"]
+    def set_cell(row, col):
+        mode = mode_var.get()
         selected_bot = combobox.get()
 
         if mode == 'start':
             bot_id = f"Bot {len(bot_starts) + 1} Start"
             grid[row][col] = bot_id
-            buttons[row][col].config(text=bot_id, bg=BOT_COLORS.get(bot_id, "blue"), fg="white")
+            view.set_cell((row, col), BOT_COLORS.get(bot_id, "blue"), bot_id, fg="white")
             bot_starts[bot_id] = (row, col)
             update_combobox()
         elif mode == 'end' and selected_bot != "Select Bot":
             if selected_bot in bot_starts:
                 grid[row][col] = 'B'
-                buttons[row][col].config(text='B', bg="red", fg="white")
+                view.set_cell((row, col), "red", 'B', fg="white")
                 bot_destinations[selected_bot] = (row, col)
             else:
                 messagebox.showwarning("Warning", "Please set a start point for this bot first.")
         elif mode == 'obstacle':
             grid[row][col] = 'X'
-            buttons[row][col].config(text='X', bg="black", fg="white")
+            view.set_cell((row, col), "black", 'X', fg="white")
         else:
             grid[row][col] = '.'
-            buttons[row][col].config(text='.', bg="white", fg="black")
+            view.set_cell((row, col), "white", "")
 
     global root
     root = tk.Tk()
     root.title("Warehouse Autobot Pathfinding")
 
-    grid_frame = tk.Frame(root)
-    grid_frame.grid(row=0, column=0)
-
-    buttons = [[None for _ in range(cols)] for _ in range(rows)]
-    for r in range(rows):
-        for c in range(cols):
-            button = tk.Button(grid_frame, text=".", width=5, height=2, font=("Helvetica", 12), bg="white")
-            button.grid(row=r, column=c, padx=2, pady=2)
-            button.bind('<Button-1>', lambda event, m='start': set_cell(event, mode_var.get()))
-            buttons[r][c] = button
+    # One Canvas for the whole grid; clicks are mapped to cells by position
+    view = RasterGridView(root, rows, cols, on_click=set_cell)
+    view.grid(row=0, column=0)
 
     log_frame = tk.Frame(root)
     log_frame.grid(row=0, column=1, padx=20, pady=20)
@@ -326,8 +295,26 @@ def create_grid():
     log_label = tk.Label(log_frame, text="Command Log", font=("Helvetica", 12))
     log_label.pack()
 
-    log_text = tk.Text(log_frame, width=40, height=20)
-    log_text.pack()
+    # Renders only the visible lines of event_log, however long the run
+    log_view = LogView(log_frame, event_log, width=60, height=24)
+    log_view.pack()
+
+    def list_logged_bots():
+        bot_filter['values'] = [ALL_BOTS] + [bot_id for bot_id in event_log.bot_ids if bot_id]
+
+    bot_filter = ttk.Combobox(log_frame, state="readonly", postcommand=list_logged_bots)
+    bot_filter.set(ALL_BOTS)
+    bot_filter.pack(side=tk.LEFT)
+    code_filter = ttk.Combobox(log_frame, state="readonly", values=list(LOG_FILTERS))
+    code_filter.set("All commands")
+    code_filter.pack(side=tk.LEFT)
+
+    def apply_log_filter(event=None):
+        bot_id = bot_filter.get()
+        log_view.set_filter(None if bot_id == ALL_BOTS else [bot_id], LOG_FILTERS[code_filter.get()])
+
+    bot_filter.bind("<<ComboboxSelected>>", apply_log_filter)
+    code_filter.bind("<<ComboboxSelected>>", apply_log_filter)
 
     mode_var = tk.StringVar(value='start')
     modes = ['start', 'end', 'obstacle']
@@ -344,9 +331,16 @@ def create_grid():
     combobox.set("Select Bot")
     combobox.grid(row=1, column=0)
 
-    start_button = tk.Button(root, text="Start", command=lambda: start_pathfinding(bot_starts, bot_destinations, buttons, blocked_positions, log_text))
+    solver_var = tk.StringVar(value="Prioritized")
+    solver_menu = tk.OptionMenu(root, solver_var, *SOLVERS.keys())
+    solver_menu.grid(row=5, column=0, padx=10, pady=10)
+
+    start_button = tk.Button(root, text="Start", command=lambda: start_pathfinding(bot_starts, bot_destinations, view, blocked_positions, log_view, solver_var.get()))
     start_button.grid(row=2, column=0, padx=10, pady=10)
 
+    record_button = tk.Button(root, text="Record", command=lambda: record_pathfinding(bot_starts, bot_destinations, view, log_view, solver_var.get()))
+    record_button.grid(row=6, column=0, padx=10, pady=10)
+
     reset_button = tk.Button(root, text="Reset Cell", command=reset_selected_cell)
     reset_button.grid(row=3, column=0, padx=10, pady=10)
 
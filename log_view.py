@@ -0,0 +1,110 @@
+"""Virtualized Tk view of an EventLog.
+
+A Text widget holding a whole run's log slows every insert and scroll down
+once it has tens of thousands of lines.  LogView keeps only the sequence
+numbers of the records it shows, as a NumPy array, and one Canvas text item
+per visible line.  New records, scrolling and filtering by bot or command
+code only re-format the handful of records in the window; nothing else is
+ever turned into text.
+"""
+import tkinter as tk
+import tkinter.font as tkfont
+
+import numpy as np
+
+WHEEL_LINES = 3
+
+
+class LogView:
+    def __init__(self, parent, event_log, width=40, height=20, font=("Courier", 9)):
+        self.event_log = event_log
+        self.height = height  # Visible lines
+        self.bot_ids = None  # Filters, as for EventLog.select; None shows all
+        self.codes = None
+        self.rows = np.zeros(0, dtype=np.int64)  # Sequence numbers that pass the filters
+        self.scanned = 0  # Records before this sequence number have been filtered into rows
+        self.top = 0  # Index in rows of the first visible line
+        self.follow = True  # Keep the newest record in view as records arrive
+
+        self.font = tkfont.Font(font=font)
+        self.line_height = self.font.metrics("linespace")
+        self.frame = tk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, width=width * self.font.measure("0"), height=height * self.line_height,
+                                background="white", highlightthickness=0)
+        self.canvas.pack(side=tk.LEFT)
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.items = [self.canvas.create_text(2, i * self.line_height, anchor="nw", font=self.font, text="")
+                      for i in range(height)]
+        self.shown = [""] * height  # Text currently on each line item
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-WHEEL_LINES if event.delta > 0 else WHEEL_LINES))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-WHEEL_LINES))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(WHEEL_LINES))
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_filter(self, bot_ids=None, codes=None):
+        """Show only records of bot_ids and/or with codes; None lifts a filter."""
+        self.bot_ids = None if bot_ids is None else list(bot_ids)
+        self.codes = None if codes is None else list(codes)
+        self.rows = self.event_log.select(self.bot_ids, self.codes)
+        self.scanned = self.event_log.count
+        self.top = max(0, len(self.rows) - self.height)
+        self.follow = True
+        self.render()
+
+    def refresh(self):
+        """Take in the records logged since the last call, then redraw."""
+        log = self.event_log
+        if log.count < self.scanned:  # The log was cleared
+            self.rows = self.rows[:0]
+            self.scanned = 0
+        if log.count > self.scanned:
+            new_rows = log.select(self.bot_ids, self.codes, start=self.scanned)
+            self.rows = np.concatenate((self.rows, new_rows))
+            self.scanned = log.count
+        self._drop_overwritten()
+        if self.follow:
+            self.top = max(0, len(self.rows) - self.height)
+        self.render()
+
+    def scroll(self, lines):
+        self.scroll_to(self.top + lines)
+
+    def _drop_overwritten(self):
+        # Rows whose records the ring buffer has overwritten since
+        dropped = int(np.searchsorted(self.rows, self.event_log.first))
+        if dropped:
+            self.rows = self.rows[dropped:]
+            self.top = max(0, self.top - dropped)
+
+    def scroll_to(self, top):
+        self._drop_overwritten()
+        last_top = max(0, len(self.rows) - self.height)
+        self.top = min(max(int(top), 0), last_top)
+        self.follow = self.top == last_top  # Scrolled back down to the end
+        self.render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(round(float(amount) * len(self.rows)))
+        elif action == tk.SCROLL:
+            self.scroll(int(amount) * (self.height if unit == tk.PAGES else 1))
+
+    def visible_rows(self):
+        return self.rows[self.top:self.top + self.height]
+
+    def render(self):
+        self._drop_overwritten()
+        texts = [text.strip().replace("\n", " ") for text in self.event_log.messages(self.visible_rows())]  # One line each
+        texts += [""] * (self.height - len(texts))
+        for i, text in enumerate(texts):
+            if text != self.shown[i]:
+                self.canvas.itemconfigure(self.items[i], text=text)
+                self.shown[i] = text
+        total = max(len(self.rows), 1)
+        self.scrollbar.set(self.top / total, min(self.top + self.height, total) / total)
@@ -1,19 +1,19 @@
 import tkinter as tk
-import time
 from collections import deque
 
+from grid_renderer import GridRenderer
+from occupancy import OccupancyGrid
+from sim_worker import SimulationWorker
+from warehouse_grid import WarehouseGrid
+
 # Function to read the grid from a file and extract bot positions
 def read_grid_and_bots_from_file(filename):
-    grid = []
+    grid = WarehouseGrid.from_file(filename)
     bot_positions = {}  # Dictionary to store autobot start and destination positions
-    
-    with open(filename, 'r') as file:
-        for r, line in enumerate(file):
-            row = line.strip().split()
-            grid.append(row)
-            for c, cell in enumerate(row):
-                if cell.startswith('A') or cell.startswith('B'):
-                    bot_positions[cell] = (r, c)
+
+    for (r, c), cell in grid.labels.items():
+        if cell.startswith('A') or cell.startswith('B'):
+            bot_positions[cell] = (r, c)
     
     return grid, bot_positions
 
@@ -30,7 +30,7 @@ DIRECTIONS = {
 
 # BFS for shortest path
 def bfs(grid, start, goal):
-    rows, cols = len(grid), len(grid[0])
+    grid = WarehouseGrid.coerce(grid)
     queue = deque([(start, 'N')])  # Queue stores position and direction (facing North initially)
     visited = set([start])  # Track visited cells
     parent_map = {}  # Track the path
@@ -45,7 +45,7 @@ def bfs(grid, start, goal):
         # Explore neighbors in 4 possible directions (N, E, S, W)
         for d in DIRECTIONS:
             nr, nc = r + DIRECTIONS[d][0], c + DIRECTIONS[d][1]
-            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] != 'X' and (nr, nc) not in visited:
+            if grid.is_free((nr, nc)) and (nr, nc) not in visited:
                 visited.add((nr, nc))
                 queue.append(((nr, nc), d))
                 parent_map[(nr, nc)] = (r, c)
@@ -103,98 +103,100 @@ def create_gui(grid, bots):
     canvas.grid(row=0, column=0)
 
     cell_size = 100
-    rows, cols = len(grid), len(grid[0])
-
-    # Create grid cells
-    cells = {}
-    for r in range(rows):
-        for c in range(cols):
-            x1 = c * cell_size
-            y1 = r * cell_size
-            x2 = x1 + cell_size
-            y2 = y1 + cell_size
-
-            if grid[r][c] == 'X':
-                color = 'red'  # Obstacle
-            elif grid[r][c].startswith('A'):
-                color = 'green'  # Start point
-            elif grid[r][c].startswith('B'):
-                color = 'orange'  # End point
-            else:
-                color = 'white'  # Empty cells
-
-            cell = canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="black")
-            cells[(r, c)] = cell
-
-    # Function to animate the autobots
-    def animate_bots(bots):
-        bot_indexes = {bot.name: 0 for bot in bots}  # Track the path index of each bot
-        collision_positions = set()  # To track positions with collisions
-
-        while any(bot_indexes[bot.name] < len(bot.path) for bot in bots):
-            for bot in bots:
-                if bot_indexes[bot.name] < len(bot.path):
-                    next_position = bot.path[bot_indexes[bot.name]]
-
-                    # Check if canvas still exists
-                    if not canvas.winfo_exists():
-                        print("Canvas does not exist anymore, stopping animation.")
-                        return
-
-                    # Collision detection
-                    is_collision = False
-                    for other_bot in bots:
-                        if bot != other_bot and bot_indexes[other_bot.name] < len(other_bot.path):
-                            if next_position == other_bot.path[bot_indexes[other_bot.name]]:
-                                is_collision = True
-                                collision_positions.add(next_position)
-                                
-                                # Ensure canvas and cell exist before updating
-                                if next_position in cells and canvas.winfo_exists():
-                                    canvas.itemconfig(cells[next_position], fill="gray")  # Mark collision
-                                root.update()
-                                time.sleep(1)  # Pause on collision
-
-                                # Determine which bot is closer to its destination
-                                bot_remaining_distance = bot.remaining_distance(next_position)
-                                other_bot_remaining_distance = other_bot.remaining_distance(other_bot.path[bot_indexes[other_bot.name]])
-
-                                # Give priority to the bot closer to the destination
-                                if bot_remaining_distance < other_bot_remaining_distance:
-                                    other_bot.is_paused = True  # Pause the other bot
-                                    bot.is_paused = False  # Allow the current bot to move
-                                else:
-                                    bot.is_paused = True
-                                    other_bot.is_paused = False
-
-                                break
-
-                    if not is_collision:
-                        collision_positions.discard(next_position)  # Clear position if no more collision
-                        r, c = next_position
-                        
-                        # Ensure canvas and cell exist before updating
-                        if canvas.winfo_exists() and (r, c) in cells:
-                            canvas.itemconfig(cells[(r, c)], fill="blue" if bot.name == "Bot 1" else "purple")  # Animate bot
-                        bot_indexes[bot.name] += 1
-
-                    # Allow bots to continue moving even after a collision
-                    if is_collision:
-                        bot_indexes[bot.name] += 1  # Move to the next position regardless of collision
-
-            root.update()
-            time.sleep(0.5)  # Control animation speed
-
-            # Check if bots reached their destination
-            for bot in bots:
-                if bot_indexes[bot.name] == len(bot.path):
-                    bot.reached = True
-                    if canvas.winfo_exists() and bot.dest in cells:
-                        canvas.itemconfig(cells[bot.dest], fill="green")  # Destination reached
-                    print(f"{bot.name} reached its destination!")
+
+    # Start points green, end points orange; obstacles red and the rest white
+    base_colors = {}
+    for pos, label in grid.labels.items():
+        if label.startswith('A'):
+            base_colors[pos] = 'green'
+        elif label.startswith('B'):
+            base_colors[pos] = 'orange'
+
+    # Zoomable viewport of at most 800x800 pixels; items only for visible cells
+    renderer = GridRenderer(canvas, grid, cell_size, base_colors=base_colors)
+
+    # Simulation state, owned by the worker thread
+    bot_indexes = {bot.name: 0 for bot in bots}  # Track the path index of each bot
+    collision_positions = set()  # To track positions with collisions
+    occupancy = OccupancyGrid(grid, bots)
+    painted = {}  # Cell -> colour the simulation gave it
+
+    # One tick of the simulation; runs on the worker thread and never touches Tk
+    def step_bots():
+        if not any(bot_indexes[bot.name] < len(bot.path) for bot in bots):
+            return None  # Run over
+
+        # One pass over the whole fleet finds every clash of this tick
+        targets = [grid.index(bot.path[bot_indexes[bot.name]]) if bot_indexes[bot.name] < len(bot.path) else -1
+                   for bot in bots]
+        partners = occupancy.conflicts(targets)
+        collisions = 0
+
+        for slot, bot in enumerate(bots):
+            if bot_indexes[bot.name] < len(bot.path):
+                next_position = bot.path[bot_indexes[bot.name]]
+
+                # Collision detection; each clashing pair is handled by its first bot
+                is_collision = partners[slot] > slot
+                if is_collision:
+                    other_bot = bots[partners[slot]]
+                    collision_positions.add(next_position)
+                    painted[next_position] = "gray"  # Mark collision
+                    collisions += 1
+
+                    # Determine which bot is closer to its destination
+                    bot_remaining_distance = bot.remaining_distance(next_position)
+                    other_bot_remaining_distance = other_bot.remaining_distance(other_bot.path[bot_indexes[other_bot.name]])
+
+                    # Give priority to the bot closer to the destination
+                    if bot_remaining_distance < other_bot_remaining_distance:
+                        other_bot.is_paused = True  # Pause the other bot
+                        bot.is_paused = False  # Allow the current bot to move
+                    else:
+                        bot.is_paused = True
+                        other_bot.is_paused = False
+
+                if not is_collision:
+                    collision_positions.discard(next_position)  # Clear position if no more collision
+                    painted[next_position] = "blue" if bot.name == "Bot 1" else "purple"  # Animate bot
+                    bot_indexes[bot.name] += 1
+
+                # Allow bots to continue moving even after a collision
+                if is_collision:
+                    bot_indexes[bot.name] += 1  # Move to the next position regardless of collision
+                occupancy.move(bot, next_position)
+
+        # Check if bots reached their destination
+        for bot in bots:
+            if bot_indexes[bot.name] == len(bot.path) and not bot.reached:
+                bot.reached = True
+                painted[bot.dest] = "green"  # Destination reached
+                print(f"{bot.name} reached its destination!")
+
+        return 0.5 + 1.0 * collisions  # Control animation speed, pausing a second per collision
+
+    worker = SimulationWorker(step_bots, lambda: tuple(painted.items()))
+    # Runs on the Tk thread: draw the newest frame, skip any older ones
+    def draw_latest():
+        running = worker.running()
+        frame = worker.latest()
+        if frame is not None:
+            renderer.paint(dict(frame))  # Only cells whose colour changed are touched
+        if running:
+            root.after(50, draw_latest)
+
+    def start_animation():
+        worker.start()
+        draw_latest()
+
+    def on_close():
+        worker.stop()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     # Start the animation
-    root.after(1000, lambda: animate_bots(bots))
+    root.after(1000, start_animation)
 
     root.mainloop()
 
@@ -0,0 +1,105 @@
+"""Which bot stands on which cell, kept up to date as bots move.
+
+Checking a move against the fleet used to scan every other bot, so a tick
+cost O(N^2) in fleet size.  OccupancyGrid keeps a flat array with the slot
+of the bot on every cell (-1 when empty), which answers "is this cell
+taken" and "would these two bots swap cells" in O(1).  ``conflicts`` checks
+the proposed moves of the whole fleet for a tick in one NumPy pass.
+
+The learning bots call ``track`` lazily on their first move, so every bot
+of a fleet shares one index through ``bot.occupancy``.
+"""
+import numpy as np
+
+EMPTY = -1
+
+
+class OccupancyGrid:
+    def __init__(self, grid, bots=()):
+        self.grid = grid
+        self.owner = np.full(grid.size, EMPTY, dtype=np.int32)  # Cell -> slot of the bot on it
+        self.bots = []  # Slot -> bot
+        self.positions = np.zeros(0, dtype=np.int32)  # Slot -> flat index of its cell
+        self._slots = {}  # id(bot) -> slot
+        for bot in bots:
+            self.add(bot)
+
+    def add(self, bot, pos=None):
+        pos = bot.pos if pos is None else pos
+        slot = len(self.bots)
+        self.bots.append(bot)
+        self._slots[id(bot)] = slot
+        cell = self.grid.index(pos)
+        self.positions = np.append(self.positions, np.int32(cell))
+        self.owner[cell] = slot
+        return slot
+
+    def slot(self, bot):
+        return self._slots[id(bot)]
+
+    def occupant(self, pos):
+        """The bot on pos, or None."""
+        if not self.grid.in_bounds(pos):
+            return None
+        slot = self.owner[self.grid.index(pos)]
+        return self.bots[slot] if slot != EMPTY else None
+
+    def is_taken(self, pos, ignore=None):
+        """True if a bot other than ignore stands on pos."""
+        occupant = self.occupant(pos)
+        return occupant is not None and occupant is not ignore
+
+    def would_swap(self, bot, new_pos, other_new_pos):
+        """True if bot moving to new_pos and whoever is on new_pos moving to
+        other_new_pos would pass through each other."""
+        other = self.occupant(new_pos)
+        return other is not None and other is not bot and tuple(other_new_pos) == tuple(bot.pos)
+
+    def move(self, bot, new_pos, old_pos=None):
+        """Record that bot now stands on new_pos."""
+        slot = self._slots[id(bot)]
+        old_cell = self.positions[slot] if old_pos is None else self.grid.index(old_pos)
+        if self.owner[old_cell] == slot:
+            self.owner[old_cell] = EMPTY
+        cell = self.grid.index(new_pos)
+        self.owner[cell] = slot
+        self.positions[slot] = cell
+
+    def conflicts(self, targets):
+        """Partner slot per bot for this tick's proposed moves, or -1.
+
+        targets[slot] is the flat index each bot wants to stand on next, or
+        -1 for bots that are not moving this tick.  A bot conflicts when
+        another bot targets the same cell (vertex conflict) or when the two
+        would swap cells (edge conflict).
+        """
+        targets = np.asarray(targets, dtype=np.int32)
+        slots = np.arange(len(targets), dtype=np.int32)
+        active = targets != EMPTY
+        partner = np.full(len(targets), EMPTY, dtype=np.int32)
+
+        # Vertex conflicts: neighbours with the same target after sorting
+        order = slots[active][np.argsort(targets[active], kind='stable')]
+        ordered = targets[order]
+        same_prev = np.zeros(len(order), dtype=bool)
+        same_prev[1:] = ordered[1:] == ordered[:-1]
+        same_next = np.zeros(len(order), dtype=bool)
+        same_next[:-1] = ordered[:-1] == ordered[1:]
+        partner[order[same_prev]] = order[np.flatnonzero(same_prev) - 1]
+        partner[order[same_next]] = order[np.flatnonzero(same_next) + 1]
+
+        # Edge conflicts: the bot on my target wants my cell
+        other = np.full(len(targets), EMPTY, dtype=np.int32)
+        other[active] = self.owner[targets[active]]
+        swaps = (other != EMPTY) & (other != slots) & (partner == EMPTY)
+        swaps[swaps] = targets[other[swaps]] == self.positions[swaps]
+        partner[swaps] = other[swaps]
+        return partner
+
+
+def track(grid, bots):
+    """Index a fleet's cells and share the index with every bot in it."""
+    occupancy = OccupancyGrid(grid, bots)
+    for bot in bots:
+        bot.occupancy = occupancy
+    return occupancy
@@ -0,0 +1,87 @@
+"""Train and simulate every loaded grid at once, one worker process per grid.
+
+The GUI loads several grids but animates one.  ParallelTrainer hands each
+grid to its own process (headless training from training.py plus a greedy
+rollout) and the GUI collects finished grids with ``poll()`` from a
+``root.after`` callback, so the window stays responsive while all cores
+work.  Grids travel to the workers by pickle; WarehouseGrid leaves its
+listeners behind.  Workers are spawned rather than forked: the GUI process
+has Tk and the event log's sink thread running, neither of which survives
+a fork.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+
+from training import train_q_learning
+
+
+class GridRun:
+    """What a worker sends back for one grid."""
+
+    def __init__(self, index, result):
+        self.index = index
+        self.policy = result.policy
+        self.converged = result.converged
+        self.greedy_paths = result.greedy_paths
+        self.makespan = max((len(steps) for steps in result.greedy_paths.values()), default=0)
+        self.total_moves = sum(len(steps) for steps in result.greedy_paths.values())
+        self.train_time = result.train_time
+        self.summary = result.summary()
+
+
+def run_grid(index, grid, bot_positions, actions, training_options):
+    # Runs in a worker process; everything here must be picklable
+    bot_starts = {name: pos for name, pos in bot_positions.items() if not name.endswith("_dest")}
+    bot_destinations = {name: bot_positions.get(name + "_dest") for name in bot_starts}
+    result = train_q_learning(grid, bot_starts, bot_destinations, actions, **training_options)
+    return GridRun(index, result)
+
+
+class ParallelTrainer:
+    def __init__(self, grids, bot_positions_list, actions, max_workers=None, **training_options):
+        self.grids = grids
+        self.bot_positions_list = bot_positions_list
+        self.actions = actions
+        self.max_workers = max_workers or min(len(grids), os.cpu_count() or 1)
+        self.training_options = training_options
+        self._executor = None
+        self._pending = []  # (grid index, future)
+        self.failed = {}  # Grid index -> exception raised by its worker
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self._pending = [
+            (index, self._executor.submit(run_grid, index, grid, positions, self.actions, self.training_options))
+            for index, (grid, positions) in enumerate(zip(self.grids, self.bot_positions_list))
+        ]
+
+    def poll(self):
+        """GridRuns finished since the last call; never blocks.
+
+        Grids whose worker raised are left out of the result and recorded in
+        ``failed`` instead.
+        """
+        # One snapshot, so a future finishing meanwhile is not lost between two checks
+        done = [future.done() for _, future in self._pending]
+        finished = [item for item, is_done in zip(self._pending, done) if is_done]
+        self._pending = [item for item, is_done in zip(self._pending, done) if not is_done]
+        runs = []
+        for index, future in finished:
+            try:
+                runs.append(future.result())
+            except Exception as error:
+                self.failed[index] = error
+        if not self._pending:
+            self.shutdown()
+        return runs
+
+    def done(self):
+        return not self._pending
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pending = []
@@ -0,0 +1,97 @@
+from priority_queue import IndexedPriorityQueue
+from warehouse_grid import WarehouseGrid
+
+# Movement Commands for Bots
+def forward(r, c, direction):
+    if direction == 'up':
+        return r - 1, c
+    elif direction == 'down':
+        return r + 1, c
+    elif direction == 'left':
+        return r, c - 1
+    else:  # right
+        return r, c + 1
+
+def reverse(r, c, direction):
+    if direction == 'up':
+        return r + 1, c
+    elif direction == 'down':
+        return r - 1, c
+    elif direction == 'left':
+        return r, c + 1
+    else:  # right
+        return r, c - 1
+
+def turn_left(direction):
+    directions = ['up', 'left', 'down', 'right']
+    return directions[(directions.index(direction) + 1) % 4]
+
+def turn_right(direction):
+    directions = ['up', 'right', 'down', 'left']
+    return directions[(directions.index(direction) - 1) % 4]
+
+# A* Algorithm to Find the Shortest Path
+def heuristic(a, b):
+    # Manhattan distance as the heuristic function
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+def a_star(grid, start, end, stats=None):
+    grid = WarehouseGrid.coerce(grid)
+    if not grid.in_bounds(start):
+        return None
+    cols, neighbors = grid.cols, grid.neighbors
+    start_idx, end_idx = grid.index(start), grid.index(end)
+    end_r, end_c = end
+    open_set = IndexedPriorityQueue()
+    open_set.push(start_idx, (heuristic(start, end), start_idx))
+    came_from = {}
+    g_score = {start_idx: 0}
+    expanded = 0
+
+    while open_set:
+        current, _ = open_set.pop()
+        expanded += 1
+
+        if current == end_idx:
+            if stats is not None:
+                stats['expanded'] = expanded
+            return [grid.position(i) for i in reconstruct_path(came_from, current, start_idx)]
+
+        tentative_g_score = g_score[current] + 1
+        for neighbor in neighbors[current].tolist():
+            # -1 marks a move off the grid or into an obstacle
+            if neighbor >= 0 and tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                nr, nc = divmod(neighbor, cols)
+                # Decrease-key if already queued, insert otherwise
+                open_set.push(neighbor, (tentative_g_score + abs(nr - end_r) + abs(nc - end_c), neighbor))
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return None  # No path found
+
+# Reconstruct the Path from A* Algorithm
+def reconstruct_path(came_from, current, start):
+    steps = []
+    while current != start:
+        steps.append(current)
+        current = came_from[current]
+    steps.reverse()
+    return steps
+
+# Function to log the movement command based on the direction change
+def get_command(prev_pos, curr_pos):
+    prev_r, prev_c = prev_pos
+    curr_r, curr_c = curr_pos
+
+    if curr_r < prev_r:
+        return "Forward (up)"
+    elif curr_r > prev_r:
+        return "Forward (down)"
+    elif curr_c < prev_c:
+        return "Forward (left)"
+    elif curr_c > prev_c:
+        return "Forward (right)"
+    else:
+        return "Wait"
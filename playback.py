@@ -0,0 +1,69 @@
+"""Tk controls for playing back a recorded Timeline.
+
+Play/pause, a speed menu and a seek slider.  The controls poll a
+PlaybackClock every frame_interval ms and call ``draw(step)`` only when the
+due step changed; at high speeds the steps in between are simply skipped.
+``draw`` may return a line of text (e.g. the step's events) to show next to
+the step counter.
+"""
+import tkinter as tk
+
+from timeline import PlaybackClock
+
+SPEEDS = (0.5, 1, 2, 4, 16, 64, 256)
+
+
+class PlaybackControls:
+    def __init__(self, parent, timeline, draw, steps_per_second=2.0, frame_interval=30):
+        self.timeline = timeline
+        self.draw = draw
+        self.frame_interval = frame_interval
+        self.clock = PlaybackClock(len(timeline), steps_per_second)
+        self.drawn_step = None
+        self._after_id = None
+
+        self.frame = tk.Frame(parent)
+        self.play_button = tk.Button(self.frame, text="Play", width=6, command=self.toggle)
+        self.play_button.pack(side=tk.LEFT)
+        self.speed_var = tk.StringVar(value="1x")
+        speed_menu = tk.OptionMenu(self.frame, self.speed_var, *[f"{speed:g}x" for speed in SPEEDS],
+                                   command=self._on_speed)
+        speed_menu.pack(side=tk.LEFT)
+        self.slider = tk.Scale(self.frame, from_=0, to=len(timeline) - 1, orient=tk.HORIZONTAL, length=300,
+                               showvalue=False, command=self._on_seek)
+        self.slider.pack(side=tk.LEFT)
+        self.step_label = tk.Label(self.frame, text="", anchor="w", width=40)
+        self.step_label.pack(side=tk.LEFT)
+        self._poll()
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def toggle(self):
+        if self.clock.playing:
+            self.clock.pause()
+        else:
+            self.clock.play()
+
+    def _on_speed(self, value):
+        self.clock.set_speed(float(value.rstrip("x")))
+
+    def _on_seek(self, value):
+        if int(value) != self.drawn_step:  # Not just our own slider.set() echoing back
+            self.clock.seek(int(value))
+
+    def _poll(self):
+        step = self.clock.step()
+        if step != self.drawn_step:
+            text = self.draw(step)
+            self.drawn_step = step
+            self.slider.set(step)
+            self.step_label.config(text=f"Step {step} / {len(self.timeline) - 1}  {text or ''}")
+        self.play_button.config(text="Pause" if self.clock.playing else "Play")
+        self._after_id = self.frame.after(self.frame_interval, self._poll)
+
+    def destroy(self):
+        if self._after_id is not None:
+            self.frame.after_cancel(self._after_id)
+            self._after_id = None
+        self.frame.destroy()
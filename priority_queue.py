@@ -0,0 +1,113 @@
+"""Indexed binary heap with decrease-key for the grid planners.
+
+``heapq`` cannot tell whether an item is already queued or lower its
+priority, so the planners either scanned the whole heap or pushed duplicate
+entries.  This heap keeps a position map next to the array, which makes
+membership tests O(1) and priority updates O(log n).
+"""
+
+
+class IndexedPriorityQueue:
+    def __init__(self):
+        self._heap = []  # Items ordered as a binary min-heap
+        self._priority = {}  # Item -> current priority
+        self._position = {}  # Item -> index in self._heap
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def __contains__(self, item):
+        return item in self._position
+
+    def priority(self, item):
+        return self._priority[item]
+
+    def push(self, item, priority):
+        """Insert item, or move it to a new priority if it is already queued."""
+        if item in self._position:
+            old_priority = self._priority[item]
+            self._priority[item] = priority
+            if priority < old_priority:
+                self._sift_up(self._position[item])
+            else:
+                self._sift_down(self._position[item])
+            return
+        self._priority[item] = priority
+        self._position[item] = len(self._heap)
+        self._heap.append(item)
+        self._sift_up(len(self._heap) - 1)
+
+    def decrease_key(self, item, priority):
+        """Lower the priority of a queued item; higher priorities are ignored."""
+        if priority < self._priority[item]:
+            self._priority[item] = priority
+            self._sift_up(self._position[item])
+
+    def peek(self):
+        item = self._heap[0]
+        return item, self._priority[item]
+
+    def pop(self):
+        """Remove and return the (item, priority) pair with the lowest priority."""
+        heap = self._heap
+        item = heap[0]
+        last = heap.pop()
+        if heap:
+            heap[0] = last
+            self._position[last] = 0
+            self._sift_down(0)
+        del self._position[item]
+        return item, self._priority.pop(item)
+
+    def remove(self, item):
+        """Drop item from the queue wherever it sits."""
+        heap = self._heap
+        index = self._position.pop(item)
+        del self._priority[item]
+        last = heap.pop()
+        if index < len(heap):
+            heap[index] = last
+            self._position[last] = index
+            self._sift_up(index)
+            self._sift_down(self._position[last])
+
+    def _sift_up(self, index):
+        heap, priority, position = self._heap, self._priority, self._position
+        item = heap[index]
+        item_priority = priority[item]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = heap[parent_index]
+            if item_priority < priority[parent]:
+                heap[index] = parent
+                position[parent] = index
+                index = parent_index
+            else:
+                break
+        heap[index] = item
+        position[item] = index
+
+    def _sift_down(self, index):
+        heap, priority, position = self._heap, self._priority, self._position
+        size = len(heap)
+        item = heap[index]
+        item_priority = priority[item]
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= size:
+                break
+            right_index = child_index + 1
+            if right_index < size and priority[heap[right_index]] < priority[heap[child_index]]:
+                child_index = right_index
+            child = heap[child_index]
+            if priority[child] < item_priority:
+                heap[index] = child
+                position[child] = index
+                index = child_index
+            else:
+                break
+        heap[index] = item
+        position[item] = index
@@ -0,0 +1,127 @@
+"""On-disk Q-tables, so bots on a known layout start from what was learned.
+
+A table is keyed by the grid layout (WarehouseGrid.fingerprint), the bot's
+destination and the action set, since final.py and usingrl.py number their
+actions differently.  Tables are plain ``.npy`` files loaded with
+``mmap_mode='c'``: any number of processes map the same pages, and a bot's
+updates stay private to it (copy-on-write) until it is saved again.
+
+A Q-table is one float32 row of action values per cell, a
+(rows, cols, n_actions) array of rows * cols * n_actions * 4 bytes.  Bots on
+the same grid share their knowledge through SharedQTable: one table per
+destination rather than per bot, which all bots heading there read and
+update in place.
+"""
+import hashlib
+import os
+import tempfile
+import weakref
+
+import numpy as np
+
+# A new destination copies the table of an existing one at most this far away
+NEARBY_RADIUS = 3
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "qtables")
+
+
+def _actions_key(actions):
+    text = ",".join(f"{action}:{dr}:{dc}" for action, (dr, dc) in sorted(actions.items()))
+    return hashlib.sha1(text.encode()).hexdigest()[:8]
+
+
+class QTableStore:
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+
+    def path(self, grid, dest, actions):
+        return os.path.join(self.directory,
+                            f"{grid.fingerprint()}-{dest[0]}_{dest[1]}-{_actions_key(actions)}.npy")
+
+    def load(self, grid, dest, actions):
+        """Copy-on-write view of the stored table, or None if there is none."""
+        path = self.path(grid, dest, actions)
+        if not os.path.exists(path):
+            return None
+        table = np.load(path, mmap_mode='c')
+        if table.shape != (grid.rows, grid.cols, len(actions)) or table.dtype != np.float32:
+            return None  # Written by an incompatible version; relearn
+        return table
+
+    def save(self, grid, dest, actions, q_table):
+        # Write to a temporary file and rename it into place, so readers
+        # never map a half-written table
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as file:
+            np.save(file, np.asarray(q_table, dtype=np.float32))
+        os.replace(tmp_path, self.path(grid, dest, actions))
+
+
+_default_store = QTableStore()
+
+
+def use_directory(directory):
+    """Point the default store somewhere else, e.g. a scratch directory for experiments."""
+    _default_store.directory = directory
+
+
+def save_q_table(grid, dest, actions, q_table, store=None):
+    (store or _default_store).save(grid, dest, actions, q_table)
+
+
+class SharedQTable:
+    """Goal-conditioned Q-values for one grid, indexed by (state, destination).
+
+    Bots with the same destination get the very same array, so memory grows
+    with the number of distinct destinations instead of the fleet size.  A
+    destination seen for the first time starts from its saved table if there
+    is one, otherwise from a copy of the nearest known destination within
+    NEARBY_RADIUS, otherwise from zeros.
+    """
+
+    def __init__(self, grid, actions, store=None):
+        # Weak, so that _shared does not keep the grid (its key) alive
+        self._grid = weakref.ref(grid)
+        self.actions = actions
+        self.store = store or _default_store
+        self.tables = {}  # destination -> (rows, cols, n_actions) float32
+
+    @property
+    def grid(self):
+        return self._grid()
+
+    def table(self, dest):
+        dest = tuple(dest)
+        table = self.tables.get(dest)
+        if table is None:
+            table = self.store.load(self.grid, dest, self.actions)
+            if table is None:
+                nearest = min(self.tables, default=None,
+                              key=lambda other: abs(other[0] - dest[0]) + abs(other[1] - dest[1]))
+                if nearest is not None and abs(nearest[0] - dest[0]) + abs(nearest[1] - dest[1]) <= NEARBY_RADIUS:
+                    table = self.tables[nearest].copy()
+                else:
+                    table = np.zeros((self.grid.rows, self.grid.cols, len(self.actions)), dtype=np.float32)
+            self.tables[dest] = table
+        return table
+
+    def __getitem__(self, key):
+        state, dest = key
+        return self.table(dest)[state]
+
+    @property
+    def nbytes(self):
+        return sum(table.nbytes for table in self.tables.values())
+
+
+# One shared table per (grid object, action set), dropped together with the grid
+_shared = weakref.WeakKeyDictionary()
+
+
+def shared_q_table(grid, actions):
+    per_grid = _shared.setdefault(grid, {})
+    key = _actions_key(actions)
+    if key not in per_grid:
+        per_grid[key] = SharedQTable(grid, actions)
+    return per_grid[key]
@@ -0,0 +1,67 @@
+"""Fixed-capacity experience replay with prioritized sampling.
+
+Transitions live in preallocated NumPy arrays used as a ring buffer, so
+memory is fixed up front and adding is O(1).  Sampling picks transitions
+with probability proportional to ``priority ** alpha``, where the priority
+is the last absolute TD error seen for that transition, and returns
+importance-sampling weights that correct for the skew.
+
+Schaul et al., "Prioritized Experience Replay", ICLR 2016 (proportional variant).
+"""
+import numpy as np
+
+
+class ReplayBuffer:
+    def __init__(self, capacity=10000, alpha=0.6, beta=0.4, epsilon=1e-3, seed=None):
+        self.capacity = capacity
+        self.alpha = alpha  # 0 samples uniformly, 1 fully by priority
+        self.beta = beta  # Strength of the importance-sampling correction
+        self.epsilon = epsilon  # Keeps zero-error transitions sampleable
+        self.states = np.zeros((capacity, 2), dtype=np.int32)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, 2), dtype=np.int32)
+        self.priorities = np.zeros(capacity, dtype=np.float64)
+        self.next_index = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, td_error=None):
+        """Store a transition, overwriting the oldest once full.
+
+        Without a TD error the transition gets the highest priority so far,
+        so it is replayed at least once soon.
+        """
+        i = self.next_index
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        if td_error is None:
+            self.priorities[i] = self.priorities[:self.size].max(initial=1.0)
+        else:
+            self.priorities[i] = abs(td_error) + self.epsilon
+        self.next_index = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        """Draw batch_size transitions (with replacement).
+
+        Returns (indices, states, actions, rewards, next_states, weights), or
+        None while the buffer is empty.
+        """
+        if self.size == 0:
+            return None
+        scaled = self.priorities[:self.size] ** self.alpha
+        probabilities = scaled / scaled.sum()
+        indices = self.rng.choice(self.size, size=batch_size, p=probabilities)
+        weights = (self.size * probabilities[indices]) ** -self.beta
+        weights /= weights.max()
+        return (indices, self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], weights.astype(np.float32))
+
+    def update_priorities(self, indices, td_errors):
+        self.priorities[indices] = np.abs(td_errors) + self.epsilon
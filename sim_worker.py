@@ -0,0 +1,67 @@
+"""Run a simulation on a worker thread and hand frames to the Tk thread.
+
+The Tk front-ends used to step their bots inside Tk callbacks, some with
+``time.sleep`` in between, which froze the window for as long as the run
+lasted.  SimulationWorker steps the simulation on its own thread and after
+every tick publishes an immutable snapshot into a bounded deque.  The GUI
+polls ``latest()`` from a ``root.after`` callback and draws only the newest
+frame; frames it was too slow to draw are dropped, so drawing never holds
+up the simulation and the simulation never blocks input.
+
+``deque.append`` and ``deque.popleft`` are atomic, so the queue needs no
+lock.  Only the worker may touch the bots; the Tk thread reads frames only.
+"""
+from collections import deque
+import threading
+
+
+class SimulationWorker:
+    def __init__(self, step, snapshot, max_frames=8, name="simulation"):
+        # step() advances one tick and returns the seconds to wait before
+        # the next one, or None once the run is over.  snapshot() returns
+        # an immutable picture of the state after the tick.
+        self.step = step
+        self.snapshot = snapshot
+        self.frames = deque(maxlen=max_frames)  # Oldest frames fall off when the GUI lags
+        self.ticks = 0
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self.frames.append(self.snapshot())  # Initial state, before the first tick
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                delay = self.step()
+                self.ticks += 1
+                self.frames.append(self.snapshot())
+                if delay is None:
+                    break
+                self._stop.wait(delay)
+        except Exception as error:  # Surfaced to the GUI by latest()
+            self.error = error
+
+    def latest(self):
+        """Newest unread frame, or None; older unread frames are discarded."""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        frame = None
+        while True:
+            try:
+                frame = self.frames.popleft()
+            except IndexError:
+                return frame
+
+    def running(self):
+        return self._thread.is_alive()
+
+    def stop(self, timeout=1.0):
+        """Ask the worker to finish its current tick and exit."""
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
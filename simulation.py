@@ -0,0 +1,224 @@
+"""Headless simulation engine for the warehouse bots.
+
+The Tk front-ends used to own the clock (``root.after``, ``root.update()``
+and ``time.sleep``).  The engine here runs the same planning and collision
+handling without any GUI, as fast as the CPU allows.  A GUI can still follow
+a run by passing an observer; every observer hook is optional.
+"""
+from pathfinding import a_star, get_command, reverse
+
+
+class SimulationResult:
+    """Outcome of one simulated run."""
+
+    def __init__(self, bot_ids):
+        self.makespan = 0  # Number of ticks until the run finished
+        self.command_count = {bot_id: 0 for bot_id in bot_ids}
+        self.time_taken = {bot_id: 0 for bot_id in bot_ids}
+        self.total_commands = 0
+        self.impossible = False
+        self.log = []
+
+    @property
+    def avg_commands(self):
+        num_bots = len(self.command_count)
+        return self.total_commands / num_bots if num_bots > 0 else 0
+
+    @property
+    def max_commands(self):
+        return max(self.command_count.values(), default=0)
+
+
+def _notify(observer, hook, *args):
+    # Observers only implement the hooks they care about
+    if observer is not None:
+        callback = getattr(observer, hook, None)
+        if callback is not None:
+            callback(*args)
+
+
+def _log(result, observer, message, event=None, bot_id=None, pos=None, command=None):
+    # Observers with on_event get per-bot messages as structured events and
+    # can format them later; the others get the text through on_log
+    result.log.append(message)
+    if event is not None and getattr(observer, 'on_event', None) is not None:
+        observer.on_event(bot_id, event, pos, command)
+    else:
+        _notify(observer, 'on_log', message)
+
+
+def plan_paths(grid, bot_starts, bot_destinations, planner=a_star, observer=None, log=None):
+    """Plan an initial path for every bot that has a destination.
+
+    Returns a dict mapping bot id to its list of steps.  Bots without a path
+    are left out, exactly as the GUI does.
+    """
+    bot_paths = {}
+    for bot_id, start in bot_starts.items():
+        end = bot_destinations.get(bot_id)
+        if end:
+            path = planner(grid, start, end)
+            if path:
+                bot_paths[bot_id] = path
+                message = f"{bot_id} path calculated."
+            else:
+                message = f"Path not found for {bot_id}"
+            if log is not None:
+                log.append(message)
+            _notify(observer, 'on_log', message)
+    return bot_paths
+
+
+def plan_fleet(grid, bot_starts, bot_destinations, fleet_planner, observer=None, log=None):
+    """Plan all bots together with a multi-bot planner such as plan_prioritized.
+
+    fleet_planner(grid, bot_starts, bot_destinations) returns {bot_id: steps}.
+    """
+    bot_paths = fleet_planner(grid, bot_starts, bot_destinations)
+    for bot_id in bot_starts:
+        if not bot_destinations.get(bot_id):
+            continue
+        if bot_paths.get(bot_id):
+            message = f"{bot_id} path calculated."
+        else:
+            message = f"Path not found for {bot_id}"
+        if log is not None:
+            log.append(message)
+        _notify(observer, 'on_log', message)
+    return bot_paths
+
+
+def run_schedule(grid, bot_paths, bot_destinations, planner=a_star, observer=None):
+    """Step precomputed paths in lockstep, resolving collisions on the way.
+
+    This is the collision handling of ``schedule_bots`` in last.py: on a
+    clash a bot either waits a step or backs off and replans.  Observers may
+    implement ``on_log(message)``, ``on_move(bot_id, pos)`` and
+    ``on_step(step_idx)``.  With ``on_event(bot_id, event, pos, command)``
+    the per-bot messages arrive as events instead ('moving', 'moved',
+    'waiting', 'reversing', 'replanned', 'impossible').
+    """
+    result = SimulationResult(bot_paths.keys())
+    max_steps = max((len(steps) for steps in bot_paths.values()), default=0)
+
+    for step_idx in range(max_steps):
+        next_positions = {}
+        for bot_id, path in bot_paths.items():
+            if step_idx < len(path):
+                r, c = path[step_idx]
+
+                # Determine the previous position (for command logging)
+                if step_idx > 0:
+                    command = get_command(path[step_idx - 1], (r, c))
+                else:
+                    command = "Starting Position"
+
+                _log(result, observer, f"{bot_id} moving to ({r}, {c}) - Command: {command}",
+                     'moving', bot_id, (r, c), command)
+
+                if (r, c) in next_positions:
+                    # Collision detected, choose one bot to wait or reverse
+                    if result.command_count[bot_id] % 2 == 0:
+                        _log(result, observer, f"{bot_id} is waiting to avoid collision at ({r}, {c}).",
+                             'waiting', bot_id, (r, c))
+                        bot_paths[bot_id].insert(step_idx, path[step_idx - 1])  # Bot waits
+                    else:
+                        # Reverse and recalculate the path
+                        _log(result, observer, f"{bot_id} is reversing and recalculating path from ({r}, {c}).",
+                             'reversing', bot_id, (r, c))
+                        r, c = reverse(r, c, 'up')
+                        new_path = planner(grid, (r, c), bot_destinations[bot_id])
+                        if new_path:
+                            bot_paths[bot_id] = new_path
+                            _log(result, observer, f"{bot_id} found new path starting from ({r}, {c}).",
+                                 'replanned', bot_id, (r, c))
+                        else:
+                            _log(result, observer, f"{bot_id} has encountered an impossible scenario at ({r}, {c}).",
+                                 'impossible', bot_id, (r, c))
+                            result.impossible = True
+                            break  # Exit as soon as impossible scenario is detected
+                else:
+                    next_positions[(r, c)] = bot_id
+                    result.command_count[bot_id] += 1
+                    result.time_taken[bot_id] += 1
+                    result.total_commands += 1
+                    _notify(observer, 'on_move', bot_id, (r, c))
+                    _log(result, observer, f"{bot_id} successfully moved to ({r}, {c}).", 'moved', bot_id, (r, c))
+
+        result.makespan = step_idx + 1
+        _notify(observer, 'on_step', step_idx)
+
+        # Stop if an impossible case is detected
+        if result.impossible:
+            break
+
+    # Summary for each bot and the whole fleet
+    for bot_id in bot_paths.keys():
+        _log(result, observer, f"{bot_id} reached destination in {result.command_count[bot_id]} steps "
+                               f"and took {result.time_taken[bot_id]} seconds.")
+    _log(result, observer, f"\nAverage commands: {result.avg_commands:.2f}")
+    _log(result, observer, f"Maximum commands: {result.max_commands}")
+    if result.impossible:
+        _log(result, observer, f"Impossible scenario detected after {result.total_commands} commands.")
+
+    return result
+
+
+def simulate(grid, bot_starts, bot_destinations, planner=a_star, observer=None, fleet_planner=None):
+    """Plan and run a full shift headlessly and return a SimulationResult.
+
+    With a fleet_planner the initial paths come from it instead of planning
+    each bot on its own with planner; planner is still used for replans.
+    """
+    log = []
+    if fleet_planner is not None:
+        bot_paths = plan_fleet(grid, bot_starts, bot_destinations, fleet_planner, observer, log)
+    else:
+        bot_paths = plan_paths(grid, bot_starts, bot_destinations, planner, observer, log)
+    result = run_schedule(grid, bot_paths, bot_destinations, planner, observer)
+    result.log[:0] = log
+    return result
+
+
+class BotSimulation:
+    """Ticks a fleet of learning bots (final.py, usingrl.py) without a GUI.
+
+    Each bot must provide ``move(bots, collision_cells)``, ``pos``, ``dest``
+    and ``steps``.  Observers may implement ``on_tick(tick, bots,
+    collision_cells)``.
+    """
+
+    def __init__(self, bots, observer=None):
+        self.bots = bots
+        self.observer = observer
+        self.tick = 0
+
+    def done(self):
+        return all(bot.pos == bot.dest for bot in self.bots)
+
+    def step(self):
+        collision_cells = set()
+        for bot in self.bots:
+            bot.move(self.bots, collision_cells)
+        self.tick += 1
+        _notify(self.observer, 'on_tick', self.tick, self.bots, collision_cells)
+        return collision_cells
+
+    def run(self, max_ticks=10000):
+        """Step until every bot is at its destination or max_ticks elapse."""
+        while self.tick < max_ticks and not self.done():
+            self.step()
+        return self.result()
+
+    def result(self):
+        bot_ids = [bot.name for bot in self.bots]
+        result = SimulationResult(bot_ids)
+        result.makespan = self.tick
+        for bot in self.bots:
+            count = getattr(bot, 'command_count', bot.steps)
+            result.command_count[bot.name] = count
+            result.time_taken[bot.name] = bot.steps
+            result.total_commands += count
+            result.log.extend(getattr(bot, 'command_log', []))
+        result.impossible = not self.done()
+        return result
@@ -0,0 +1,198 @@
+"""Space-time A* with a reservation table for collision-free scheduling.
+
+Bots are planned one after another over (row, col, t).  Every planned path is
+written into a reservation table of vertex occupations (cell, t) and edge
+traversals (cell -> cell, t).  Later bots route around those reservations, so
+the resulting paths never collide and need no waiting or reversing at run
+time.  Paths use the a_star step format; a wait shows up as a repeated cell.
+"""
+from distance_cache import UNREACHABLE, get_cache
+from priority_queue import IndexedPriorityQueue
+from warehouse_grid import WarehouseGrid
+
+
+class ReservationTable:
+    def __init__(self):
+        self.vertices = {}  # (cell, t) -> bot id
+        self.edges = {}  # (from_cell, to_cell, t) -> bot id, move from t to t + 1
+        self.parked = {}  # cell -> (t, bot id); the bot stays there from t on
+        self.horizon = 0  # Last time step with a reservation
+        self._cell_times = {}  # cell -> {t: bot id}, for last_reserved
+
+    def reserve_vertex(self, cell, t, bot_id):
+        self.vertices[(cell, t)] = bot_id
+        self._cell_times.setdefault(cell, {})[t] = bot_id
+        self.horizon = max(self.horizon, t)
+
+    def reserve_edge(self, from_cell, to_cell, t, bot_id):
+        self.edges[(from_cell, to_cell, t)] = bot_id
+        self.horizon = max(self.horizon, t + 1)
+
+    def reserve_path(self, bot_id, start, steps):
+        """Reserve start at t=0, steps[t - 1] at t, then park on the last cell."""
+        positions = [tuple(start)] + [tuple(step) for step in steps]
+        for t, cell in enumerate(positions):
+            self.reserve_vertex(cell, t, bot_id)
+            if t > 0 and positions[t - 1] != cell:
+                self.reserve_edge(positions[t - 1], cell, t - 1, bot_id)
+        self.park(positions[-1], len(positions) - 1, bot_id)
+
+    def park(self, cell, t, bot_id):
+        """bot_id stays on cell from t on, for good."""
+        self.parked[tuple(cell)] = (t, bot_id)
+
+    def is_reserved(self, cell, t, bot_id=None):
+        owner = self.vertices.get((cell, t))
+        if owner is not None and owner != bot_id:
+            return True
+        parked = self.parked.get(cell)
+        return parked is not None and parked[1] != bot_id and t >= parked[0]
+
+    def move_allowed(self, from_cell, to_cell, t, bot_id=None):
+        """Whether a bot may move from_cell -> to_cell between t and t + 1."""
+        if self.is_reserved(to_cell, t + 1, bot_id):
+            return False
+        # Two bots swapping cells would pass through each other
+        owner = self.edges.get((to_cell, from_cell, t))
+        return owner is None or owner == bot_id
+
+    def last_reserved(self, cell, bot_id=None):
+        """Latest t at which someone other than bot_id occupies cell, or -1."""
+        times = self._cell_times.get(cell, {})
+        return max((t for t, owner in times.items() if owner != bot_id), default=-1)
+
+
+def space_time_a_star(grid, start, goal, reservations, bot_id=None, stats=None):
+    """Shortest conflict-free path from start to goal, or None.
+
+    The goal only counts once no other bot needs the cell later on, so the
+    bot can stay there for good.  Heuristic is the exact static distance
+    from the shared distance-field cache.
+    """
+    grid = WarehouseGrid.coerce(grid)
+    start, goal = tuple(start), tuple(goal)
+    if not grid.in_bounds(start) or not grid.is_free(goal):
+        return None
+    parked = reservations.parked.get(goal)
+    if parked is not None and parked[1] != bot_id:
+        return None  # Another bot ends its route on this cell for good
+    field = get_cache(grid).distance_field(goal)
+    start_idx, goal_idx = grid.index(start), grid.index(goal)
+    # Obstacle starts have no distance of their own; use the best neighbour
+    start_h = field[start_idx] if field[start_idx] != UNREACHABLE else min(
+        (field[n] + 1 for n in grid.neighbors[start_idx].tolist() if n >= 0 and field[n] != UNREACHABLE),
+        default=UNREACHABLE)
+    if start_h == UNREACHABLE:
+        return None
+    goal_free_after = reservations.last_reserved(goal, bot_id)
+    # Past the horizon nothing changes any more, so all later time steps
+    # collapse into one layer and the search space stays finite
+    static_after = reservations.horizon + 1
+
+    start_state = (start_idx, 0)
+    open_set = IndexedPriorityQueue()
+    open_set.push(start_state, (int(start_h), 0, start_idx))
+    came_from = {}
+    g_score = {start_state: 0}
+    closed = set()
+    expanded = 0
+
+    while open_set:
+        state, _ = open_set.pop()
+        closed.add(state)
+        current, t = state[0], g_score[state]
+        expanded += 1
+
+        if current == goal_idx and t > goal_free_after:
+            if stats is not None:
+                stats['expanded'] = expanded
+            steps = []
+            while state != start_state:
+                steps.append(grid.position(state[0]))
+                state = came_from[state]
+            steps.reverse()
+            return steps
+
+        cell = grid.position(current)
+        # Waiting in place is always an option next to the four moves
+        for neighbor in [current] + grid.neighbors[current].tolist():
+            if neighbor < 0 or field[neighbor] == UNREACHABLE:
+                continue
+            next_state = (neighbor, min(t + 1, static_after))
+            if next_state in closed:
+                continue
+            if not reservations.move_allowed(cell, grid.position(neighbor), t, bot_id):
+                continue
+            if t + 1 < g_score.get(next_state, float('inf')):
+                came_from[next_state] = state
+                g_score[next_state] = t + 1
+                open_set.push(next_state, (t + 1 + int(field[neighbor]), -(t + 1), neighbor))
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return None
+
+
+def plan_prioritized(grid, bot_starts, bot_destinations, reservations=None):
+    """Plan every bot in turn against the paths of the bots before it.
+
+    Bots nearest their destination go first: they finish quickly, so the
+    longer trips wait for fewer bots in their way.  If a bot cannot be
+    placed it is moved to the front of the order and planning restarts,
+    once per bot.  Bots that still fail are left out, as plan_paths does for
+    unreachable destinations; they never leave their start cells, so the
+    others are then replanned around those cells.
+    """
+    grid = WarehouseGrid.coerce(grid)
+    cache = get_cache(grid)
+
+    def trip_length(bot_id):
+        distance = cache.distance(bot_starts[bot_id], bot_destinations[bot_id])
+        return float('inf') if distance is None else distance
+
+    order = sorted((bot_id for bot_id in bot_starts if bot_destinations.get(bot_id)), key=trip_length)
+    best_paths = {}
+
+    for _ in range(max(len(order), 1)):
+        table = ReservationTable() if reservations is None else reservations
+        bot_paths, failed = _plan_in_order(grid, order, bot_starts, bot_destinations, table)
+        if len(bot_paths) > len(best_paths):
+            best_paths = bot_paths
+        if not failed or reservations is not None or order[0] == failed[0]:
+            break
+        order.remove(failed[0])
+        order.insert(0, failed[0])
+
+    # Until no one else fails, park the bots left out on their start cells
+    # and replan the rest around them
+    stranded = set(order) - set(best_paths)
+    while stranded and reservations is None:
+        bot_paths, failed = _plan_in_order(grid, order, bot_starts, bot_destinations, ReservationTable(), stranded)
+        if not failed:
+            best_paths = bot_paths
+            break
+        stranded.update(failed)
+
+    return best_paths
+
+
+def _plan_in_order(grid, order, bot_starts, bot_destinations, table, stranded=()):
+    # Plan the bots of order in turn into table; stranded bots stay on their
+    # start cells for good.  Returns ({bot_id: steps}, [bots that failed]).
+    for bot_id in order:
+        if bot_id in stranded:
+            table.park(bot_starts[bot_id], 0, bot_id)
+        else:
+            table.reserve_vertex(tuple(bot_starts[bot_id]), 0, bot_id)  # Held until it is planned
+    bot_paths = {}
+    failed = []
+    for bot_id in order:
+        if bot_id in stranded:
+            continue
+        steps = space_time_a_star(grid, bot_starts[bot_id], bot_destinations[bot_id], table, bot_id)
+        if steps is None:
+            failed.append(bot_id)
+            continue
+        table.reserve_path(bot_id, bot_starts[bot_id], steps)
+        bot_paths[bot_id] = steps
+    return bot_paths, failed
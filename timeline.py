@@ -0,0 +1,217 @@
+"""Recorded runs as compact arrays, for playback at any speed.
+
+Watching a run live shows one tick per ``root.after`` interval, so a long
+run takes as long to review as it took to animate.  A Timeline records a
+headless run instead: bot positions as one int32 flat cell index per bot
+per tick, and events (waits, collisions, arrivals, replans) as parallel
+arrays sorted by tick with an offset table.  Any step's positions and
+events are then a slice, O(1) to seek to.
+
+PlaybackClock maps wall-clock time to a step for a given speed.  A view
+that polls it draws whatever step is due, so frames it cannot keep up with
+are skipped rather than slowing playback down.
+"""
+import time
+
+import numpy as np
+
+from pathfinding import a_star
+from simulation import BotSimulation, simulate
+
+# Event kinds
+WAIT = 0
+COLLISION = 1
+REACHED = 2
+REPLAN = 3
+IMPOSSIBLE = 4
+EVENT_NAMES = ("wait", "collision", "reached", "replan", "impossible")
+
+
+class Timeline:
+    def __init__(self, grid_shape, bot_ids, positions, event_ticks, event_bots, event_kinds):
+        self.rows, self.cols = grid_shape
+        self.bot_ids = list(bot_ids)
+        self.positions = np.asarray(positions, dtype=np.int32)  # (ticks + 1, n_bots) flat cell indices
+        order = np.argsort(event_ticks, kind='stable')
+        self.event_ticks = np.asarray(event_ticks, dtype=np.int32)[order]
+        self.event_bots = np.asarray(event_bots, dtype=np.int16)[order]
+        self.event_kinds = np.asarray(event_kinds, dtype=np.int8)[order]
+        # Events of step t are event_*[offsets[t]:offsets[t + 1]]
+        self.event_offsets = np.searchsorted(self.event_ticks, np.arange(len(self.positions) + 1)).astype(np.int32)
+        # First step each bot stands on its destination, or -1
+        self.arrivals = np.full(len(self.bot_ids), -1, dtype=np.int32)
+        reached = self.event_kinds == REACHED
+        for tick, bot in zip(self.event_ticks[reached][::-1], self.event_bots[reached][::-1]):
+            self.arrivals[bot] = tick
+
+    def __len__(self):
+        """Number of steps, including the starting positions at step 0."""
+        return len(self.positions)
+
+    @property
+    def nbytes(self):
+        return (self.positions.nbytes + self.event_ticks.nbytes + self.event_bots.nbytes
+                + self.event_kinds.nbytes + self.event_offsets.nbytes)
+
+    def clamp(self, step):
+        return min(max(int(step), 0), len(self.positions) - 1)
+
+    def cells_at(self, step):
+        """Flat cell index of every bot at step."""
+        return self.positions[self.clamp(step)]
+
+    def positions_at(self, step):
+        """{bot_id: (row, col)} at step."""
+        return {bot_id: divmod(int(cell), self.cols) for bot_id, cell in zip(self.bot_ids, self.cells_at(step))}
+
+    def events_at(self, step):
+        """[(bot_id, event name)] that happened at step."""
+        step = self.clamp(step)
+        start, end = self.event_offsets[step], self.event_offsets[step + 1]
+        return [(self.bot_ids[bot], EVENT_NAMES[kind])
+                for bot, kind in zip(self.event_bots[start:end], self.event_kinds[start:end])]
+
+    def reached_at(self, step):
+        """Boolean per bot: has it arrived by step?"""
+        return (self.arrivals >= 0) & (self.arrivals <= self.clamp(step))
+
+    def save(self, path):
+        np.savez_compressed(path, grid_shape=np.array([self.rows, self.cols]), bot_ids=np.array(self.bot_ids),
+                            positions=self.positions, event_ticks=self.event_ticks,
+                            event_bots=self.event_bots, event_kinds=self.event_kinds)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(tuple(data['grid_shape']), [str(bot_id) for bot_id in data['bot_ids']], data['positions'],
+                       data['event_ticks'], data['event_bots'], data['event_kinds'])
+
+
+class TimelineRecorder:
+    """Collects a Timeline from simulation observer hooks.
+
+    Works as the observer of BotSimulation (``on_tick``) and of
+    simulate / run_schedule (``on_move``, ``on_step``, ``on_event``).
+    """
+
+    def __init__(self, grid, bot_ids, starts, destinations):
+        self.grid = grid
+        self.bot_ids = list(bot_ids)
+        self._slots = {bot_id: i for i, bot_id in enumerate(self.bot_ids)}
+        self._current = np.array([grid.index(starts[bot_id]) for bot_id in self.bot_ids], dtype=np.int32)
+        self._destinations = np.array([grid.index(destinations[bot_id]) for bot_id in self.bot_ids], dtype=np.int32)
+        self._rows = [self._current.copy()]
+        self._moved = set()
+        self._events = ([], [], [])  # ticks, bots, kinds
+        for bot_id in self.bot_ids:
+            if self._arrived(bot_id):
+                self.add_event(bot_id, REACHED, tick=0)
+
+    def _arrived(self, bot_id):
+        slot = self._slots[bot_id]
+        return self._current[slot] == self._destinations[slot]
+
+    def add_event(self, bot_id, kind, tick=None):
+        ticks, bots, kinds = self._events
+        ticks.append(len(self._rows) if tick is None else tick)
+        bots.append(self._slots[bot_id])
+        kinds.append(kind)
+
+    def _move(self, bot_id, pos):
+        # Returns False if pos is where the bot already stands
+        slot = self._slots[bot_id]
+        cell = self.grid.index(pos)
+        if cell == self._current[slot]:
+            return False
+        self._current[slot] = cell
+        if self._arrived(bot_id):
+            self.add_event(bot_id, REACHED)
+        return True
+
+    # BotSimulation hook
+    def on_tick(self, tick, bots, collision_cells):
+        for bot in bots:
+            if not self._move(bot.name, bot.pos) and not self._arrived(bot.name):
+                self.add_event(bot.name, COLLISION if bot.pos in collision_cells else WAIT)
+        self._rows.append(self._current.copy())
+
+    # run_schedule hooks
+    def on_move(self, bot_id, pos):
+        if self._move(bot_id, pos):
+            self._moved.add(bot_id)
+
+    def on_step(self, step_idx):
+        for bot_id in self.bot_ids:
+            if bot_id not in self._moved and not self._arrived(bot_id):
+                self.add_event(bot_id, WAIT)
+        self._moved.clear()
+        self._rows.append(self._current.copy())
+
+    def on_event(self, bot_id, event, pos, command=None):
+        if bot_id in self._slots:
+            if event == 'reversing':
+                self.add_event(bot_id, REPLAN)
+            elif event == 'impossible':
+                self.add_event(bot_id, IMPOSSIBLE)
+
+    def timeline(self):
+        return Timeline((self.grid.rows, self.grid.cols), self.bot_ids, np.stack(self._rows), *self._events)
+
+
+def record_bots(bots, max_ticks=10000):
+    """Run learning bots (final.py, usingrl.py) headlessly and record them."""
+    if not bots:
+        raise ValueError("record_bots needs at least one bot")
+    recorder = TimelineRecorder(bots[0].grid, [bot.name for bot in bots], {bot.name: bot.pos for bot in bots},
+                                {bot.name: bot.dest for bot in bots})
+    BotSimulation(bots, observer=recorder).run(max_ticks)
+    return recorder.timeline()
+
+
+def record_schedule(grid, bot_starts, bot_destinations, planner=a_star, fleet_planner=None):
+    """Plan and run a shift with simulate() and record it."""
+    bot_ids = [bot_id for bot_id in bot_starts if bot_destinations.get(bot_id)]
+    recorder = TimelineRecorder(grid, bot_ids, bot_starts, bot_destinations)
+    result = simulate(grid, bot_starts, bot_destinations, planner, observer=recorder, fleet_planner=fleet_planner)
+    return recorder.timeline(), result
+
+
+class PlaybackClock:
+    """Which step of a timeline is due, from wall-clock time and speed."""
+
+    def __init__(self, length, steps_per_second=2.0, clock=time.monotonic):
+        self.length = length
+        self.steps_per_second = steps_per_second  # At speed 1
+        self.speed = 1.0
+        self.playing = False
+        self._clock = clock
+        self._anchor_step = 0.0
+        self._anchor_time = clock()
+
+    def step(self):
+        if not self.playing:
+            return int(self._anchor_step)
+        elapsed = self._clock() - self._anchor_time
+        position = self._anchor_step + elapsed * self.steps_per_second * self.speed
+        if position >= self.length - 1:
+            self.seek(self.length - 1)
+            self.playing = False  # Reached the end
+        return int(min(position, self.length - 1))
+
+    def seek(self, step):
+        self._anchor_step = float(min(max(step, 0), self.length - 1))
+        self._anchor_time = self._clock()
+
+    def set_speed(self, speed):
+        self.seek(self.step())  # Keep the current step, change the rate from here on
+        self.speed = speed
+
+    def play(self):
+        if self.step() >= self.length - 1:
+            self.seek(0)  # Start over from the end
+        self.seek(self.step())
+        self.playing = True
+
+    def pause(self):
+        self.seek(self.step())
+        self.playing = False
@@ -0,0 +1,295 @@
+"""Headless, vectorized Q-learning for the warehouse bots.
+
+The GUIs only learn when their timer fires, one move per bot every few
+hundred milliseconds.  Here many copies of the same grid and fleet
+(environments) are stepped together, and every step of every bot in every
+environment is a handful of NumPy operations.  Rewards follow
+AutobotQLearning in final.py:
+
+- reaching the destination: +100
+- a move into a wall or obstacle (get_reward's obstacle case): -100
+- a move blocked by another bot: -20
+- moving onto a cell already visited this episode: -10 (optional)
+- any other move or wait: -1 minus the Manhattan distance left
+
+A blocked bot stays where it is, and the penalty is charged to the action
+that was tried so the greedy policy learns to avoid it.  The revisit
+penalty is off by default: far from the destination it is cheaper than any
+forward move, so on larger grids the learned policy ends up pacing back and
+forth.  An environment starts a new episode once all its bots have arrived
+or ``max_steps`` ticks have passed.
+"""
+import time
+
+import numpy as np
+
+from warehouse_grid import MOVES, WarehouseGrid
+
+REACHED_REWARD = 100
+REVISIT_REWARD = -10
+OBSTACLE_REWARD = -100
+BLOCKED_REWARD = -20
+
+
+def transition_table(grid, actions):
+    """Cell reached by each action from each cell, shape (cells, n_actions); -1 where blocked."""
+    transitions = np.full((grid.size, len(actions)), -1, dtype=np.int64)
+    for action, delta in actions.items():
+        if delta == (0, 0):
+            transitions[:, action] = np.arange(grid.size)
+            transitions[grid.cells.ravel() != 0, action] = -1
+        else:
+            transitions[:, action] = grid.neighbors[:, MOVES.index(delta)]
+    return transitions
+
+
+def move_rewards(grid, destination):
+    """Reward for stepping onto each cell when heading to destination (flat index).
+
+    Revisit penalties depend on the episode and are left out.
+    """
+    r, c = np.divmod(np.arange(grid.size), grid.cols)
+    dest_r, dest_c = divmod(int(destination), grid.cols)
+    rewards = (-1 - np.abs(r - dest_r) - np.abs(c - dest_c)).astype(np.float32)
+    rewards[destination] = REACHED_REWARD
+    return rewards
+
+
+class TrainedPolicy:
+    """Q-tables of a trained fleet, one (rows, cols, n_actions) table per bot."""
+
+    def __init__(self, bot_ids, q_tables, bot_starts, bot_destinations):
+        self.bot_ids = list(bot_ids)
+        self.q_tables = q_tables
+        self.bot_starts = bot_starts
+        self.bot_destinations = bot_destinations
+
+    def q_table(self, bot_id):
+        return self.q_tables[self.bot_ids.index(bot_id)]
+
+    def save(self, filename):
+        np.savez_compressed(filename, bot_ids=np.array(self.bot_ids), q_tables=self.q_tables,
+                            starts=np.array([self.bot_starts[b] for b in self.bot_ids]),
+                            destinations=np.array([self.bot_destinations[b] for b in self.bot_ids]))
+
+    @classmethod
+    def load(cls, filename):
+        data = np.load(filename)
+        bot_ids = [str(b) for b in data['bot_ids']]
+        starts = {b: tuple(int(v) for v in p) for b, p in zip(bot_ids, data['starts'])}
+        destinations = {b: tuple(int(v) for v in p) for b, p in zip(bot_ids, data['destinations'])}
+        return cls(bot_ids, data['q_tables'], starts, destinations)
+
+
+class TrainingResult:
+    def __init__(self, policy):
+        self.policy = policy
+        self.converged = False
+        self.episodes = 0  # Finished episodes over all environments
+        self.successful_episodes = 0  # Episodes in which every bot arrived
+        self.steps = 0  # Ticks of the batch, each covering every environment
+        self.train_time = 0.0
+        self.greedy_paths = {}  # Joint greedy rollout after training
+
+    def summary(self):
+        status = "converged" if self.converged else "did not converge"
+        return (f"Q-learning {status} after {self.episodes} episodes "
+                f"({self.successful_episodes} complete), {self.steps} batch steps, {self.train_time:.2f}s")
+
+
+class TrainingEnvironment:
+    """n_envs copies of one grid and fleet, stepped as one batch.
+
+    Positions are flat cell indices of shape (n_envs, n_bots).  Bots move in
+    the same tick; a move is blocked if its cell holds another bot or a bot
+    listed earlier moves into it too.
+    """
+
+    def __init__(self, grid, bot_starts, bot_destinations, actions, n_envs=64, max_steps=None, seed=None,
+                 revisit_penalty=False):
+        self.grid = grid = WarehouseGrid.coerce(grid)
+        self.actions = actions
+        self.bot_ids = [b for b in bot_starts if bot_destinations.get(b)]
+        self.bot_starts = {b: tuple(bot_starts[b]) for b in self.bot_ids}
+        self.bot_destinations = {b: tuple(bot_destinations[b]) for b in self.bot_ids}
+        self.n_envs = n_envs
+        self.n_bots = len(self.bot_ids)
+        self.n_actions = len(actions)
+        self.max_steps = max_steps or 4 * grid.size
+        self.revisit_penalty = revisit_penalty
+        self.rng = np.random.default_rng(seed)
+
+        self.transitions = transition_table(grid, actions)
+
+        self.starts = np.array([grid.index(self.bot_starts[b]) for b in self.bot_ids], dtype=np.int64)
+        self.destinations = np.array([grid.index(self.bot_destinations[b]) for b in self.bot_ids], dtype=np.int64)
+        self.move_rewards = np.array([move_rewards(grid, dest) for dest in self.destinations])
+
+        self.positions = np.empty((n_envs, self.n_bots), dtype=np.int64)
+        self.visited = np.empty((n_envs, self.n_bots, grid.size), dtype=bool)
+        self.ticks = np.empty(n_envs, dtype=np.int64)
+        self.reset()
+
+    def reset(self, envs=None):
+        """Put the bots of the given environments (default: all) back on their starts."""
+        envs = np.arange(self.n_envs) if envs is None else envs
+        self.positions[envs] = self.starts
+        self.visited[envs] = False
+        self.ticks[envs] = 0
+
+    def arrived(self):
+        return self.positions == self.destinations
+
+    def step(self, chosen):
+        """Apply an (n_envs, n_bots) array of actions.
+
+        Returns (states, actions, rewards, next_states, active), where active
+        marks the bots that had not arrived yet; the others did not move.
+        """
+        states = self.positions.copy()
+        active = states != self.destinations
+        targets = self.transitions[states, chosen]
+        into_wall = (targets < 0) & active
+        blocked = targets < 0
+        for i in range(self.n_bots):
+            for j in range(self.n_bots):
+                if i != j:
+                    blocked[:, i] |= targets[:, i] == states[:, j]
+                    if j < i:
+                        blocked[:, i] |= (targets[:, i] == targets[:, j]) & ~blocked[:, j] & active[:, j]
+        blocked &= active
+        moving = active & ~blocked
+
+        bots = np.broadcast_to(np.arange(self.n_bots), states.shape)
+        safe_targets = np.where(moving, targets, states)
+        rewards = self.move_rewards[bots, safe_targets]
+        envs = np.broadcast_to(np.arange(self.n_envs)[:, None], states.shape)
+        if self.revisit_penalty:
+            rewards = np.where(self.visited[envs, bots, safe_targets], REVISIT_REWARD, rewards)
+        rewards = np.where(safe_targets == self.destinations, REACHED_REWARD, rewards)
+        rewards = np.where(blocked, BLOCKED_REWARD, rewards)
+        rewards = np.where(into_wall, OBSTACLE_REWARD, rewards).astype(np.float32)
+
+        self.positions = np.where(moving, targets, states)
+        self.visited[envs[moving], bots[moving], targets[moving]] = True
+        self.ticks += 1
+        return states, chosen, rewards, self.positions.copy(), active
+
+    def finished(self):
+        """Environments whose episode is over, and which of those all arrived."""
+        all_arrived = self.arrived().all(axis=1)
+        return all_arrived | (self.ticks >= self.max_steps), all_arrived
+
+
+class VectorizedQLearning:
+    """Tabular Q-learning for a whole fleet over a TrainingEnvironment.
+
+    Each bot has its own (rows, cols, n_actions) float32 table, the same
+    layout AutobotQLearning uses, so trained tables drop straight into the
+    GUI bots.  Updates that hit the same entry in one batch step are
+    averaged.
+    """
+
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.2, epsilon_min=0.01, epsilon_decay=0.995):
+        self.env = env
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.epsilon_min = epsilon_min
+        self.epsilon_decay = epsilon_decay
+        self.q = np.zeros((env.n_bots, env.grid.size, env.n_actions), dtype=np.float32)
+
+    def greedy_actions(self, positions):
+        bots = np.arange(self.env.n_bots)
+        return self.q[bots, positions].argmax(axis=-1)
+
+    def choose_actions(self):
+        env = self.env
+        chosen = self.greedy_actions(env.positions)
+        explore = env.rng.random(chosen.shape) < self.epsilon
+        return np.where(explore, env.rng.integers(env.n_actions, size=chosen.shape), chosen)
+
+    def update(self, states, chosen, rewards, next_states, active):
+        bots = np.broadcast_to(np.arange(self.env.n_bots), states.shape)[active]
+        states, chosen, rewards, next_states = states[active], chosen[active], rewards[active], next_states[active]
+        future = self.q[bots, next_states].max(axis=-1)
+        # Nothing is learned past the destination
+        future[next_states == self.env.destinations[bots]] = 0
+        td_error = rewards + self.gamma * future - self.q[bots, states, chosen]
+        flat = (bots * self.env.grid.size + states) * self.env.n_actions + chosen
+        entries, inverse = np.unique(flat, return_inverse=True)
+        mean_error = np.bincount(inverse, weights=td_error) / np.bincount(inverse)
+        self.q.reshape(-1)[entries] += (self.alpha * mean_error).astype(np.float32)
+
+    def greedy_rollout(self):
+        """Run the current greedy policy once, without learning.
+
+        Returns ({bot_id: steps}, all_arrived).
+        """
+        env = self.env
+        rollout = TrainingEnvironment(env.grid, env.bot_starts, env.bot_destinations, env.actions,
+                                      n_envs=1, max_steps=env.max_steps, revisit_penalty=env.revisit_penalty)
+        paths = {bot_id: [] for bot_id in env.bot_ids}
+        seen = set()
+        while True:
+            done, all_arrived = rollout.finished()
+            if done[0]:
+                break
+            before = rollout.positions[0].copy()
+            if before.tobytes() in seen:
+                break  # The greedy policy is deterministic, so it loops forever from here
+            seen.add(before.tobytes())
+            rollout.step(self.greedy_actions(rollout.positions))
+            for i, bot_id in enumerate(env.bot_ids):
+                if before[i] != env.destinations[i]:
+                    paths[bot_id].append(env.grid.position(int(rollout.positions[0, i])))
+        return paths, bool(all_arrived[0])
+
+    def train(self, max_episodes=20000, check_every=50, patience=3, time_limit=60.0):
+        """Train until converged or out of episodes or time.
+
+        Every check_every batch steps the greedy policy is rolled out; the
+        fleet counts as converged once every bot arrives and the rollout has
+        not changed for patience checks in a row.
+        """
+        env = self.env
+        result = TrainingResult(None)
+        started = time.perf_counter()
+        last_paths, stable = None, 0
+        while result.episodes < max_episodes and time.perf_counter() - started < time_limit:
+            self.update(*env.step(self.choose_actions()))
+            self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
+            result.steps += 1
+            done, all_arrived = env.finished()
+            if done.any():
+                result.episodes += int(done.sum())
+                result.successful_episodes += int(all_arrived.sum())
+                env.reset(np.flatnonzero(done))
+            if result.steps % check_every == 0:
+                paths, arrived = self.greedy_rollout()
+                stable = stable + 1 if arrived and paths == last_paths else 0
+                last_paths = paths
+                if stable >= patience:
+                    result.converged = True
+                    break
+        result.greedy_paths, _ = self.greedy_rollout()
+        result.train_time = time.perf_counter() - started
+        result.policy = self.policy()
+        return result
+
+    def policy(self):
+        env = self.env
+        q_tables = self.q.reshape(env.n_bots, env.grid.rows, env.grid.cols, env.n_actions).copy()
+        return TrainedPolicy(env.bot_ids, q_tables, env.bot_starts, env.bot_destinations)
+
+
+def train_q_learning(grid, bot_starts, bot_destinations, actions, n_envs=64, seed=None, revisit_penalty=False,
+                     **kwargs):
+    """Train a fleet headlessly and return a TrainingResult.
+
+    actions maps action ids to (dr, dc) moves, e.g. final.actions.  Extra
+    keyword arguments go to VectorizedQLearning.train.
+    """
+    env = TrainingEnvironment(grid, bot_starts, bot_destinations, actions, n_envs=n_envs, seed=seed,
+                              revisit_penalty=revisit_penalty)
+    return VectorizedQLearning(env).train(**kwargs)
@@ -1,25 +1,27 @@
 import tkinter as tk
 import time
 import numpy as np
-from collections import defaultdict
 import random
 from tkinter import filedialog, messagebox
 
+from occupancy import track
+from grid_renderer import GridRenderer
+from qtable_store import save_q_table, shared_q_table
+from sim_worker import SimulationWorker
+from simulation import BotSimulation
+from warehouse_grid import WarehouseGrid
+
 # Function to read grid and bot positions from multiple files
 def read_multiple_grids(file_list):
     grids = []  # List to store grids
     bot_positions_list = []  # List to store bot positions for each grid
 
     for filename in file_list:
-        grid = []
+        grid = WarehouseGrid.from_file(filename)
         bot_positions = {}  # Dictionary to store autobot start and destination positions
-        with open(filename, 'r') as file:
-            for r, line in enumerate(file):
-                row = line.strip().split()
-                grid.append(row)
-                for c, cell in enumerate(row):
-                    if cell.startswith('A') or cell.startswith('B'):
-                        bot_positions[cell] = (r, c)
+        for (r, c), cell in grid.labels.items():
+            if cell.startswith('A') or cell.startswith('B'):
+                bot_positions[cell] = (r, c)
         
         grids.append(grid)
         bot_positions_list.append(bot_positions)
@@ -36,20 +38,24 @@ actions = {
 
 # Define autobot class using Q-learning (same as previous)
 class AutobotQLearning:
-    def __init__(self, start, dest, grid, name, alpha=0.1, gamma=0.9, epsilon=0.1):
+    def __init__(self, start, dest, grid, name, alpha=0.1, gamma=0.9, epsilon=0.1, trace_decay=0.0):
         self.pos = start
         self.dest = dest
         self.grid = grid
         self.name = name
-        self.q_table = defaultdict(lambda: [0, 0, 0, 0])
+        # Shared with every bot on this grid heading to the same destination
+        self.q_table = shared_q_table(self.grid, actions).table(dest)
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
+        self.trace_decay = trace_decay  # Lambda of Watkins Q(lambda); 0 is one-step Q-learning
+        self.traces = np.zeros(self.q_table.shape, dtype=np.float32) if trace_decay else None
+        self.occupancy = None  # Fleet-wide OccupancyGrid, set on the first move
         self.steps = 0
         self.time_taken = None
         self.reached = False
         self.learned_path = []
-        self.rows, self.cols = len(self.grid), len(self.grid[0])
+        self.rows, self.cols = self.grid.rows, self.grid.cols
     
     def get_state(self):
         return self.pos
@@ -58,25 +64,37 @@ class AutobotQLearning:
         if random.uniform(0, 1) < self.epsilon:
             return random.choice(list(actions.keys()))  # Explore
         else:
-            return np.argmax(self.q_table[self.get_state()])  # Exploit best action from Q-table
+            return int(self.q_table[self.get_state()].argmax())  # Exploit best action from Q-table
 
     def update_q_value(self, state, action, reward, next_state):
-        old_value = self.q_table[state][action]
-        future_value = max(self.q_table[next_state])
-        self.q_table[state][action] = old_value + self.alpha * (reward + self.gamma * future_value - old_value)
+        q_values = self.q_table[state]  # View into the table, updated in place
+        future_value = self.q_table[next_state].max()
+        td_error = reward + self.gamma * future_value - q_values[action]
+        if self.traces is None:
+            q_values[action] += self.alpha * td_error
+            return
+        # Watkins Q(lambda): the error also updates every recently visited
+        # (state, action), weighted by how recently it was taken
+        if q_values[action] != q_values.max() or next_state == state:
+            # Exploratory and blocked moves break the chain of credit, so
+            # earlier moves are not blamed for walking into a wall
+            self.traces[:] = 0
+        self.traces[state][action] = 1  # Replacing traces
+        self.q_table += self.alpha * td_error * self.traces
+        self.traces *= self.gamma * self.trace_decay
 
     def get_reward(self, new_pos):
         if new_pos == self.dest:
             return 100
-        elif self.grid[new_pos[0]][new_pos[1]] == 'X':
+        elif self.grid.is_obstacle(new_pos):
             return -100
         else:
             return -1
     
     def is_valid_position(self, pos):
-        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols and self.grid[pos[0]][pos[1]] != 'X'
+        return self.grid.is_free(pos)
 
-    def move(self, bots):
+    def move(self, bots, collision_cells=None):
         if self.pos == self.dest:
             if not self.reached:
                 self.reached = True
@@ -86,14 +104,20 @@ class AutobotQLearning:
         state = self.get_state()
         action = self.choose_action()
         new_pos = (self.pos[0] + actions[action][0], self.pos[1] + actions[action][1])
-        
-        if self.is_valid_position(new_pos) and not any(bot.pos == new_pos for bot in bots if bot != self):
+        occupancy = self.occupancy or track(self.grid, bots)
+
+        if self.is_valid_position(new_pos) and not occupancy.is_taken(new_pos, self):
             reward = self.get_reward(new_pos)
             next_state = new_pos
             self.update_q_value(state, action, reward, next_state)
+            occupancy.move(self, new_pos)
             self.pos = new_pos
             self.steps += 1
             self.learned_path.append(self.pos)
+            if self.pos == self.dest:
+                save_q_table(self.grid, self.dest, actions, self.q_table)  # Warm start for the next run
+                if self.traces is not None:
+                    self.traces[:] = 0  # Episode over
         else:
             reward = -10
             self.update_q_value(state, action, reward, state)
@@ -105,6 +129,7 @@ def create_gui(grids, bot_positions_list):
 
     # Initial grid setup
     current_grid_idx = 0  # Track which grid is active
+    worker = None  # Steps the bots of the current grid on its own thread
 
     # Dropdown for selecting a grid
     def select_grid(index):
@@ -127,56 +152,66 @@ def create_gui(grids, bot_positions_list):
     canvas.grid(row=1, column=0)
 
     cell_size = 100
+    renderer = None
 
     def update_grid():
+        nonlocal renderer
+        if renderer is not None:
+            renderer.close()
         canvas.delete("all")  # Clear previous grid
-        grid = grids[current_grid_idx]
-        rows, cols = len(grid), len(grid[0])
-
-        # Dynamically adjust canvas size based on grid dimensions
-        canvas.config(width=cols * cell_size, height=rows * cell_size)
-
-        for r in range(rows):
-            for c in range(cols):
-                x1 = c * cell_size
-                y1 = r * cell_size
-                x2 = x1 + cell_size
-                y2 = y1 + cell_size
 
-                if grid[r][c] == 'X':
-                    canvas.create_rectangle(x1, y1, x2, y2, fill='red', outline="black")
-                else:
-                    canvas.create_rectangle(x1, y1, x2, y2, fill='white', outline="black")
+        # Zoomable viewport sized to the grid, at most 800x800 pixels
+        renderer = GridRenderer(canvas, grids[current_grid_idx], cell_size, font=("Arial", 16))
 
         bots = load_bots_for_grid(current_grid_idx)
         update_bots(bots)
 
     # Animate bots for each grid
     def update_bots(bots):
-        def animate_bots(bots):
-            canvas.delete("bot")
-            for bot in bots:
-                current_pos = bot.pos
-                if 0 <= current_pos[0] < len(grids[current_grid_idx]) and 0 <= current_pos[1] < len(grids[current_grid_idx][0]):
-                    canvas.create_text(current_pos[1] * cell_size + 50, current_pos[0] * cell_size + 50, 
-                                        text=bot.name, font=("Arial", 16), tag="bot")
-                if bot.pos == bot.dest:                
-                    print(f"{bot.name} reached its destination in {bot.time_taken} steps!")
-                    
-            root.update()
+        nonlocal worker
+        if worker is not None:
+            worker.stop()  # The previous grid's bots stop learning
+        simulation = BotSimulation(bots)
+
+        def step():
+            simulation.step()
+            return None if simulation.done() else 0.5
 
-        def update():
-            for bot in bots:
-                bot.move(bots)
-            animate_bots(bots)
-            root.after(500, update)
+        def snapshot():
+            # Immutable copy of what the GUI shows, taken on the worker thread
+            return tuple((bot.name, bot.pos, bot.pos == bot.dest, bot.time_taken) for bot in bots)
 
-        update()
+        def animate_bots(frame):
+            for name, current_pos, reached, time_taken in frame:
+                if 0 <= current_pos[0] < len(grids[current_grid_idx]) and 0 <= current_pos[1] < len(grids[current_grid_idx][0]):
+                    renderer.label(name, current_pos, name)
+                if reached:
+                    print(f"{name} reached its destination in {time_taken} steps!")
+
+        def update(bot_worker):
+            if bot_worker is not worker:
+                return  # Another grid was selected
+            running = bot_worker.running()
+            frame = bot_worker.latest()
+            if frame is not None:
+                animate_bots(frame)
+            if running:
+                root.after(50, update, bot_worker)
+
+        worker = SimulationWorker(step, snapshot).start()
+        update(worker)
 
     # Dropdown for grid selection
     dropdown = tk.OptionMenu(root, tk.StringVar(value="Select Grid"), *[f"Grid {i+1}" for i in range(len(grids))], command=lambda value: select_grid(int(value.split()[-1]) - 1))
     dropdown.grid(row=0, column=0)
 
+    def on_close():
+        if worker is not None:
+            worker.stop()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
     # Initial grid and bots
     update_grid()
 
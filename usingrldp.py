@@ -1,21 +1,19 @@
 import tkinter as tk
 import time
-import numpy as np
 import random
-from collections import defaultdict
+
+from occupancy import track
+from qtable_store import save_q_table, shared_q_table
+from warehouse_grid import WarehouseGrid
 
 # Function to read the grid from a file and extract bot positions
 def read_grid_and_bots_from_file(filename):
-    grid = []
+    grid = WarehouseGrid.from_file(filename)
     bot_positions = {}  # Dictionary to store autobot start and destination positions
-    
-    with open(filename, 'r') as file:
-        for r, line in enumerate(file):
-            row = line.strip().split()
-            grid.append(row)
-            for c, cell in enumerate(row):
-                if cell.startswith('A') or cell.startswith('B'):
-                    bot_positions[cell] = (r, c)
+
+    for (r, c), cell in grid.labels.items():
+        if cell.startswith('A') or cell.startswith('B'):
+            bot_positions[cell] = (r, c)
     
     return grid, bot_positions
 
@@ -34,11 +32,12 @@ class AutobotQLearning:
         self.dest = dest  # Destination position
         self.grid = grid  # Warehouse grid
         self.name = name  # Bot name for identification
-        self.q_table = defaultdict(lambda: [0, 0, 0, 0])  # Initialize Q-table with zeros
+        self.q_table = shared_q_table(grid, actions).table(dest)  # Shared by all bots heading to dest
         self.alpha = alpha  # Learning rate
         self.gamma = gamma  # Discount factor
         self.epsilon = epsilon  # Exploration rate
         self.steps = 0  # Count of steps taken
+        self.occupancy = None  # Fleet-wide OccupancyGrid, set on the first move
         self.start_time = time.time()  # Start time for calculating elapsed time
 
     def get_state(self):
@@ -48,18 +47,18 @@ class AutobotQLearning:
         if random.uniform(0, 1) < self.epsilon:
             return random.choice(list(actions.keys()))  # Explore
         else:
-            return np.argmax(self.q_table[self.get_state()])  # Exploit best action from Q-table
+            return int(self.q_table[self.get_state()].argmax())  # Exploit best action from Q-table
 
     def update_q_value(self, state, action, reward, next_state):
-        old_value = self.q_table[state][action]
-        future_value = max(self.q_table[next_state])  # Max Q-value for the next state
+        q_values = self.q_table[state]  # View into the table, updated in place
+        future_value = self.q_table[next_state].max()  # Max Q-value for the next state
         # Update Q-value using Q-learning formula
-        self.q_table[state][action] = old_value + self.alpha * (reward + self.gamma * future_value - old_value)
+        q_values[action] += self.alpha * (reward + self.gamma * future_value - q_values[action])
 
     def get_reward(self, new_pos):
         if new_pos == self.dest:
             return 100  # Large positive reward for reaching the destination
-        elif self.grid[new_pos[0]][new_pos[1]] == 'X':  # Obstacle
+        elif self.grid.is_obstacle(new_pos):  # Obstacle
             return -100  # Large negative reward for hitting an obstacle
         else:
             return -1  # Small negative reward for each step taken
@@ -72,20 +71,24 @@ class AutobotQLearning:
         action = self.choose_action()
         new_pos = (self.pos[0] + actions[action][0], self.pos[1] + actions[action][1])
         
+        occupancy = self.occupancy or track(self.grid, bots)
+
         # Check bounds and obstacles
-        rows, cols = len(self.grid), len(self.grid[0])
-        if 0 <= new_pos[0] < rows and 0 <= new_pos[1] < cols and self.grid[new_pos[0]][new_pos[1]] != 'X':
+        if self.grid.is_free(new_pos):
             # Check for collision with other bots
-            if not any(bot.pos == new_pos for bot in bots if bot != self):
+            if not occupancy.is_taken(new_pos, self):
                 reward = self.get_reward(new_pos)
                 next_state = new_pos
                 # Update Q-table
                 self.update_q_value(state, action, reward, next_state)
                 
                 # Move the bot
+                occupancy.move(self, new_pos)
                 self.pos = new_pos
                 self.steps += 1  # Increment steps taken
                 self.log_movement(action)  # Log movement
+                if self.pos == self.dest:
+                    save_q_table(self.grid, self.dest, actions, self.q_table)  # Keep what was learned for next run
             else:
                 reward = -10  # Penalty for collision
                 self.update_q_value(state, action, reward, state)
@@ -118,7 +121,7 @@ def create_gui(grid, bots):
     canvas.grid(row=0, column=0)
 
     cell_size = 100
-    rows, cols = len(grid), len(grid[0])
+    rows, cols = grid.rows, grid.cols
 
     # Create grid cells
     cells = {}
@@ -129,7 +132,7 @@ def create_gui(grid, bots):
             x2 = x1 + cell_size
             y2 = y1 + cell_size
 
-            if grid[r][c] == 'X':
+            if grid.is_obstacle((r, c)):
                 color = 'red'  # Obstacle
             elif (r, c) in [bot1.pos, bot2.pos, bot3.pos]:  # Bot positions
                 color = 'lightblue'  # Bot color
@@ -0,0 +1,79 @@
+"""Exact policies for a static grid by value iteration.
+
+For a fixed layout and destination the policy that AutobotQLearning
+approaches by trial and error can be computed directly.  The rewards are
+those of final.py (see training.py), without the per-episode revisit
+penalty, with one difference: a move into a wall or obstacle keeps the bot
+in place and costs OBSTACLE_REWARD (-100), where final.py's ``move()``
+charges -20 for any blocked or invalid move.  At -20, waiting in place
+beats every step once the destination is about 20 moves away, and the
+solved policy would stall on all but the smallest grids.  The destination
+is absorbing.  Every sweep is one NumPy expression over all cells and actions.
+
+The optimal policy for these rewards is usually, but not always, a shortest
+path: the distance term can make a detour past cells nearer the destination
+worth an extra step or two.  Once the destination is about 100 moves away a
+single step costs more than bumping into a wall, so on very large grids the
+optimal policy stalls far from the destination; that is a property of the
+rewards, not of the solver.
+"""
+import time
+import weakref
+
+import numpy as np
+
+from training import OBSTACLE_REWARD, move_rewards, transition_table
+from warehouse_grid import WarehouseGrid
+
+
+class ValueIterationResult:
+    def __init__(self, q_table, iterations, solve_time):
+        self.q_table = q_table  # (rows, cols, n_actions) float32, same layout as AutobotQLearning
+        self.iterations = iterations
+        self.solve_time = solve_time
+
+    @property
+    def policy(self):
+        """Best action per cell, shape (rows, cols)."""
+        return self.q_table.argmax(axis=-1)
+
+
+def value_iteration(grid, dest, actions, gamma=0.9, tolerance=1e-4, max_iterations=100000):
+    """Solve for the optimal Q-values of every cell heading to dest."""
+    grid = WarehouseGrid.coerce(grid)
+    started = time.perf_counter()
+    transitions = transition_table(grid, actions)
+    blocked = transitions < 0
+    cells = np.arange(grid.size)
+    next_cells = np.where(blocked, cells[:, None], transitions)
+    destination = grid.index(dest)
+    rewards = np.where(blocked, OBSTACLE_REWARD, move_rewards(grid, destination)[next_cells])
+    value = np.zeros(grid.size)
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        q = rewards + gamma * value[next_cells]
+        new_value = q.max(axis=1)
+        new_value[destination] = 0  # Nothing more to earn once there
+        delta = np.abs(new_value - value).max()
+        value = new_value
+        if delta < tolerance:
+            break
+    q = rewards + gamma * value[next_cells]
+    q_table = q.astype(np.float32).reshape(grid.rows, grid.cols, len(actions))
+    return ValueIterationResult(q_table, iterations, time.perf_counter() - started)
+
+
+# Solved tables per grid object: (grid version, {(dest, actions, gamma): result})
+_solved = weakref.WeakKeyDictionary()
+
+
+def solve_policy(grid, dest, actions, gamma=0.9):
+    """Cached value_iteration; re-solved after the grid changes."""
+    version, per_grid = _solved.get(grid, (None, None))
+    if version != grid.version:
+        per_grid = {}
+        _solved[grid] = (grid.version, per_grid)
+    key = (tuple(dest), tuple(sorted(actions.items())), gamma)
+    if key not in per_grid:
+        per_grid[key] = value_iteration(grid, dest, actions, gamma)
+    return per_grid[key]
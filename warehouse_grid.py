@@ -0,0 +1,197 @@
+"""Compact warehouse grid shared by the planners and the GUIs.
+
+Traversability lives in a ``uint8`` array and the four moves out of every
+cell are precomputed as flat indices, so planners never compare strings.
+Labels such as 'A1', 'B2' or 'Bot 1 Start' are only kept for the few cells
+that carry one.  ``grid[r][c]`` still reads and writes labels so the Tk code
+can keep treating the grid as a nested list.
+"""
+import hashlib
+
+import numpy as np
+
+FREE = 0
+OBSTACLE = 1
+
+# Same order as the neighbour loop in pathfinding.a_star: right, down, left, up
+MOVES = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# Labels that mean "nothing here"
+EMPTY_LABELS = ('.', ' ', '')
+
+
+class WarehouseGrid:
+    def __init__(self, rows, cols):
+        if rows <= 0 or cols <= 0:
+            raise ValueError("Grid must have at least one row and one column.")
+        self.rows = rows
+        self.cols = cols
+        self.cells = np.zeros((rows, cols), dtype=np.uint8)
+        self.labels = {}  # (row, col) -> label for start/destination cells
+        self.version = 0  # Bumped whenever a cell changes traversability
+        self._listeners = []
+        self.neighbors = self._build_neighbor_table()
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a grid from a list of label rows such as ``[['.', 'X', 'A1']]``."""
+        if not rows or not rows[0]:
+            raise ValueError("Grid must have at least one row and one column.")
+        cols = len(rows[0])
+        if any(len(row) != cols for row in rows):
+            raise ValueError("All grid rows must have the same number of cells.")
+        grid = cls(len(rows), cols)
+        for r, row in enumerate(rows):
+            for c, label in enumerate(row):
+                if label == 'X':
+                    grid.cells[r, c] = OBSTACLE
+                elif label not in EMPTY_LABELS:
+                    grid.labels[(r, c)] = label
+        grid.neighbors = grid._build_neighbor_table()
+        return grid
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename, 'r') as file:
+            rows = [line.split() for line in file if line.strip()]
+        return cls.from_rows(rows)
+
+    @classmethod
+    def coerce(cls, grid):
+        # Planners accept either a WarehouseGrid or a legacy nested list
+        return grid if isinstance(grid, cls) else cls.from_rows(grid)
+
+    def _build_neighbor_table(self):
+        # neighbors[i, k] is the flat index reached by MOVES[k] from cell i,
+        # or -1 when that move leaves the grid or runs into an obstacle
+        rows, cols = self.rows, self.cols
+        index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+        free = self.cells == FREE
+        table = np.full((rows, cols, len(MOVES)), -1, dtype=np.int32)
+        table[:, :-1, 0] = np.where(free[:, 1:], index[:, 1:], -1)
+        table[:-1, :, 1] = np.where(free[1:, :], index[1:, :], -1)
+        table[:, 1:, 2] = np.where(free[:, :-1], index[:, :-1], -1)
+        table[1:, :, 3] = np.where(free[:-1, :], index[:-1, :], -1)
+        return table.reshape(rows * cols, len(MOVES))
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def index(self, pos):
+        return pos[0] * self.cols + pos[1]
+
+    def position(self, index):
+        return divmod(int(index), self.cols)
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols
+
+    def is_free(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols and self.cells[pos[0], pos[1]] == FREE
+
+    def is_obstacle(self, pos):
+        return self.cells[pos[0], pos[1]] == OBSTACLE
+
+    def free_neighbors(self, pos):
+        """Free cells one move away from pos, in MOVES order."""
+        return [self.position(n) for n in self.neighbors[self.index(pos)] if n >= 0]
+
+    def label(self, pos):
+        if self.cells[pos[0], pos[1]] == OBSTACLE:
+            return 'X'
+        return self.labels.get((pos[0], pos[1]), '.')
+
+    def set_cell(self, pos, label):
+        """Write a label; 'X' blocks the cell and anything else frees it."""
+        r, c = pos
+        blocked = label == 'X'
+        if blocked or label in EMPTY_LABELS:
+            self.labels.pop((r, c), None)
+        else:
+            self.labels[(r, c)] = label
+        if blocked != (self.cells[r, c] == OBSTACLE):
+            self.set_obstacle(pos, blocked)
+
+    def set_obstacle(self, pos, blocked=True):
+        """Block or free a cell and patch the neighbour table around it."""
+        r, c = pos
+        if blocked == (self.cells[r, c] == OBSTACLE):
+            return
+        self.cells[r, c] = OBSTACLE if blocked else FREE
+        target = -1 if blocked else self.index(pos)
+        for k, (dr, dc) in enumerate(MOVES):
+            # The move from (r - dr, c - dc) in direction k lands on pos
+            nr, nc = r - dr, c - dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                self.neighbors[nr * self.cols + nc, k] = target
+        self.version += 1
+        for listener in list(self._listeners):
+            listener(pos, blocked)
+
+    def add_listener(self, callback):
+        """Call callback(pos, blocked) whenever a cell changes traversability."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # Listeners belong to caches and planners of this process; a pickled
+    # copy (e.g. sent to a worker process) starts without any
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_listeners'] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def fingerprint(self):
+        """Hex digest of the layout (size and obstacles, not labels)."""
+        digest = hashlib.sha1(f"{self.rows}x{self.cols}".encode())
+        digest.update(self.cells.tobytes())
+        return digest.hexdigest()
+
+    def to_rows(self):
+        return [[self.label((r, c)) for c in range(self.cols)] for r in range(self.rows)]
+
+    # Nested-list compatibility: len(grid), grid[r][c], grid[r][c] = label
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        if not 0 <= r < self.rows:
+            if -self.rows <= r < 0:
+                r += self.rows
+            else:
+                raise IndexError("grid row out of range")
+        return _GridRow(self, r)
+
+    def __iter__(self):
+        for r in range(self.rows):
+            yield _GridRow(self, r)
+
+
+class _GridRow:
+    def __init__(self, grid, r):
+        self._grid = grid
+        self._r = r
+
+    def __len__(self):
+        return self._grid.cols
+
+    def __getitem__(self, c):
+        if not 0 <= c < self._grid.cols:
+            if -self._grid.cols <= c < 0:
+                c += self._grid.cols
+            else:
+                raise IndexError("grid column out of range")
+        return self._grid.label((self._r, c))
+
+    def __setitem__(self, c, label):
+        self._grid.set_cell((self._r, c), label)
+
+    def __iter__(self):
+        for c in range(self._grid.cols):
+            yield self._grid.label((self._r, c))